@@ -35,17 +35,21 @@ export default function LogsScreen({ navigate }: LogsScreenProps) {
     const [logs, setLogs] = useState<ExecutionLog[]>([]);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState<'all' | 'success' | 'error'>('all');
+    // Cursor of the next (older) page of logs, null on the last page
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         fetchLogs();
     }, []);
 
-    const fetchLogs = async () => {
+    const fetchLogs = async (cursor?: string) => {
         try {
             const API_BASE = getApiUrl();
             const token = ''; // TODO: Get from auth context
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
 
-            const response = await fetch(`${API_BASE}/areas/logs/`, {
+            const response = await fetch(`${API_BASE}/areas/logs/${query}`, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
@@ -53,7 +57,8 @@ export default function LogsScreen({ navigate }: LogsScreenProps) {
 
             if (response.ok) {
                 const data = await response.json();
-                setLogs(data);
+                setLogs(previous => cursor ? [...previous, ...data] : data);
+                setNextCursor(response.headers.get('X-Next-Cursor'));
             }
         } catch (error) {
             console.error('Failed to fetch logs', error);
@@ -62,6 +67,13 @@ export default function LogsScreen({ navigate }: LogsScreenProps) {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor || loadingMore) return;
+        setLoadingMore(true);
+        await fetchLogs(nextCursor);
+        setLoadingMore(false);
+    };
+
     const formatDate = (dateString: string) => {
         const date = new Date(dateString);
         const now = new Date();
@@ -213,6 +225,16 @@ export default function LogsScreen({ navigate }: LogsScreenProps) {
                         </TouchableOpacity>
                     ))
                 )}
+
+                {nextCursor && (
+                    <TouchableOpacity style={styles.loadMoreButton} onPress={loadMore} disabled={loadingMore}>
+                        {loadingMore ? (
+                            <ActivityIndicator size="small" color="#3b82f6" />
+                        ) : (
+                            <Text style={styles.loadMoreText}>Charger plus</Text>
+                        )}
+                    </TouchableOpacity>
+                )}
             </ScrollView>
         </View>
     );
@@ -360,6 +382,19 @@ const styles = StyleSheet.create({
         borderTopWidth: 1,
         borderTopColor: 'rgba(255,255,255,0.05)',
     },
+    loadMoreButton: {
+        paddingVertical: 12,
+        borderRadius: 8,
+        backgroundColor: 'rgba(255,255,255,0.05)',
+        borderWidth: 1,
+        borderColor: 'rgba(255,255,255,0.1)',
+        alignItems: 'center',
+    },
+    loadMoreText: {
+        fontSize: 14,
+        fontWeight: '600',
+        color: '#3b82f6',
+    },
     logMessage: {
         fontSize: 12,
         color: '#94a3b8',
@@ -14,7 +14,8 @@ from django.core.mail import BadHeaderError, send_mail
 from django.conf import settings
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-import requests
+from automation.http_client import http
+from automation.ratelimit import RateLimited
 from django.utils import timezone
 from datetime import timedelta
 from automation.models import Service, UserService
@@ -228,7 +229,7 @@ class GoogleOAuthExchangeView(APIView):
             "grant_type": "authorization_code",
         }
         try:
-            resp = requests.post(token_url, data=data, timeout=15)
+            resp = http.post(token_url, data=data, timeout=15)
             if resp.status_code != 200:
                 return Response({
                     "error": {
@@ -238,6 +239,13 @@ class GoogleOAuthExchangeView(APIView):
                     }
                 }, status=status.HTTP_400_BAD_REQUEST)
             payload = resp.json()
+        except RateLimited as e:
+            return Response({
+                "error": {
+                    "code": "RATE_LIMITED",
+                    "message": str(e),
+                }
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": str(e.retry_after)})
         except Exception as e:
             return Response({
                 "error": {
@@ -312,10 +320,12 @@ class GoogleLoginView(APIView):
             "grant_type": "authorization_code",
         }
         try:
-            resp = requests.post(token_url, data=data, timeout=15)
+            resp = http.post(token_url, data=data, timeout=15)
             if resp.status_code != 200:
                 return Response({"error": "Google token exchange failed", "details": resp.text}, status=status.HTTP_400_BAD_REQUEST)
             tokens = resp.json()
+        except RateLimited as e:
+            return Response({"error": "Google is rate limiting requests, try again later"}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": str(e.retry_after)})
         except Exception as e:
             return Response({"error": "Request failed", "details": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
 
@@ -324,10 +334,12 @@ class GoogleLoginView(APIView):
         # 2. Get User Info
         user_info_url = "https://www.googleapis.com/oauth2/v2/userinfo"
         try:
-            u_resp = requests.get(user_info_url, headers={"Authorization": f"Bearer {access_token}"}, timeout=15)
+            u_resp = http.get(user_info_url, headers={"Authorization": f"Bearer {access_token}"}, timeout=15)
             if u_resp.status_code != 200:
                 return Response({"error": "Failed to get user info"}, status=status.HTTP_400_BAD_REQUEST)
             user_info = u_resp.json()
+        except RateLimited as e:
+            return Response({"error": "Google is rate limiting requests, try again later"}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": str(e.retry_after)})
         except Exception as e:
             return Response({"error": "Request failed", "details": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
 
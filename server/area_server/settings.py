@@ -178,6 +178,8 @@ SIMPLE_JWT = {
 
 # CORS Configuration
 # CORS_ALLOWED_ORIGINS is overridden by CORS_ALLOW_ALL_ORIGINS = True
+# Pagination headers of /areas/logs/, readable by the web client
+CORS_EXPOSE_HEADERS = ["Link", "X-Next-Cursor"]
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -217,6 +219,10 @@ LOGGING = {
             "handlers": ["console"],
             "level": "INFO",
         },
+        "automation": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
         "django.request": {
             "handlers": ["console"],
             "level": "WARNING",
@@ -230,3 +236,10 @@ GOOGLE_CLIENT_ID = env("GOOGLE_CLIENT_ID", default="")
 GOOGLE_CLIENT_SECRET = env("GOOGLE_CLIENT_SECRET", default="")
 GOOGLE_REDIRECT_URI = env("GOOGLE_REDIRECT_URI", default="http://localhost:8081/")
 
+# Inbound webhooks (automation/views_webhooks.py)
+GITHUB_WEBHOOK_SECRET = env("GITHUB_WEBHOOK_SECRET", default="")
+TELEGRAM_WEBHOOK_SECRET = env("TELEGRAM_WEBHOOK_SECRET", default="")
+
+# Queue fired triggers for `run_reactions` instead of running reactions inline
+# (run_hooks --outbox, and webhook deliveries)
+AUTOMATION_REACTION_OUTBOX = env.bool("AUTOMATION_REACTION_OUTBOX", default=False)
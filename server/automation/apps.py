@@ -22,3 +22,12 @@ class AutomationConfig(AppConfig):
         ProviderRegistry.register(TwitterProvider)
         ProviderRegistry.register(TelegramProvider)
         # ProviderRegistry.register(WeatherAPIProvider)
+
+        # Rebuild the about.json catalog when services, actions or reactions change
+        from django.db.models.signals import post_delete, post_save
+        from . import catalog
+        from .models import Action, Reaction, Service
+
+        for model in (Service, Action, Reaction):
+            post_save.connect(catalog.invalidate, sender=model, dispatch_uid=f"catalog-save-{model.__name__}")
+            post_delete.connect(catalog.invalidate, sender=model, dispatch_uid=f"catalog-delete-{model.__name__}")
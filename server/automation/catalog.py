@@ -0,0 +1,86 @@
+"""
+Service catalog served by /about.json.
+
+The catalog (services with their actions and reactions, and the params
+their provider declares) only changes when sync_providers / init_services
+(or the admin) change Service, Action or Reaction rows. It is built once,
+on first use, from the database joined with ProviderRegistry, and versioned
+by a hash of its content that the view sends as ETag.
+
+Saving or deleting one of these rows invalidates it (see AutomationConfig):
+the generation of the CatalogVersion row is bumped, in the same transaction.
+Every request reads that generation (a primary key lookup), so the web
+server rebuilds its catalog after sync_providers / init_services change the
+database from another process.
+"""
+import hashlib
+import json
+import threading
+
+from django.db.models import F
+
+from .models import CatalogVersion, Service
+from .providers.registry import ACTION, REACTION, ProviderRegistry
+
+VERSION_ID = 1
+
+
+class Catalog:
+    __slots__ = ("services", "version", "generation")
+
+    def __init__(self, services, generation):
+        self.services = services
+        self.version = hashlib.sha256(json.dumps(services, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.generation = generation
+
+    @property
+    def etag(self) -> str:
+        # Weak: client.host and server.current_time differ between responses
+        return f'W/"{self.version}"'
+
+
+def _entries(service_name, kind, rows):
+    return [
+        {"name": row.name, "description": row.description, "params": ProviderRegistry.get_params(service_name, kind, row.name)}
+        for row in sorted(rows, key=lambda row: row.name)
+    ]
+
+
+def build_services() -> list:
+    """The services part of about.json, in one query per table."""
+    return [
+        {
+            "name": service.name,
+            "actions": _entries(service.name, ACTION, service.actions.all()),
+            "reactions": _entries(service.name, REACTION, service.reactions.all()),
+        }
+        for service in Service.objects.prefetch_related("actions", "reactions").order_by("name")
+    ]
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def current_generation() -> int:
+    return CatalogVersion.objects.filter(pk=VERSION_ID).values_list("generation", flat=True).first() or 0
+
+
+def get_catalog() -> Catalog:
+    global _current
+    generation = current_generation()
+    catalog = _current
+    if catalog is not None and catalog.generation == generation:
+        return catalog
+    with _lock:
+        if _current is None or _current.generation != generation:
+            _current = Catalog(build_services(), generation)
+        return _current
+
+
+def invalidate(**kwargs):
+    """Drop the catalog; usable as a post_save / post_delete receiver."""
+    global _current
+    CatalogVersion.objects.get_or_create(pk=VERSION_ID)
+    CatalogVersion.objects.filter(pk=VERSION_ID).update(generation=F("generation") + 1)
+    _current = None
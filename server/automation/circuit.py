@@ -0,0 +1,161 @@
+"""
+Per-service circuit breakers for the hook engine.
+
+Checkers and executors run inside CircuitBreaker.guard(service), service
+being the provider service name of the action or reaction. The HTTP layer
+(automation.http_client and automation.hooks.aio) reports every upstream
+failure (connection error, timeout or 5xx) of the guarded call through
+upstream_failed(). Other exceptions raised by a handler do not count: the
+breaker tracks the health of the upstream, not of an area's configuration.
+
+After `threshold` consecutive failed calls the circuit of the service opens
+and the areas using it are skipped without calling it. Once the cooldown is
+over a single call is let through (half-open): if it succeeds the circuit
+closes, otherwise it opens again with twice the cooldown (up to
+max_cooldown). Opening and closing are logged once per circuit rather than
+once per skipped area.
+"""
+import contextlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 5
+# Seconds a circuit stays open before a probe call, doubled on every failed probe
+COOLDOWN = 30
+MAX_COOLDOWN = 600
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    def __init__(self, service, until):
+        super().__init__(f"Circuit open for {service}")
+        self.service = service
+        self.until = until  # epoch seconds the service may be called again
+
+
+class Circuit:
+    __slots__ = ("state", "failures", "cooldown", "open_until", "probing", "skipped")
+
+    def __init__(self, cooldown):
+        self.state = CLOSED
+        self.failures = 0  # consecutive failed calls
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.probing = False
+        self.skipped = 0  # calls refused since the circuit opened
+
+
+class _Call:
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+_call: ContextVar = ContextVar("circuit_call", default=None)
+
+
+def upstream_failed():
+    """Record an upstream failure for the guarded call in progress, if any."""
+    call = _call.get()
+    if call is not None:
+        call.failed = True
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=None, cooldown=None, max_cooldown=None):
+        config = getattr(settings, "AUTOMATION_CIRCUIT_BREAKER", {})
+        self.threshold = threshold or config.get("threshold", FAILURE_THRESHOLD)
+        self.cooldown = cooldown or config.get("cooldown", COOLDOWN)
+        self.max_cooldown = max_cooldown or config.get("max_cooldown", MAX_COOLDOWN)
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def _circuit(self, service):
+        circuit = self._circuits.get(service)
+        if circuit is None:
+            circuit = self._circuits[service] = Circuit(self.cooldown)
+        return circuit
+
+    def _refuse(self, circuit, service, until):
+        circuit.skipped += 1
+        raise CircuitOpen(service, until)
+
+    def check(self, service, now=None):
+        """Raise CircuitOpen if calls to service are currently refused."""
+        now = now or time.time()
+        with self._lock:
+            circuit = self._circuits.get(service)
+            if circuit is None or circuit.state == CLOSED:
+                return
+            if circuit.state == OPEN and now < circuit.open_until:
+                self._refuse(circuit, service, circuit.open_until)
+            if circuit.state == HALF_OPEN and circuit.probing:
+                self._refuse(circuit, service, now)
+
+    def _enter(self, service, now):
+        """Return True if the call is the probe of a half-open circuit."""
+        with self._lock:
+            circuit = self._circuit(service)
+            if circuit.state == OPEN:
+                if now < circuit.open_until:
+                    self._refuse(circuit, service, circuit.open_until)
+                circuit.state = HALF_OPEN
+                circuit.probing = False
+            if circuit.state == HALF_OPEN:
+                if circuit.probing:
+                    # Wait for the probe: the area is retried at its next poll
+                    self._refuse(circuit, service, now)
+                circuit.probing = True
+                return True
+            return False
+
+    def _exit(self, service, probe, failed, now):
+        with self._lock:
+            circuit = self._circuit(service)
+            if probe:
+                circuit.probing = False
+                if failed:
+                    circuit.cooldown = min(self.max_cooldown, circuit.cooldown * 2)
+                    self._open(circuit, service, now, "probe failed")
+                else:
+                    logger.info("Circuit for %s closed, %d calls skipped while open", service, circuit.skipped)
+                    circuit.state = CLOSED
+                    circuit.failures = 0
+                    circuit.cooldown = self.cooldown
+                    circuit.skipped = 0
+            elif failed:
+                circuit.failures += 1
+                if circuit.state == CLOSED and circuit.failures >= self.threshold:
+                    self._open(circuit, service, now, f"{circuit.failures} consecutive failures")
+            elif circuit.state == CLOSED:
+                circuit.failures = 0
+
+    def _open(self, circuit, service, now, reason):
+        circuit.state = OPEN
+        circuit.open_until = now + circuit.cooldown
+        logger.warning("Circuit for %s opened (%s), retrying in %ds", service, reason, circuit.cooldown)
+
+    @contextlib.contextmanager
+    def guard(self, service):
+        """Run a handler call against service, or raise CircuitOpen."""
+        probe = self._enter(service, time.time())
+        call = _Call()
+        token = _call.set(call)
+        try:
+            yield
+        finally:
+            _call.reset(token)
+            self._exit(service, probe, call.failed, time.time())
+
+    def state(self, service) -> str:
+        with self._lock:
+            circuit = self._circuits.get(service)
+            return circuit.state if circuit else CLOSED
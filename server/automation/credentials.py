@@ -0,0 +1,353 @@
+"""
+Credential broker: ready-to-use access tokens for checkers and executors.
+
+    from automation.credentials import broker
+    token = broker.access_token(area.user_id, "spotify")
+
+Tokens live in OAuthAccount rows (Google, GitHub, Twitter, Facebook) or in
+encrypted UserService rows (other services, e.g. Spotify). The broker keeps
+the decrypted token of each (user, provider) in memory for CACHE_TTL seconds,
+never past its expiry minus REFRESH_MARGIN, so a tick does not query and
+decrypt the same credential once per area.
+
+A token about to expire is refreshed before it is handed out, once: areas
+of the same user asking at the same time wait for that refresh and share
+its result. run_hooks also refreshes tokens expiring within REFRESH_LEAD
+from a background thread (start_background_refresh), so checkers normally
+never wait for a refresh at all.
+
+A failed refresh is not retried before a backoff delay (REFRESH_BACKOFF,
+doubled on every failure up to REFRESH_BACKOFF_MAX, or the max right away
+for a revoked grant) unless the account is relinked with a new refresh
+token; meanwhile the current token is handed out.
+
+At the start of a tick the engines call prefetch(areas): the credentials of
+every area's action and reaction services are loaded in two queries (one on
+OAuthAccount, one on UserService), so handlers asking the broker during the
+tick get them from memory.
+"""
+import os
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from automation.http_client import http
+from automation.models import UserService
+
+# Providers whose tokens are stored on accounts.OAuthAccount
+OAUTH_PROVIDERS = ("google", "github", "twitter", "facebook")
+# Services whose token is the one of another OAuth provider
+SERVICE_PROVIDERS = {
+    "gmail": "google",
+    "google-drive": "google",
+    "youtube": "google",
+}
+# Seconds a decrypted token is served from memory
+CACHE_TTL = 60
+# Refresh tokens expiring within this delay before handing them out...
+REFRESH_MARGIN = timedelta(minutes=5)
+# ...and within this one from the background thread
+REFRESH_LEAD = timedelta(minutes=15)
+# Seconds before retrying a failed refresh, doubled on each failure up to the max
+REFRESH_BACKOFF = 60
+REFRESH_BACKOFF_MAX = 6 * 3600
+
+
+class RefreshError(Exception):
+    pass
+
+
+def _post_token(url, data):
+    response = http.post(url, data=data)
+    if response.status_code != 200:
+        raise RefreshError(f"{response.status_code} {response.text[:200]}")
+    token_data = response.json()
+    if not token_data.get("access_token"):
+        raise RefreshError("no access_token in response")
+    return token_data
+
+
+def refresh_spotify(refresh_token):
+    client_id = os.environ.get("SPOTIFY_CLIENT_ID")
+    client_secret = os.environ.get("SPOTIFY_CLIENT_SECRET")
+    if not client_id or not client_secret:
+        raise RefreshError("Spotify credentials missing in environment")
+    return _post_token("https://accounts.spotify.com/api/token", {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token,
+        "client_id": client_id,
+        "client_secret": client_secret,
+    })
+
+
+def refresh_google(refresh_token):
+    if not settings.GOOGLE_CLIENT_ID or not settings.GOOGLE_CLIENT_SECRET:
+        raise RefreshError("GOOGLE_CLIENT_ID / GOOGLE_CLIENT_SECRET not configured")
+    return _post_token("https://oauth2.googleapis.com/token", {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token,
+        "client_id": settings.GOOGLE_CLIENT_ID,
+        "client_secret": settings.GOOGLE_CLIENT_SECRET,
+    })
+
+
+# provider -> fn(refresh_token) returning the token endpoint's JSON
+# (access_token, optional refresh_token and expires_in)
+REFRESHERS = {
+    "spotify": refresh_spotify,
+    "google": refresh_google,
+}
+
+
+class _Stored:
+    """A credential row, whichever table it lives in."""
+
+    def __init__(self, record):
+        self.record = record
+        if isinstance(record, UserService):
+            self.access_token = record.get_access_token()
+            self.refresh_token = record.get_refresh_token()
+        else:
+            self.access_token = record.access_token or ""
+            self.refresh_token = record.refresh_token or ""
+        self.expires_at = record.expires_at
+
+    def save(self, access_token, refresh_token, expires_at):
+        record = self.record
+        if isinstance(record, UserService):
+            record.set_tokens(access_token, refresh_token)
+            record.expires_at = expires_at
+            record.save(update_fields=["access_token_enc", "refresh_token_enc", "expires_at"])
+        else:
+            record.access_token = access_token
+            record.refresh_token = refresh_token
+            record.expires_at = expires_at
+            record.save(update_fields=["access_token", "refresh_token", "expires_at"])
+        self.access_token, self.refresh_token, self.expires_at = access_token, refresh_token, expires_at
+
+
+def provider_for(service_name):
+    """Provider holding the token of a service (the service name itself unless mapped)."""
+    return SERVICE_PROVIDERS.get(service_name, service_name)
+
+
+def _records(provider):
+    if provider in OAUTH_PROVIDERS:
+        from accounts.models import OAuthAccount
+        return OAuthAccount.objects.filter(provider=provider)
+    return UserService.objects.filter(service__name=provider)
+
+
+class _Cached:
+    __slots__ = ("token", "expires_at", "cached_until")
+
+    def __init__(self, token, expires_at, cached_until):
+        self.token = token
+        self.expires_at = expires_at
+        self.cached_until = cached_until
+
+
+class CredentialBroker:
+    def __init__(self, ttl: int = CACHE_TTL, refresh_margin=REFRESH_MARGIN):
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._key_locks = {}
+        # key -> (consecutive failed refreshes, monotonic time of the next attempt, refresh token)
+        self._failures = {}
+        self.refreshed = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _backing_off(self, key) -> bool:
+        with self._lock:
+            failure = self._failures.get(key)
+        return failure is not None and failure[1] > time.monotonic()
+
+    def _refresh_failed(self, key, refresh_token, exc) -> int:
+        """Record a failed refresh; returns the seconds before the next attempt."""
+        with self._lock:
+            count = self._failures.get(key, (0,))[0] + 1
+            if "invalid_grant" in str(exc):
+                # Revoked or expired grant: only relinking the account fixes it
+                delay = REFRESH_BACKOFF_MAX
+            else:
+                delay = min(REFRESH_BACKOFF_MAX, REFRESH_BACKOFF * 2 ** (count - 1))
+            self._failures[key] = (count, time.monotonic() + delay, refresh_token)
+        return delay
+
+    def _cached(self, key, now):
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is None or cached.cached_until <= time.monotonic():
+            return None
+        if cached.expires_at is not None and cached.expires_at - self.refresh_margin <= now and not self._backing_off(key):
+            return None
+        return cached
+
+    def _remember_missing(self, key):
+        cached = _Cached("", None, time.monotonic() + self.ttl)
+        with self._lock:
+            self._cache[key] = cached
+
+    def _remember(self, key, stored, now):
+        cached_until = time.monotonic() + self.ttl
+        if stored.expires_at is not None and not self._backing_off(key):
+            # Never serve a token from memory once it needs a refresh
+            cached_until = min(cached_until, time.monotonic() + (stored.expires_at - self.refresh_margin - now).total_seconds())
+        cached = _Cached(stored.access_token, stored.expires_at, cached_until)
+        with self._lock:
+            self._cache[key] = cached
+        return cached
+
+    def _refresh(self, provider, stored, now):
+        token_data = REFRESHERS[provider](stored.refresh_token)
+        # Providers may rotate the refresh token; keep the old one otherwise
+        stored.save(
+            token_data["access_token"],
+            token_data.get("refresh_token") or stored.refresh_token,
+            now + timedelta(seconds=int(token_data.get("expires_in", 3600))),
+        )
+        self.refreshed += 1
+
+    def _needs_refresh(self, provider, stored, now, margin):
+        return (
+            provider in REFRESHERS and stored.refresh_token
+            and stored.expires_at is not None and stored.expires_at - margin <= now
+        )
+
+    def _load(self, user_id, provider, now, margin, record=None):
+        """Load (and refresh if needed) a credential, once for concurrent callers."""
+        key = (user_id, provider)
+        with self._key_lock(key):
+            cached = self._cached(key, now + margin - self.refresh_margin)
+            if cached is not None:
+                return cached
+            if record is None:
+                record = _records(provider).filter(user_id=user_id).first()
+            if record is None:
+                return None
+            stored = _Stored(record)
+            with self._lock:
+                failure = self._failures.get(key)
+                if failure is not None and failure[2] != stored.refresh_token:
+                    # Relinked since the failure: the new grant may work
+                    del self._failures[key]
+            if self._needs_refresh(provider, stored, now, margin) and not self._backing_off(key):
+                try:
+                    self._refresh(provider, stored, now)
+                    with self._lock:
+                        self._failures.pop(key, None)
+                except Exception as exc:
+                    # Hand out the current token: the upstream decides whether it still works
+                    delay = self._refresh_failed(key, stored.refresh_token, exc)
+                    print(f"[ERROR] Failed to refresh {provider} token of user {user_id}: {exc} (next attempt in {delay}s)")
+            return self._remember(key, stored, now)
+
+    def access_token(self, user_id, provider, now=None) -> str:
+        """A valid access token of the user for provider, or "" if none is linked."""
+        now = now or timezone.now()
+        cached = self._cached((user_id, provider), now)
+        if cached is None:
+            cached = self._load(user_id, provider, now, self.refresh_margin)
+        return cached.token if cached is not None else ""
+
+    async def access_token_async(self, user_id, provider, now=None) -> str:
+        """access_token for async handlers: a credential not in memory is loaded off the event loop."""
+        now = now or timezone.now()
+        cached = self._cached((user_id, provider), now)
+        if cached is not None:
+            return cached.token
+        return await sync_to_async(self.access_token)(user_id, provider, now)
+
+    def prefetch(self, areas, now=None) -> int:
+        """
+        Load the credentials of the action and reaction services of areas that
+        are not cached yet, in one query per table. Returns how many were loaded.
+        """
+        now = now or timezone.now()
+        wanted = set()
+        for area in areas:
+            for service in (area.action.service, area.reaction.service):
+                key = (area.user_id, provider_for(service.name))
+                if self._cached(key, now) is None:
+                    wanted.add(key)
+        if not wanted:
+            return 0
+
+        user_ids = {user_id for user_id, _ in wanted}
+        providers = {provider for _, provider in wanted}
+        from accounts.models import OAuthAccount
+        records = list(OAuthAccount.objects.filter(
+            user_id__in=user_ids, provider__in=providers & set(OAUTH_PROVIDERS),
+        ))
+        other = providers - set(OAUTH_PROVIDERS)
+        if other:
+            records += UserService.objects.filter(
+                user_id__in=user_ids, service__name__in=other,
+            ).select_related("service")
+
+        for record in records:
+            provider = record.service.name if isinstance(record, UserService) else record.provider
+            key = (record.user_id, provider)
+            if key in wanted:
+                wanted.discard(key)
+                self._load(record.user_id, provider, now, self.refresh_margin, record=record)
+        # Not linked: remembered too, so handlers do not query for them either
+        for key in wanted:
+            self._remember_missing(key)
+        return len(records)
+
+    def refresh_expiring(self, now=None, lead=REFRESH_LEAD) -> int:
+        """Refresh the stored tokens expiring within lead. Returns how many were refreshed."""
+        now = now or timezone.now()
+        before = self.refreshed
+        for provider in REFRESHERS:
+            expiring = _records(provider).filter(expires_at__lte=now + lead)
+            if provider in OAUTH_PROVIDERS:
+                expiring = expiring.exclude(refresh_token__isnull=True).exclude(refresh_token="")
+            else:
+                expiring = expiring.exclude(refresh_token_enc="")
+            for record in expiring:
+                self._load(record.user_id, provider, now, lead, record=record)
+        return self.refreshed - before
+
+    def invalidate(self, user_id=None, provider=None):
+        with self._lock:
+            if user_id is None and provider is None:
+                self._cache.clear()
+                self._failures.clear()
+                return
+            for key in [k for k in self._cache if user_id in (None, k[0]) and provider in (None, k[1])]:
+                del self._cache[key]
+            for key in [k for k in self._failures if user_id in (None, k[0]) and provider in (None, k[1])]:
+                del self._failures[key]
+
+    def start_background_refresh(self, interval: int = 60):
+        """Refresh expiring tokens every interval seconds from a daemon thread. Returns a stop Event."""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                close_old_connections()
+                try:
+                    self.refresh_expiring()
+                except Exception as exc:
+                    print(f"[ERROR] Background token refresh failed: {exc}")
+
+        threading.Thread(target=run, name="credential-refresh", daemon=True).start()
+        return stop
+
+
+broker = CredentialBroker()
@@ -1,8 +1,14 @@
 # Hook engine registries
-from typing import Callable, Dict
+# Checkers and executors may be plain functions or `async def` coroutines;
+# the engines call either kind (see automation.hooks.engine.call_handler).
+from typing import Callable, Dict, Tuple
 
 action_checkers: Dict[str, Callable] = {}
 reaction_executors: Dict[str, Callable] = {}
+# (service name, reaction type) -> executor, for types several services define (send_message)
+service_reactions: Dict[Tuple[str, str], Callable] = {}
+# action type -> fn(area, now) returning the datetime the area is next due
+action_schedules: Dict[str, Callable] = {}
 
 def register_action(name: str):
     def deco(fn: Callable):
@@ -10,8 +16,21 @@ def register_action(name: str):
         return fn
     return deco
 
-def register_reaction(name: str):
+def register_reaction(name: str, service: str = None):
     def deco(fn: Callable):
-        reaction_executors[name] = fn
+        if service:
+            service_reactions[(service, name)] = fn
+        else:
+            reaction_executors[name] = fn
+        return fn
+    return deco
+
+def get_reaction_executor(area):
+    react_type = (area.config_reaction or {}).get("type")
+    return service_reactions.get((area.reaction.service.name, react_type)) or reaction_executors.get(react_type)
+
+def register_schedule(name: str):
+    def deco(fn: Callable):
+        action_schedules[name] = fn
         return fn
     return deco
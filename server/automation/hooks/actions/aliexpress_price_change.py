@@ -1,7 +1,7 @@
 from .. import register_action
-import requests
+from ..cursors import get_cursor, set_cursor
+from automation.http_client import http
 import os
-from django.core.cache import cache
 
 @register_action("price_change")
 def checker(area, now=None):
@@ -26,7 +26,7 @@ def checker(area, now=None):
         }
         params = {"itemId": item_id}
         
-        response = requests.get(url, headers=headers, params=params)
+        response = http.get(url, headers=headers, params=params)
         if response.status_code != 200:
             return False
             
@@ -54,16 +54,16 @@ def checker(area, now=None):
         if current_price == "Unknown":
             return False
             
-        cache_key = f"aliexpress_last_price_{area.id}_{item_id}"
-        last_price = cache.get(cache_key)
+        cursor_name = f"last_price_{item_id}"
+        last_price = get_cursor(area, cursor_name)
         
         if last_price is None:
-            # First run, seed cache
-            cache.set(cache_key, current_price, timeout=None)
+            # First run, seed cursor
+            set_cursor(area, cursor_name, current_price)
             return False
             
         if current_price != last_price:
-            cache.set(cache_key, current_price, timeout=None)
+            set_cursor(area, cursor_name, current_price)
             
             if not hasattr(area, '_trigger_context'):
                 area._trigger_context = {}
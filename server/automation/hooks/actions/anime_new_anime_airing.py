@@ -1,4 +1,5 @@
 from .. import register_action
+from ..cursors import get_cursor, set_cursor
 from automation.providers.registry import ProviderRegistry
 from automation.models import Area
 
@@ -14,11 +15,15 @@ def checker(area, now=None):
         # Build context override if needed
         context = {
             "area_id": area.id,
-            "now": now
+            "now": now,
+            "last_episode_count": get_cursor(area, "last_episode_count", 0)
         }
 
         result = provider.check_new_episode(config, context)
         
+        if "episode_count" in result:
+            set_cursor(area, "last_episode_count", result["episode_count"])
+        
         if result.get("triggered"):
             # Store trigger data in area context for reactions
             if not hasattr(area, '_trigger_context'):
@@ -26,7 +31,7 @@ def checker(area, now=None):
             
             # Copy all result keys to context (except triggered)
             for k, v in result.items():
-                if k != "triggered":
+                if k not in ("triggered", "episode_count"):
                     area._trigger_context[k] = v
                     
             return True
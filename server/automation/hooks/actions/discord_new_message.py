@@ -1,10 +1,10 @@
 from .. import register_action
-import requests
+from ..cursors import get_cursor, set_cursor
+from ..coalesce import get_json_async
 import os
-from django.core.cache import cache
 
 @register_action("new_message")
-def checker(area, now=None):
+async def checker(area, now=None):
     """
     Check if a new message has been posted in the specified Discord channel.
     Params: channel_id (string)
@@ -28,13 +28,12 @@ def checker(area, now=None):
         }
         params = {"limit": 1}
         
-        response = requests.get(url, headers=headers, params=params)
+        # Bot token: areas watching the same channel share one request per tick
+        status_code, data = await get_json_async(url, params=params, headers=headers)
         
-        if response.status_code != 200:
-            # print(f"Discord API Error: {response.status_code} - {response.text}")
+        if status_code != 200:
             return False
             
-        data = response.json()
         if not data:
             return False
             
@@ -46,11 +45,10 @@ def checker(area, now=None):
         
         # Avoid triggering on own messages (if logic requires, but simple diff check is usually enough)
         
-        cache_key = f"discord_last_message_{area.id}"
-        last_id = cache.get(cache_key)
+        last_id = get_cursor(area, "last_message")
         
         if last_id != msg_id:
-            cache.set(cache_key, msg_id, timeout=None)
+            set_cursor(area, "last_message", msg_id)
             
             if not hasattr(area, '_trigger_context'):
                 area._trigger_context = {}
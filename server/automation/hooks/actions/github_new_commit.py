@@ -1,37 +1,22 @@
 from .. import register_action
-from automation.models import UserService, Service
-import requests
-from django.core.cache import cache
+from ..cursors import get_cursor, set_cursor
+from ..coalesce import get_json_async
+from automation.credentials import broker
 
 @register_action("new_commit")
-def checker(area, now=None):
+async def checker(area, now=None):
     """
     Check if a new commit has been pushed to the specified repository.
     Params: repository (string) e.g., "owner/repo"
     """
     try:
-        # Get user's GitHub service
-        service = Service.objects.get(name='github')
-        user_service = UserService.objects.get(user=area.user, service=service)
+        # Access token of the user's GitHub OAuth account (prefetched by the engine)
+        access_token = await broker.access_token_async(area.user_id, "github")
         
-        # Get access token from OAuth account
-        # GitHub provider saves 'access_token' in default OAuth logic
-        # We need to find the OAuthAccount linked to this user and provider 'github'
-        # But wait, UserService doesn't directly link to OAuthAccount in the current model?
-        # Let's check how Spotify did it in utils_spotify.py or just use user.oauth_accounts.
-        
-        # In current model: User -> OAuthAccount (provider='github')
-        # We can query OAuthAccount directly.
-        from accounts.models import OAuthAccount
-        oauth_account = OAuthAccount.objects.filter(user=area.user, provider='github').first()
-        
-        if not oauth_account:
+        if not access_token:
             return False
-            
-        access_token = oauth_account.access_token # Assuming plain token for now (GitHub tokens don't expire quickly unless configured)
 
         # Config
-        config = area.action_parameters or {} # Legacy field name, or use area.config_action
         # The field 'config_action' was added recently. Let's try config_action first, fallback to parameters.
         action_config = getattr(area, 'config_action', {}) or area.action_parameters or {}
         
@@ -47,12 +32,12 @@ def checker(area, now=None):
         }
         params = {"per_page": 1}
         
-        response = requests.get(url, headers=headers, params=params)
+        # The token decides what is visible: only share the result with areas of the same token owner
+        status_code, data = await get_json_async(url, owner=area.user_id, params=params, headers=headers)
         
-        if response.status_code != 200:
+        if status_code != 200:
             return False
             
-        data = response.json()
         if not data:
             return False
             
@@ -61,12 +46,10 @@ def checker(area, now=None):
         message = latest_commit['commit']['message']
         author = latest_commit['commit']['author']['name']
         
-        # Cache check
-        cache_key = f"github_last_commit_{area.id}"
-        last_sha = cache.get(cache_key)
+        last_sha = get_cursor(area, "last_commit")
         
         if last_sha != sha:
-            cache.set(cache_key, sha, timeout=None)
+            set_cursor(area, "last_commit", sha)
             
             # Store context
             if not hasattr(area, '_trigger_context'):
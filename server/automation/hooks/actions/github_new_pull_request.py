@@ -1,23 +1,19 @@
 from .. import register_action
-from automation.models import UserService, Service
-import requests
-from django.core.cache import cache
+from ..cursors import get_cursor, set_cursor
+from ..coalesce import get_json_async
+from automation.credentials import broker
 
 @register_action("new_pull_request")
-def checker(area, now=None):
+async def checker(area, now=None):
     """
     Check if a new pull request has been created in the specified repository.
     Params: repository (string)
     """
     try:
-        service = Service.objects.get(name='github')
-        from accounts.models import OAuthAccount
-        oauth_account = OAuthAccount.objects.filter(user=area.user, provider='github').first()
+        access_token = await broker.access_token_async(area.user_id, "github")
         
-        if not oauth_account:
+        if not access_token:
             return False
-            
-        access_token = oauth_account.access_token
 
         action_config = getattr(area, 'config_action', {}) or area.action_parameters or {}
         repo = action_config.get('repository')
@@ -31,12 +27,12 @@ def checker(area, now=None):
         }
         params = {"per_page": 1, "state": "open", "sort": "created", "direction": "desc"}
         
-        response = requests.get(url, headers=headers, params=params)
+        # The token decides what is visible: only share the result with areas of the same token owner
+        status_code, data = await get_json_async(url, owner=area.user_id, params=params, headers=headers)
         
-        if response.status_code != 200:
+        if status_code != 200:
             return False
             
-        data = response.json()
         if not data:
             return False
             
@@ -47,11 +43,10 @@ def checker(area, now=None):
         user = latest_pr['user']['login']
         url = latest_pr['html_url']
         
-        cache_key = f"github_last_pr_{area.id}"
-        last_id = cache.get(cache_key)
+        last_id = get_cursor(area, "last_pr")
         
         if last_id != pr_id:
-            cache.set(cache_key, pr_id, timeout=None)
+            set_cursor(area, "last_pr", pr_id)
             
             if not hasattr(area, '_trigger_context'):
                 area._trigger_context = {}
@@ -1,71 +1,160 @@
+import json
+import re
+import uuid
+
 from .. import register_action
-from automation.models import UserService, Service
-import requests
-from django.core.cache import cache
+from ..cursors import get_cursor, set_cursor
+from ..coalesce import get_json
+from ..triggers import add_trigger
+from automation.credentials import broker
+from automation.http_client import http
+
+API = "https://gmail.googleapis.com/gmail/v1/users/me"
+BATCH_URL = "https://gmail.googleapis.com/batch/gmail/v1"
+# Gmail accepts up to 100 calls in a batch request
+BATCH_SIZE = 100
+# Emails handled per poll; a history record is never split, so a poll may go past it
+MAX_EMAILS = 100
+
+
+def current_history_id(area, headers):
+    status_code, profile = get_json(f"{API}/profile", owner=area.user_id, headers=headers)
+    if status_code != 200 or not profile:
+        return None
+    return str(profile["historyId"])
+
+
+def new_inbox_messages(area, headers, start):
+    """
+    Ids of the inbox messages added since history id start, oldest first,
+    and the history id to resume from. (None, None) when start is too old.
+    """
+    ids = []
+    params = {"startHistoryId": start, "historyTypes": "messageAdded", "labelId": "INBOX"}
+    while True:
+        status_code, data = get_json(f"{API}/history", owner=area.user_id, params=params, headers=headers)
+        if status_code == 404:
+            return None, None
+        if status_code != 200 or data is None:
+            raise RuntimeError(f"Gmail history.list returned {status_code}")
+        for record in data.get("history", []):
+            for added in record.get("messagesAdded", []):
+                message = added["message"]
+                if "INBOX" in message.get("labelIds", ["INBOX"]) and message["id"] not in ids:
+                    ids.append(message["id"])
+            if len(ids) >= MAX_EMAILS:
+                # Resume after this record on the next poll
+                return ids, str(record["id"])
+        if not data.get("nextPageToken"):
+            return ids, str(data.get("historyId", start))
+        params = {**params, "pageToken": data["nextPageToken"]}
+
+
+def fetch_metadata(headers, ids):
+    """
+    Subject, sender and snippet of messages, in batch requests of BATCH_SIZE.
+    Returns {id: message}, without the messages deleted since they arrived
+    (404); raises if any other part failed, so the emails are fetched again.
+    """
+    details = {}
+    for start in range(0, len(ids), BATCH_SIZE):
+        details.update(fetch_batch(headers, ids[start:start + BATCH_SIZE]))
+    return details
+
+
+def fetch_batch(headers, ids):
+    boundary = f"batch_{uuid.uuid4().hex}"
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <{msg_id}>\r\n\r\n"
+        f"GET /gmail/v1/users/me/messages/{msg_id}?format=metadata&metadataHeaders=Subject&metadataHeaders=From\r\n"
+        for msg_id in ids
+    ]
+    response = http.post(
+        BATCH_URL,
+        headers={**headers, "Content-Type": f"multipart/mixed; boundary={boundary}"},
+        data="\r\n".join(parts) + f"\r\n--{boundary}--\r\n",
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"Gmail batch request returned {response.status_code}")
+    results = parse_batch(response.headers.get("Content-Type", ""), response.text)
+    # A part missing from the response counts as failed, not deleted
+    failed = [str(results.get(msg_id, ("missing",))[0]) for msg_id in ids]
+    failed = [status for status in failed if status not in ("200", "404")]
+    if failed:
+        raise RuntimeError(f"Gmail batch failed for {len(failed)} of {len(ids)} emails ({', '.join(sorted(set(failed)))})")
+    return {msg_id: message for msg_id, (status, message) in results.items() if status == 200}
+
+
+def parse_batch(content_type, body):
+    """Parse a multipart/mixed batch response into {message id: (status, json)}, by Content-ID."""
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not match:
+        return {}
+    results = {}
+    for part in body.split(f"--{match.group(1)}"):
+        # Part headers, then the HTTP response: status line, headers and body
+        content_id = re.search(r"Content-ID: <response-([^>]+)>", part, re.IGNORECASE)
+        status = re.search(r"HTTP/\d(?:\.\d)? (\d{3})", part)
+        if not content_id or not status:
+            continue
+        start = part.find("{")
+        message = json.loads(part[start:part.rfind("}") + 1]) if start >= 0 else None
+        results[content_id.group(1)] = (int(status.group(1)), message)
+    return results
+
 
 @register_action("new_email")
 def checker(area, now=None):
     """
-    Check if a new email has been received in Gmail Inbox.
+    Check if new emails have been received in Gmail Inbox.
+
+    The mailbox historyId is kept as a cursor: history.list returns exactly
+    the messages added since the last poll, and each new email fires its
+    own event. A Gmail push notification (users.watch) only carries a new
+    historyId, so its handler can simply run this checker for the areas of
+    the mailbox.
     """
     try:
-        from accounts.models import OAuthAccount
-        oauth_account = OAuthAccount.objects.filter(user=area.user, provider='google').first()
-        
-        if not oauth_account:
+        access_token = broker.access_token(area.user_id, "google")
+
+        if not access_token:
             return False
-            
-        access_token = oauth_account.access_token
 
-        # 1. List Messages (Inbox)
-        url_list = "https://gmail.googleapis.com/gmail/v1/users/me/messages"
         headers = {"Authorization": f"Bearer {access_token}"}
-        params = {"labelIds": "INBOX", "maxResults": 1}
-        
-        res_list = requests.get(url_list, headers=headers, params=params)
-        
-        if res_list.status_code != 200:
+        start = get_cursor(area, "history_id")
+        if start is None:
+            # First poll: start from the current mailbox state
+            history_id = current_history_id(area, headers)
+            if history_id:
+                set_cursor(area, "history_id", history_id)
             return False
-            
-        data = res_list.json()
-        messages = data.get('messages', [])
-        
-        if not messages:
+
+        ids, history_id = new_inbox_messages(area, headers, start)
+        if ids is None:
+            # History ids expire after about a week: start over from now
+            print(f"gmail_new_email: history {start} expired for area {area.id}, resetting")
+            history_id = current_history_id(area, headers)
+            if history_id:
+                set_cursor(area, "history_id", history_id)
             return False
-            
-        latest_msg = messages[0]
-        msg_id = latest_msg['id']
-        
-        cache_key = f"gmail_last_email_{area.id}"
-        last_id = cache.get(cache_key)
-        
-        if last_id != msg_id:
-            # New email found! Fetch details
-            url_detail = f"https://gmail.googleapis.com/gmail/v1/users/me/messages/{msg_id}"
-            res_detail = requests.get(url_detail, headers=headers)
-            
-            if res_detail.status_code == 200:
-                detail = res_detail.json()
-                snippet = detail.get('snippet', '')
-                payload = detail.get('payload', {})
-                headers_list = payload.get('headers', [])
-                
-                subject = next((h['value'] for h in headers_list if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers_list if h['name'] == 'From'), 'Unknown')
-                
-                cache.set(cache_key, msg_id, timeout=None)
-                
-                if not hasattr(area, '_trigger_context'):
-                    area._trigger_context = {}
-                
-                area._trigger_context['email_subject'] = subject
-                area._trigger_context['email_from'] = sender
-                area._trigger_context['email_snippet'] = snippet
-                area._trigger_context['email_id'] = msg_id
-                
-                return True
-            
-        return False
+
+        details = fetch_metadata(headers, ids) if ids else {}
+        # Only move the cursor once every new email is known (or deleted)
+        set_cursor(area, "history_id", history_id)
+        fired = False
+        for msg_id in ids:
+            detail = details.get(msg_id)
+            if detail is None:
+                continue  # deleted since it arrived
+            headers_list = detail.get('payload', {}).get('headers', [])
+            add_trigger(area, {
+                'email_subject': next((h['value'] for h in headers_list if h['name'] == 'Subject'), 'No Subject'),
+                'email_from': next((h['value'] for h in headers_list if h['name'] == 'From'), 'Unknown'),
+                'email_snippet': detail.get('snippet', ''),
+                'email_id': msg_id,
+            })
+            fired = True
+        return fired
 
     except Exception as e:
         print(f"Error in gmail_new_email: {e}")
@@ -1,7 +1,7 @@
 from .. import register_action
-import requests
+from ..cursors import get_cursor, set_cursor
+from automation.http_client import http
 import os
-from django.core.cache import cache
 
 @register_action("new_post")
 def checker(area, now=None):
@@ -27,7 +27,7 @@ def checker(area, now=None):
         }
         payload = {"username": username}
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = http.post(url, headers=headers, json=payload)
         if response.status_code != 200:
             return False
             
@@ -46,15 +46,15 @@ def checker(area, now=None):
         shortcode = latest_post.get('shortcode', '')
         post_url = f"https://www.instagram.com/p/{shortcode}/" if shortcode else ""
         
-        cache_key = f"instagram_last_post_{area.id}_{username}"
-        last_id = cache.get(cache_key)
+        cursor_name = f"last_post_{username}"
+        last_id = get_cursor(area, cursor_name)
         
         if last_id is None:
-            cache.set(cache_key, post_id, timeout=None)
+            set_cursor(area, cursor_name, post_id)
             return False
             
         if post_id != last_id:
-            cache.set(cache_key, post_id, timeout=None)
+            set_cursor(area, cursor_name, post_id)
             
             if not hasattr(area, '_trigger_context'):
                 area._trigger_context = {}
@@ -1,24 +1,19 @@
 from .. import register_action
-from automation.models import UserService, Service, Area
-from automation.utils_spotify import get_valid_spotify_token
-import requests
-from django.core.cache import cache
+from ..cursors import get_cursor, set_cursor
+from automation.credentials import broker
+from automation.http_client import http
 
 
 @register_action("new_saved_track")
 def checker(area, now=None):
     """
     Check if user has saved a new track on Spotify.
-    Uses polling with cache to track last seen track.
+    Uses polling with a cursor to track last seen track.
     Returns True if new track detected, and stores track_uri in context.
     """
     try:
-        # Get user's Spotify token
-        service = Service.objects.get(name='spotify')
-        user_service = UserService.objects.get(user=area.user, service=service)
-        
-        # Use valid token
-        access_token = get_valid_spotify_token(user_service)
+        # Get user's Spotify token (refreshed by the broker when about to expire)
+        access_token = broker.access_token(area.user_id, "spotify")
         
         if not access_token:
             return False
@@ -28,7 +23,7 @@ def checker(area, now=None):
         headers = {"Authorization": f"Bearer {access_token}"}
         params = {"limit": 1}  # Only get the most recent track
         
-        response = requests.get(url, headers=headers, params=params)
+        response = http.get(url, headers=headers, params=params)
         
         if response.status_code != 200:
             return False
@@ -45,14 +40,11 @@ def checker(area, now=None):
         track_name = latest_track["track"]["name"]
         artist_name = latest_track["track"]["artists"][0]["name"] if latest_track["track"]["artists"] else "Unknown"
         
-        # Cache key unique to this area
-        cache_key = f"spotify_last_track_{area.id}"
-        last_seen_track = cache.get(cache_key)
+        last_seen_track = get_cursor(area, "last_track")
         
         # If this is a new track (different from last seen)
         if last_seen_track != track_uri:
-            # Update cache
-            cache.set(cache_key, track_uri, timeout=None)  # Never expire
+            set_cursor(area, "last_track", track_uri)
             
             # Store track info in area's context for the reaction to use
             # We'll use a temporary attribute (not saved to DB)
@@ -66,10 +58,6 @@ def checker(area, now=None):
         
         return False
         
-    except Service.DoesNotExist:
-        return False
-    except UserService.DoesNotExist:
-        return False
     except Exception as e:
         print(f"Error in new_saved_track checker: {e}")
         return False
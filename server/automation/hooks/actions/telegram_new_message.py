@@ -1,10 +1,10 @@
 from .. import register_action
-import requests
+from ..cursors import get_cursor, set_cursor
+from ..coalesce import get_json_async
 import os
-from django.core.cache import cache
 
 @register_action("new_message")
-def checker(area, now=None):
+async def checker(area, now=None):
     """
     Check if a new message has been received in the Telegram Bot's chat.
     Params: chat_id (string)
@@ -24,11 +24,11 @@ def checker(area, now=None):
         url = f"https://api.telegram.org/bot{token}/getUpdates"
         params = {"offset": -10} 
         
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
+        # Same bot-wide call for every area: fetched once per tick
+        status_code, data = await get_json_async(url, params=params)
+        if status_code != 200 or not data:
             return False
             
-        data = response.json()
         if not data.get("ok"):
             return False
             
@@ -60,18 +60,15 @@ def checker(area, now=None):
         text = message.get('text', '')
         sender = message.get('from', {}).get('first_name', 'Unknown')
         
-        cache_key = f"telegram_last_update_{area.id}"
-        last_id = cache.get(cache_key)
+        last_id = get_cursor(area, "last_update")
         
-        # If no cache, we might not want to trigger on old messages immediately
-        # But for logic simplicity, we trigger if ID matches what we see as "newest" compared to nothing?
-        # Better: if last_id is None, set it and return False (bootstrap).
+        # No cursor yet: seed it without triggering on old messages (bootstrap).
         if last_id is None:
-            cache.set(cache_key, update_id, timeout=None)
+            set_cursor(area, "last_update", update_id)
             return False
             
         if update_id > last_id:
-            cache.set(cache_key, update_id, timeout=None)
+            set_cursor(area, "last_update", update_id)
             
             if not hasattr(area, '_trigger_context'):
                 area._trigger_context = {}
@@ -1,6 +1,5 @@
-from datetime import datetime, timezone
-from ...models import ExecutionLog
-from .. import register_action
+from datetime import datetime, timedelta, timezone
+from .. import register_action, register_schedule
 
 @register_action("timer")
 def check_timer(area, now=None):
@@ -12,8 +11,17 @@ def check_timer(area, now=None):
     interval = int(cfg.get("interval_seconds", 60))
     if now is None:
         now = datetime.now(timezone.utc)
-    last = ExecutionLog.objects.filter(area=area, status="success").order_by("-executed_at").first()
-    if not last:
+    last_success = area.get_trigger_state().last_success_at
+    if not last_success:
         return True
-    delta = (now - last.executed_at).total_seconds()
+    delta = (now - last_success).total_seconds()
     return delta >= interval
+
+@register_schedule("timer")
+def next_timer(area, now):
+    cfg = area.config_action or {}
+    interval = timedelta(seconds=int(cfg.get("interval_seconds", 60)))
+    last_success = area.get_trigger_state().last_success_at
+    if last_success and last_success + interval > now:
+        return last_success + interval
+    return now + interval
@@ -1,56 +1,48 @@
-from datetime import datetime, timezone
-from ...models import ExecutionLog
-from .. import register_action
+from datetime import datetime, timedelta, timezone
+from .. import register_action, register_schedule
+from ..cron import CronError, compile_cron
+
+
+def get_cron(area):
+    """
+    Compiled expression of the area, or None if it is invalid.
+    config_action: {"type": "cron_schedule", "expression": "*/5 * * * *", "timezone": "Europe/Paris"}
+    """
+    config = area.config_action or {}
+    try:
+        return compile_cron(config.get("expression", "* * * * *"), config.get("timezone") or None)
+    except CronError as e:
+        print(f"Invalid cron_schedule for area {area.id}: {e}")
+        return None
+
 
 @register_action("cron_schedule")
 def check_cron(area, now=None):
     """
-    Basic Cron implementation.
-    Supports only simple "*" or specific numbers for now without external lib.
-    Format: MIN HOUR DOM MON DOW
+    Fires when a fire time of the expression has passed since the last
+    success, so a fire is not missed when a tick runs late.
+    Format: MIN HOUR DOM MON DOW (see automation.hooks.cron)
     """
     if now is None:
         now = datetime.now(timezone.utc)
-        
-    config = area.config_action or {}
-    expression = config.get("expression", "* * * * *")
-    
-    parts = expression.split()
-    if len(parts) != 5:
-        return False # Invalid cron
-        
-    min_s, hour_s, dom_s, mon_s, dow_s = parts
-    
-    def match(value, field_val):
-        if value == '*': return True
-        # Handle lists "1,2"
-        if ',' in value:
-            return str(field_val) in value.split(',')
-        # Handle steps "*/5"
-        if value.startswith('*/'):
-            try:
-                step = int(value[2:])
-                return field_val % step == 0
-            except: pass
-        return str(field_val) == value
-
-    # Check matches
-    is_match = (
-        match(min_s, now.minute) and
-        match(hour_s, now.hour) and
-        match(dom_s, now.day) and
-        match(mon_s, now.month) and
-        match(dow_s, now.weekday() + 1) # 1-7 in cron usually? or 0-6. Python is 0=Mon. Let's assume standard 0-6 or 1-7 overlap.
-    )
-    
-    if not is_match:
+
+    cron = get_cron(area)
+    if cron is None:
+        return False
+
+    # Never ran: only fire if the current minute matches
+    since = area.get_trigger_state().last_success_at or now.replace(second=0, microsecond=0) - timedelta(seconds=1)
+    try:
+        return cron.next_fire_after(since) <= now
+    except CronError:
         return False
-        
-    # Rate limit: Don't trigger multiple times in the same minute
-    last = ExecutionLog.objects.filter(area=area, status="success").order_by("-executed_at").first()
-    if last:
-        delta = (now - last.executed_at).total_seconds()
-        if delta < 60:
-            return False # Already ran this minute
-            
-    return True
+
+
+@register_schedule("cron_schedule")
+def next_cron_check(area, now):
+    # Sleep until the exact minute the expression fires next
+    cron = get_cron(area)
+    try:
+        return cron.next_fire_after(now) if cron else now + timedelta(days=1)
+    except CronError:
+        return now + timedelta(days=1)
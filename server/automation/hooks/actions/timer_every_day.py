@@ -1,6 +1,5 @@
-from datetime import datetime, timezone
-from ...models import ExecutionLog
-from .. import register_action
+from datetime import datetime, timedelta, timezone
+from .. import register_action, register_schedule
 
 @register_action("every_day")
 def check_every_day(area, now=None):
@@ -20,18 +19,18 @@ def check_every_day(area, now=None):
         # Check if current time is roughly matching target time (within 60s window if loop is slow)
         # OR simply check if we haven't run today AND it is past target time
         
-        last = ExecutionLog.objects.filter(area=area, status="success").order_by("-executed_at").first()
+        last_success = area.get_trigger_state().last_success_at
         
         # If never run, run if current time >= target time
         current_minutes = now.hour * 60 + now.minute
         target_minutes = h * 60 + m
         
-        if not last:
+        if not last_success:
              return current_minutes >= target_minutes
              
         # If run previously
         # Check if last run was on a different day
-        if last.executed_at.date() < now.date():
+        if last_success.date() < now.date():
             # It's a new day, check if we passed the time
             return current_minutes >= target_minutes
             
@@ -39,3 +38,13 @@ def check_every_day(area, now=None):
         
     except Exception:
         return False
+
+@register_schedule("every_day")
+def next_every_day(area, now):
+    """Next occurrence of the configured HH:MM after now."""
+    config = area.config_action or {}
+    h, m = map(int, config.get("time", "00:00").split(':'))
+    target = now.replace(hour=h, minute=m, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
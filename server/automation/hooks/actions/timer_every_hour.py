@@ -1,6 +1,5 @@
-from datetime import datetime, timezone
-from ...models import ExecutionLog
-from .. import register_action
+from datetime import datetime, timedelta, timezone
+from .. import register_action, register_schedule
 
 @register_action("every_hour")
 def check_every_hour(area, now=None):
@@ -10,9 +9,13 @@ def check_every_hour(area, now=None):
     if now is None:
         now = datetime.now(timezone.utc)
         
-    last = ExecutionLog.objects.filter(area=area, status="success").order_by("-executed_at").first()
-    if not last:
+    last_success = area.get_trigger_state().last_success_at
+    if not last_success:
         return True
         
-    delta = (now - last.executed_at).total_seconds()
+    delta = (now - last_success).total_seconds()
     return delta >= 3600
+
+@register_schedule("every_hour")
+def next_every_hour(area, now):
+    return now + timedelta(seconds=3600)
@@ -0,0 +1,106 @@
+"""
+Non-blocking HTTP helpers for async checkers and executors.
+
+Async handlers registered with @register_action / @register_reaction should
+use request() instead of the blocking `requests` API. Inside the async engine
+calls share one connection pool and are capped per upstream host; outside of
+it (e.g. when the sync engine drives an async handler) each call gets a
+short-lived client. Like the shared sync client, every call is rate limited
+per upstream and credential (http.limiter): a call the upstream would
+refuse raises RateLimited, and responses update the limits.
+"""
+import asyncio
+import contextlib
+import importlib.util
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from automation.circuit import upstream_failed
+from automation.http_client import http
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # fall back to running the shared sync client in a thread
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2 = httpx is not None and importlib.util.find_spec("h2") is not None
+
+DEFAULT_TIMEOUT = 20
+
+_session: ContextVar = ContextVar("hook_aio_session", default=None)
+
+
+class HostLimits:
+    """Per-host semaphores shared by every request of one engine run."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores = {}
+
+    def for_url(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+
+class _Session:
+    def __init__(self, per_host: int):
+        self.limits = HostLimits(per_host)
+        self.client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, http2=HTTP2) if httpx else None
+
+
+@contextlib.asynccontextmanager
+async def session(per_host: int = 10):
+    """Share one client and per-host caps between all requests made inside."""
+    current = _Session(per_host)
+    token = _session.set(current)
+    try:
+        yield current
+    finally:
+        _session.reset(token)
+        if current.client is not None:
+            await current.client.aclose()
+
+
+async def _send(client, method, url, kwargs):
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    if httpx is None:
+        # The shared client rate limits and reports its own calls
+        return await asyncio.to_thread(http.request, method, url, **kwargs)
+    key = http.limiter.key(url, kwargs.get("headers"))
+    http.limiter.acquire(key)
+    try:
+        if client is not None:
+            response = await client.request(method, url, **kwargs)
+        else:
+            async with httpx.AsyncClient() as one_off:
+                response = await one_off.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        upstream_failed()
+        raise
+    http.limiter.observe(key, response)
+    if response.status_code >= 500:
+        upstream_failed()
+    return response
+
+
+async def request(method: str, url: str, **kwargs):
+    """
+    Perform an HTTP request without blocking the event loop.
+    Accepts the same keyword arguments as requests/httpx (params, json, data, headers, timeout).
+    """
+    current = _session.get()
+    if current is None:
+        return await _send(None, method, url, kwargs)
+    async with current.limits.for_url(url):
+        return await _send(current.client, method, url, kwargs)
+
+
+async def get(url: str, **kwargs):
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs):
+    return await request("POST", url, **kwargs)
@@ -0,0 +1,136 @@
+"""
+asyncio backend of the hook engine (`run_hooks --engine async`).
+
+All areas of a tick are evaluated on one event loop. Async checkers and
+executors are awaited directly and use automation.hooks.aio for their HTTP
+calls, which is capped per upstream host; handlers that are still sync are
+offloaded to a bounded thread pool so they never block the loop.
+
+The hot pollers (GitHub commits/issues/pull requests, Discord and Telegram
+messages) are async and poll through coalesce.get_json_async; the other
+handlers, and so --workers, still decide how fast the rest of a tick runs.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from automation import ratelimit
+from . import aio, coalesce, messages
+from automation.circuit import CircuitOpen
+from automation.credentials import broker
+from .engine import HookEngine, AreaOutcome, TickReport, is_async_handler
+
+
+class AsyncHookEngine(HookEngine):
+    """
+    concurrency bounds the number of areas in flight, per_service the number
+    of those using one service (default: no limit), per_host the
+    number of concurrent aio requests to a single host and workers the size
+    of the thread pool used for sync handlers.
+    """
+
+    def __init__(
+        self, workers: int = 32, concurrency: int = 1000, per_host: int = 10,
+        leases=None, logs=None, breaker=None, per_service=None, outbox=None,
+    ):
+        concurrency = max(1, int(concurrency))
+        super().__init__(
+            workers=workers, leases=leases, logs=logs, breaker=breaker,
+            per_service=per_service, outbox=outbox,
+        )
+        self.concurrency = concurrency
+        self.per_host = max(1, int(per_host))
+
+    def _offload(self, fn, *args, **kwargs):
+        close_old_connections()
+        return fn(*args, **kwargs)
+
+    async def _call(self, fn, pool, *args, **kwargs):
+        if is_async_handler(fn):
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        # Carry the rate limit and circuit tracking of the area into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(pool, context.run, functools.partial(self._offload, fn, *args, **kwargs))
+
+    async def evaluate_async(self, area, now, pool) -> AreaOutcome:
+        checker, executor, error = self.resolve(area)
+        if error:
+            return error
+
+        if not is_async_handler(checker) and not is_async_handler(executor):
+            # Fully sync area: a single hop to the thread pool
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(pool, context.run, self._evaluate_in_worker, area, now)
+
+        started = time.perf_counter()
+        action_service, reaction_service = self.services(area)
+        fired = False
+        with ratelimit.track() as usage:
+            try:
+                if not self.outbox:
+                    self.breaker.check(reaction_service)
+                with self.breaker.guard(action_service):
+                    triggered = await self._call(checker, pool, area, now=now)
+                if not triggered:
+                    outcome = AreaOutcome(area)
+                elif self.outbox:
+                    fired = True
+                    outcome = self.queued(area, now)
+                else:
+                    fired = True
+                    results = []
+                    with self.breaker.guard(reaction_service):
+                        for context in self.trigger_contexts(area, now):
+                            area._trigger_context = dict(context)
+                            results.append(await self._call(executor, pool, area, context=context))
+                    outcome = self.success(area, results)
+            except CircuitOpen as exc:
+                outcome = self.skipped(area, exc, fired)
+            except Exception as exc:
+                outcome = AreaOutcome(area, "error", f"Exception: {exc}", fired=fired)
+        outcome = self.apply_rate_usage(outcome, usage)
+        outcome.elapsed = time.perf_counter() - started
+        return outcome
+
+    async def _run(self, areas, now, pool):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        per_service = {}
+
+        async def one(area):
+            services = sorted(self.bulkhead_services(area))
+            slots = [per_service.setdefault(s, asyncio.Semaphore(self.per_service)) for s in services]
+            # Wait for the service slots first, so waiting areas do not hold global slots
+            for slot in slots:
+                await slot.acquire()
+            try:
+                async with semaphore:
+                    return await self.evaluate_async(area, now, pool)
+            finally:
+                for slot in slots:
+                    slot.release()
+
+        async with aio.session(self.per_host):
+            return await asyncio.gather(*(one(area) for area in areas))
+
+    def run_tick(self, areas=None, now=None, scheduler=None) -> TickReport:
+        now = now or timezone.now()
+        areas = list(self.get_areas(now) if areas is None else areas)
+        started = time.perf_counter()
+        broker.prefetch(areas, now)
+
+        with coalesce.tick() as polls, messages.batch(), \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hook") as pool:
+            outcomes = asyncio.run(self._run(areas, now, pool))
+            self._close_worker_connections(pool)
+        self.apply_deliveries(outcomes)
+
+        self.record(outcomes, now, scheduler)
+
+        return TickReport(outcomes, time.perf_counter() - started, self.workers, polls)
@@ -0,0 +1,228 @@
+"""
+Per-tick coalescing of upstream polls.
+
+Checkers that poll the same upstream resource (fifty areas watching one
+repository, every Telegram area reading the bot-wide getUpdates) declare a
+fetch key; during a tick each distinct key is fetched once and the result is
+shared by all the areas asking for it, including concurrent ones on the
+worker pool. Outside of a tick, calls go straight to the upstream. The tick
+is kept in a context variable: the engines run areas in copies of the
+context, and overlapping ticks in other threads do not see each other.
+
+Keys of resources that depend on whose token is used must include the token
+owner, so a result is never shared with areas of another user.
+fetch_once blocks while another thread fetches the same key: call it from
+sync checkers (the async engine runs those on its thread pool). Async
+checkers use fetch_once_async / get_json_async instead, which await the
+fetch without blocking the event loop; both share the same entries, so a
+sync and an async checker polling one resource still fetch it once.
+
+get_json also remembers the ETag / Last-Modified of every polled resource
+with its parsed body and sends conditional requests: a 304 Not Modified
+(not counted against GitHub's rate limit) returns the remembered body
+without downloading or parsing anything.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from automation import ratelimit
+from automation.http_client import http
+from . import aio
+
+
+class _Entry:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.task = None  # asyncio.Task of an async fetch
+
+    def result(self):
+        if self.error is not None:
+            if isinstance(self.error, ratelimit.RateLimited):
+                # Every area sharing the fetch is deferred, not only the one that made it
+                ratelimit.defer(self.error.until)
+            raise self.error
+        return self.value
+
+
+class PollCoalescer:
+    """Results fetched during one tick, keyed by fetch key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.fetched = 0
+        self.shared = 0
+
+    def _claim(self, key):
+        """(entry of key, whether the caller has to fetch it)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+                self.fetched += 1
+                return entry, True
+            self.shared += 1
+            return entry, False
+
+    def fetch(self, key, fn):
+        entry, owner = self._claim(key)
+        if owner:
+            try:
+                entry.value = fn()
+            except Exception as exc:
+                entry.error = exc
+            finally:
+                entry.done.set()
+        else:
+            entry.done.wait()
+        return entry.result()
+
+    async def fetch_async(self, key, fn):
+        """fetch for a coroutine function fn: waiting for another area's fetch does not block the loop."""
+        loop = asyncio.get_running_loop()
+        entry, owner = self._claim(key)
+        if owner:
+            async def run():
+                try:
+                    entry.value = await fn()
+                except Exception as exc:
+                    entry.error = exc
+                except asyncio.CancelledError as exc:
+                    # Loop shut down mid-fetch: fail the areas waiting for it instead of hanging them
+                    entry.error = exc
+                    raise
+                finally:
+                    entry.done.set()
+            entry.task = loop.create_task(run())
+
+        if entry.task is not None and entry.task.get_loop() is loop:
+            # Shielded: a cancelled area must not cancel the fetch of the others
+            await asyncio.shield(entry.task)
+        elif not entry.done.is_set():
+            # Fetched by a worker thread, or on the loop of another thread (sync engine)
+            await asyncio.to_thread(entry.done.wait)
+        return entry.result()
+
+
+_current = ContextVar("poll_coalescer", default=None)
+
+
+@contextmanager
+def tick():
+    """Coalesce the fetches made until the end of the block."""
+    current = PollCoalescer()
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def fetch_once(key, fn):
+    """Return fn(), called at most once per tick for a given key."""
+    polls = _current.get()
+    if polls is None:
+        return fn()
+    return polls.fetch(key, fn)
+
+
+async def fetch_once_async(key, fn):
+    """Return await fn(), awaited at most once per tick for a given key."""
+    polls = _current.get()
+    if polls is None:
+        return await fn()
+    return await polls.fetch_async(key, fn)
+
+
+class Validators:
+    """ETag / Last-Modified and parsed body of polled resources, least recently used dropped first."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.not_modified = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, last_modified, data):
+        with self._lock:
+            self._entries[key] = (etag, last_modified, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+validators = Validators()
+
+
+def get_json(url, owner=None, params=None, headers=None):
+    """
+    Coalesced, conditional GET returning (status_code, parsed json or None).
+    owner identifies whose credentials are in headers (None for
+    bot-wide or public resources).
+    """
+    key = _json_key(url, owner, params)
+
+    def fetch():
+        cached, request_headers = _conditional_headers(key, headers)
+        return _json_result(key, cached, http.get(url, params=params, headers=request_headers))
+
+    return fetch_once(key, fetch)
+
+
+async def get_json_async(url, owner=None, params=None, headers=None):
+    """get_json for async checkers: the GET goes through automation.hooks.aio."""
+    key = _json_key(url, owner, params)
+
+    async def fetch():
+        cached, request_headers = _conditional_headers(key, headers)
+        return _json_result(key, cached, await aio.get(url, params=params, headers=request_headers))
+
+    return await fetch_once_async(key, fetch)
+
+
+def _json_key(url, owner, params):
+    return ("GET", url, tuple(sorted((params or {}).items())), owner)
+
+
+def _conditional_headers(key, headers):
+    """The remembered (etag, last_modified, data) of key, and headers revalidating it."""
+    cached = validators.get(key)
+    request_headers = dict(headers or {})
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if last_modified:
+            request_headers["If-Modified-Since"] = last_modified
+    return cached, request_headers
+
+
+def _json_result(key, cached, response):
+    if response.status_code == 304 and cached is not None:
+        validators.not_modified += 1
+        return 200, cached[2]
+
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    if response.status_code == 200 and (etag or last_modified):
+        validators.put(key, etag, last_modified, data)
+    return response.status_code, data
@@ -0,0 +1,232 @@
+"""
+Cron expressions for the cron_schedule action.
+
+An expression (MIN HOUR DOM MON DOW) is compiled once into one bitmask per
+field plus the special day rules, and cached by (expression, timezone).
+next_fire_after(t) walks days and bitmasks instead of minutes, so the hook
+scheduler can sleep until the exact minute an area fires.
+
+Supported syntax: `*`, `?`, lists `1,2`, ranges `1-5`, steps `*/5` `1-30/10`
+`5/15`, month and day names (`jan`, `mon-fri`), `L` (last day of month),
+`nW` (nearest weekday), `LW` (last weekday), `5L` (last Friday),
+`5#3` (third Friday) and the @yearly/@monthly/@weekly/@daily/@hourly macros.
+Day of month and day of week follow the usual cron rule: when both are
+restricted, a day matching either of them fires.
+"""
+import calendar
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MONTH_NAMES = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+# Give up looking for a fire time after this long (e.g. "0 0 30 2 *")
+SEARCH_DAYS = 366 * 5
+
+
+class CronError(ValueError):
+    pass
+
+
+def _value(token, low, high, names=None):
+    token = token.lower()
+    if names and token in names:
+        return names[token]
+    if not token.isdigit():
+        raise CronError(f"Invalid value '{token}'")
+    value = int(token)
+    if not low <= value <= high:
+        raise CronError(f"Value {value} out of range {low}-{high}")
+    return value
+
+
+def _parse_field(field, low, high, names=None) -> int:
+    """Return the bitmask of the values matched by a comma separated field."""
+    mask = 0
+    for part in field.split(","):
+        step = None
+        if "/" in part:
+            part, step_token = part.split("/", 1)
+            if not step_token.isdigit() or int(step_token) == 0:
+                raise CronError(f"Invalid step '{step_token}'")
+            step = int(step_token)
+
+        if part in ("*", "?"):
+            start, end = low, high
+        elif "-" in part:
+            start_token, end_token = part.split("-", 1)
+            start, end = _value(start_token, low, high, names), _value(end_token, low, high, names)
+            if start > end:
+                raise CronError(f"Invalid range '{part}'")
+        else:
+            start = _value(part, low, high, names)
+            end = high if step else start
+
+        for value in range(start, end + 1, step or 1):
+            mask |= 1 << value
+    return mask
+
+
+def _next_bit(mask, start):
+    """Lowest value >= start set in mask, or None."""
+    shifted = mask >> start
+    if not shifted:
+        return None
+    return start + (shifted & -shifted).bit_length() - 1
+
+
+def _bits(mask, start=0):
+    value = _next_bit(mask, start)
+    while value is not None:
+        yield value
+        value = _next_bit(mask, value + 1)
+
+
+class CronExpression:
+    def __init__(self, expression: str, tz=None):
+        expression = MACROS.get(expression.strip().lower(), expression)
+        fields = expression.split()
+        if len(fields) != 5:
+            raise CronError("Expected 5 fields: MIN HOUR DOM MON DOW")
+        minute, hour, dom, month, dow = fields
+
+        self.expression = expression
+        self.tz = tz or dt_timezone.utc
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        self.dom_any = dom in ("*", "?")
+        self.dow_any = dow in ("*", "?")
+        self._parse_dom(dom)
+        self._parse_dow(dow)
+
+    def _parse_dom(self, field):
+        self.days = 0
+        self.last_day = False
+        self.last_weekday = False
+        self.nearest_weekdays = set()
+        for part in field.split(","):
+            upper = part.upper()
+            if upper == "L":
+                self.last_day = True
+            elif upper == "LW":
+                self.last_weekday = True
+            elif upper.endswith("W"):
+                self.nearest_weekdays.add(_value(part[:-1], 1, 31))
+            else:
+                self.days |= _parse_field(part, 1, 31)
+
+    def _parse_dow(self, field):
+        self.weekdays = 0
+        self.last_dows = set()  # "5L": last Friday of the month
+        self.nth_dows = set()  # "5#3": (weekday, n)
+        for part in field.split(","):
+            if "#" in part:
+                day_token, nth_token = part.split("#", 1)
+                self.nth_dows.add((_value(day_token, 0, 7, DAY_NAMES) % 7, _value(nth_token, 1, 5)))
+            elif len(part) > 1 and part.upper().endswith("L"):
+                self.last_dows.add(_value(part[:-1], 0, 7, DAY_NAMES) % 7)
+            else:
+                self.weekdays |= _parse_field(part, 0, 7, DAY_NAMES)
+        # 7 is Sunday too
+        if self.weekdays & (1 << 7):
+            self.weekdays = (self.weekdays | 1) & ~(1 << 7)
+
+    def _dom_matches(self, day: date, last: int) -> bool:
+        if self.days >> day.day & 1:
+            return True
+        if self.last_day and day.day == last:
+            return True
+        if self.last_weekday and day.day == _nearest_weekday(day.year, day.month, last, last):
+            return True
+        return any(
+            n <= last and day.day == _nearest_weekday(day.year, day.month, n, last)
+            for n in self.nearest_weekdays
+        )
+
+    def _dow_matches(self, day: date, last: int) -> bool:
+        weekday = (day.weekday() + 1) % 7  # cron: 0 = Sunday
+        if self.weekdays >> weekday & 1:
+            return True
+        if weekday in self.last_dows and day.day + 7 > last:
+            return True
+        return (weekday, (day.day - 1) // 7 + 1) in self.nth_dows
+
+    def day_matches(self, day: date) -> bool:
+        if not self.months >> day.month & 1:
+            return False
+        if self.dom_any and self.dow_any:
+            return True
+        last = calendar.monthrange(day.year, day.month)[1]
+        if self.dom_any:
+            return self._dow_matches(day, last)
+        if self.dow_any:
+            return self._dom_matches(day, last)
+        return self._dom_matches(day, last) or self._dow_matches(day, last)
+
+    def _time_from(self, hour, minute):
+        """First (hour, minute) >= the given one, or None."""
+        for h in _bits(self.hours, hour):
+            m = _next_bit(self.minutes, minute if h == hour else 0)
+            if m is not None:
+                return h, m
+        return None
+
+    def next_fire_after(self, t: datetime) -> datetime:
+        """First fire time strictly after t (an aware datetime), in UTC."""
+        start = t.astimezone(self.tz).replace(second=0, microsecond=0, tzinfo=None) + timedelta(minutes=1)
+        day, hour, minute = start.date(), start.hour, start.minute
+        end = day + timedelta(days=SEARCH_DAYS)
+
+        while day < end:
+            if not self.months >> day.month & 1:
+                # Skip to the first day of the next month
+                day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+                hour = minute = 0
+                continue
+            found = self.day_matches(day) and self._time_from(hour, minute)
+            if found:
+                fire = datetime.combine(day, time(*found), tzinfo=self.tz).astimezone(dt_timezone.utc)
+                if fire > t:
+                    return fire
+                # Repeated local time after a DST change: look further that day
+                hour, minute = divmod(found[0] * 60 + found[1] + 1, 60)
+                if hour < 24:
+                    continue
+            day += timedelta(days=1)
+            hour = minute = 0
+        raise CronError(f"'{self.expression}' never fires")
+
+
+def _nearest_weekday(year, month, day, last):
+    """Weekday (Mon-Fri) nearest to the given day, without leaving the month."""
+    weekday = date(year, month, day).weekday()
+    if weekday == 5:
+        return day - 1 if day > 1 else day + 2
+    if weekday == 6:
+        return day + 1 if day < last else day - 2
+    return day
+
+
+def get_timezone(name):
+    if not name:
+        return dt_timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise CronError(f"Unknown timezone '{name}'")
+
+
+@lru_cache(maxsize=1024)
+def compile_cron(expression: str, tz_name: str = None) -> CronExpression:
+    """Compiled expression, cached: areas sharing an expression share the object."""
+    return CronExpression(expression, get_timezone(tz_name))
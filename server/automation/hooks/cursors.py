@@ -0,0 +1,28 @@
+"""
+Durable "last seen" cursors of checkers, stored in AreaTriggerState.cursor.
+
+Cursors are read from the trigger state the engine loads with the areas of a
+tick, and written with the tick's trigger state upsert. set_cursor only
+stages a value: the engine commits it when the checker did not fire (e.g.
+seeding the cursor on the first poll) or when the reaction it fired has
+succeeded. If the reaction fails, the cursor stays where it was and the
+event is picked up again on the next evaluation.
+"""
+
+
+def get_cursor(area, name, default=None):
+    staged = getattr(area, "_cursor_updates", None)
+    if staged and name in staged:
+        return staged[name]
+    return area.get_trigger_state().cursor.get(name, default)
+
+
+def set_cursor(area, name, value):
+    if not hasattr(area, "_cursor_updates"):
+        area._cursor_updates = {}
+    area._cursor_updates[name] = value
+
+
+def pop_cursor_updates(area) -> dict:
+    """Return and clear the cursor values staged on an area."""
+    return area.__dict__.pop("_cursor_updates", None) or {}
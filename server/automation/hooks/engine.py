@@ -0,0 +1,455 @@
+"""
+Hook engine: evaluates enabled areas (action checker -> reaction executor)
+and records the outcome of each evaluation as an ExecutionLog row.
+"""
+import contextvars
+import inspect
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from automation import ratelimit
+from automation.circuit import CircuitBreaker, CircuitOpen
+from automation.credentials import broker
+from automation.models import Area, AreaTriggerState, TriggerEvent
+from automation.providers.registry import ProviderRegistry
+from . import action_checkers, coalesce, get_reaction_executor, messages
+from .cursors import pop_cursor_updates
+from .logbuffer import LogBuffer
+from .triggers import pop_triggers
+
+
+def is_async_handler(fn) -> bool:
+    return inspect.iscoroutinefunction(fn)
+
+
+def call_handler(fn, *args, **kwargs):
+    """Call a checker/executor from sync code, whether it is sync or async."""
+    if is_async_handler(fn):
+        return async_to_sync(fn)(*args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+class AreaOutcome:
+    """Result of evaluating a single area during a tick."""
+
+    def __init__(self, area, status=None, message="", elapsed=0.0, fired=False):
+        self.area = area
+        self.status = status  # None when the action did not trigger
+        self.message = message
+        self.elapsed = elapsed
+        self.fired = fired  # the checker triggered
+        self.deferred_until = None  # rate limited: evaluate again at that time
+        self.budget = None  # lowest remaining upstream quota seen (0..1)
+        self.circuit = None  # service whose open circuit skipped the area
+        self.events = []  # trigger contexts queued for run_reactions (outbox mode)
+        self.delivery = None  # batched message, sent at the end of the tick
+
+
+class TickReport:
+    """Timing summary of one engine tick."""
+
+    def __init__(self, outcomes, wall_time, workers, polls=None):
+        self.outcomes = outcomes
+        self.wall_time = wall_time
+        self.workers = workers
+        self.polls = polls  # PollCoalescer of the tick
+
+    @property
+    def area_time(self) -> float:
+        """Sum of the time spent evaluating each area."""
+        return sum(o.elapsed for o in self.outcomes)
+
+    @property
+    def triggered(self) -> int:
+        return sum(1 for o in self.outcomes if o.status == "success")
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for o in self.outcomes if o.status == "error")
+
+    @property
+    def queued(self) -> int:
+        return sum(len(o.events) for o in self.outcomes)
+
+    @property
+    def deferred(self) -> int:
+        return sum(1 for o in self.outcomes if o.deferred_until is not None and o.circuit is None)
+
+    @property
+    def skipped(self) -> Counter:
+        """Areas skipped per service with an open circuit."""
+        return Counter(o.circuit for o in self.outcomes if o.circuit is not None)
+
+    def __str__(self):
+        speedup = self.area_time / self.wall_time if self.wall_time > 0 else 1.0
+        triggered = f"{self.queued} queued" if self.queued else f"{self.triggered} triggered"
+        summary = (
+            f"Tick: {len(self.outcomes)} areas, {triggered}, {self.errors} errors "
+            f"in {self.wall_time:.2f}s wall / {self.area_time:.2f}s area time "
+            f"({speedup:.1f}x, workers={self.workers})"
+        )
+        if self.deferred:
+            summary += f", {self.deferred} deferred by rate limits"
+        skipped = self.skipped
+        if skipped:
+            services = ", ".join(f"{service}: {count}" for service, count in sorted(skipped.items()))
+            summary += f", {sum(skipped.values())} skipped by open circuits ({services})"
+        if self.polls is not None and self.polls.shared:
+            summary += f", {self.polls.fetched} upstream polls shared by {self.polls.fetched + self.polls.shared} checks"
+        return summary
+
+
+class HookEngine:
+    """
+    Runs checkers and executors for a set of areas.
+
+    With workers > 1 areas are evaluated on a bounded thread pool. Each area is
+    a single task, so its checker always runs before its executor and an area
+    is never evaluated twice in the same tick. Worker threads use their own
+    database connections, which are closed at the end of every tick; the
+    ExecutionLog rows and AreaTriggerState updates are written from the
+    calling thread: trigger state every tick, logs through a LogBuffer that
+    flushes them in bulk.
+
+    When a LeaseManager is given, only the areas leased by this worker are
+    evaluated, so several engines can share the area set.
+
+    The credentials of the evaluated areas are loaded into the credential
+    broker at the start of a tick, in one query per table: handlers get their
+    tokens from it and never query them themselves.
+
+    Handlers are called through a per-service CircuitBreaker: areas of a
+    service whose upstream keeps failing are skipped until it recovers. With
+    per_service set, at most per_service areas using the same service (as
+    action or reaction) are in flight on the thread pool, so one slow
+    upstream cannot hold every worker; the other areas of that service wait
+    for their turn. Services making no upstream calls (timer, system) are
+    never limited.
+
+    A checker may fire several events at once (add_trigger): the reaction runs
+    once per event. If one of them fails the area's cursors are not moved, so
+    the whole batch is evaluated again, as for a single event.
+
+    With outbox, fired triggers are not reacted to inline: their context is
+    stored as a TriggerEvent, in the same transaction as the cursors that
+    moved past it, and run_reactions runs the reactions.
+    """
+
+    def __init__(self, workers: int = 1, leases=None, logs=None, breaker=None, per_service=None, outbox=None):
+        self.workers = max(1, int(workers or 1))
+        self.outbox = getattr(settings, "AUTOMATION_REACTION_OUTBOX", False) if outbox is None else outbox
+        self.leases = leases
+        self.logs = LogBuffer() if logs is None else logs
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        # None: no bulkhead
+        self.per_service = max(1, int(per_service)) if per_service else None
+
+    def get_areas(self, now=None):
+        areas = Area.objects.filter(enabled=True).select_related(
+            "action__service", "reaction__service", "user", "trigger_state"
+        )
+        if self.leases is not None:
+            self.leases.acquire(now)
+            areas = self.leases.owned_areas(areas, now)
+        return areas
+
+    def evaluate(self, area, now, pushed=False) -> AreaOutcome:
+        """
+        Run the checker of an area and, if it triggers, its executor.
+        pushed: the trigger was delivered (webhook), only run the executor.
+        """
+        started = time.perf_counter()
+        with ratelimit.track() as usage:
+            outcome = self._evaluate(area, now, pushed)
+        outcome = self.apply_rate_usage(outcome, usage)
+        outcome.elapsed = time.perf_counter() - started
+        return outcome
+
+    def apply_rate_usage(self, outcome, usage) -> AreaOutcome:
+        outcome.budget = usage.budget
+        if usage.deferred_until is not None:
+            outcome.deferred_until = max(outcome.deferred_until or usage.deferred_until, usage.deferred_until)
+        return self.defer(outcome)
+
+    def defer(self, outcome) -> AreaOutcome:
+        """
+        A rate limited outcome is neither a failure nor a success, whatever its
+        status: providers that catch every exception turn RateLimited into a
+        result. Its cursor is not committed and the area is retried when allowed.
+        """
+        if outcome.deferred_until is not None and outcome.status is not None:
+            outcome.status = None
+            outcome.message = ""
+        return outcome
+
+    def resolve(self, area):
+        """Return (checker, executor, error outcome) for an area."""
+        act_type = (area.config_action or {}).get("type")
+        react_type = (area.config_reaction or {}).get("type")
+
+        checker = action_checkers.get(act_type)
+        executor = get_reaction_executor(area)
+        if not checker or not executor:
+            return None, None, AreaOutcome(area, "error", f"Missing handler (action={act_type}, reaction={react_type})")
+        return checker, executor, None
+
+    def services(self, area):
+        """Provider service names of the action and the reaction of an area."""
+        return area.action.service.name, area.reaction.service.name
+
+    def bulkhead_services(self, area):
+        """Services of an area whose number of areas in flight is limited by per_service."""
+        if self.per_service is None:
+            return set()
+        return {service for service in self.services(area) if ProviderRegistry.calls_upstream(service)}
+
+    def skipped(self, area, exc, fired=False) -> AreaOutcome:
+        """Outcome of an area whose service has an open circuit: retried once it may be called."""
+        outcome = AreaOutcome(area, fired=fired)
+        outcome.circuit = exc.service
+        outcome.deferred_until = datetime.fromtimestamp(exc.until, tz=dt_timezone.utc)
+        return outcome
+
+    def queued(self, area, now) -> AreaOutcome:
+        outcome = AreaOutcome(area, fired=True)
+        outcome.events = self.trigger_contexts(area, now)
+        return outcome
+
+    def build_context(self, area, now) -> dict:
+        # Build context with timestamp and any data from trigger
+        context = {"now": now.isoformat()}
+
+        # If the action checker stored context data, merge it
+        if hasattr(area, '_trigger_context'):
+            context.update(area._trigger_context)
+        return context
+
+    def trigger_contexts(self, area, now) -> list:
+        """Context of each event the checker fired: one, unless it added several (add_trigger)."""
+        context = self.build_context(area, now)
+        events = pop_triggers(area)
+        if not events:
+            return [context]
+        return [{**context, **event} for event in events]
+
+    def react(self, area, executor, now) -> list:
+        """Run the executor once per fired event. Returns the results."""
+        results = []
+        for context in self.trigger_contexts(area, now):
+            # Executors read the trigger context from the area too
+            area._trigger_context = dict(context)
+            results.append(call_handler(executor, area, context=context))
+        return results
+
+    def success(self, area, results) -> AreaOutcome:
+        outcome = AreaOutcome(area, "success", fired=True)
+        if all(isinstance(result, messages.Delivery) for result in results):
+            outcome.delivery = results[0] if len(results) == 1 else messages.DeliveryGroup(results)
+            return outcome
+        details = [
+            (result.get("detail") if isinstance(result, dict) else str(result)) or "Reaction executed"
+            for result in results
+        ]
+        outcome.message = details[0] if len(details) == 1 else f"{len(details)} events: " + "; ".join(details)
+        return outcome
+
+    def apply_deliveries(self, outcomes):
+        """Report the result of the messages batched during the tick on their outcomes."""
+        for outcome in outcomes:
+            if outcome.delivery is not None:
+                outcome.status, outcome.message, deferred_until = outcome.delivery.result()
+                if deferred_until is not None:
+                    outcome.deferred_until = max(outcome.deferred_until or deferred_until, deferred_until)
+                self.defer(outcome)
+
+    def _evaluate(self, area, now, pushed=False) -> AreaOutcome:
+        checker, executor, error = self.resolve(area)
+        if error:
+            return error
+
+        action_service, reaction_service = self.services(area)
+        fired = False
+        try:
+            if not pushed:
+                if not self.outbox:
+                    # Do not poll for a trigger whose reaction cannot run
+                    self.breaker.check(reaction_service)
+                with self.breaker.guard(action_service):
+                    triggered = call_handler(checker, area, now=now)
+                if not triggered:
+                    return AreaOutcome(area)
+            fired = True
+            if self.outbox:
+                return self.queued(area, now)
+            with self.breaker.guard(reaction_service):
+                results = self.react(area, executor, now)
+            return self.success(area, results)
+        except CircuitOpen as exc:
+            return self.skipped(area, exc, fired)
+        except Exception as exc:
+            return AreaOutcome(area, "error", f"Exception: {exc}", fired=fired)
+
+    def _evaluate_in_worker(self, area, now) -> AreaOutcome:
+        close_old_connections()
+        return self.evaluate(area, now)
+
+    def _run_pool(self, pool, areas, now):
+        """Evaluate areas on the pool with at most per_service areas of a service in flight."""
+        queues = {}
+        for area in areas:
+            queues.setdefault(self.services(area)[0], deque()).append(area)
+        in_flight = Counter()
+        running = {}
+        outcomes = {}
+
+        def submit_ready():
+            for queue in queues.values():
+                while queue:
+                    services = self.bulkhead_services(queue[0])
+                    if any(in_flight[service] >= self.per_service for service in services):
+                        break
+                    area = queue.popleft()
+                    in_flight.update(services)
+                    # In a copy of the tick's context: messages sent by the area join its batch
+                    context = contextvars.copy_context()
+                    running[pool.submit(context.run, self._evaluate_in_worker, area, now)] = (area, services)
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                area, services = running.pop(future)
+                in_flight.subtract(services)
+                outcomes[area.id] = future.result()
+            submit_ready()
+        return [outcomes[area.id] for area in areas]
+
+    def _close_worker_connections(self, pool):
+        # Connections are thread-local: make every worker thread close its own.
+        barrier = threading.Barrier(self.workers)
+
+        def close():
+            barrier.wait()
+            connections.close_all()
+
+        for future in [pool.submit(close) for _ in range(self.workers)]:
+            future.result()
+
+    def record(self, outcomes, now, scheduler=None):
+        """
+        Persist the outcomes of a tick: the trigger state (last fired / last
+        success / next due / cursors) of the evaluated areas, the queued
+        TriggerEvents and, when the buffer is due, the buffered ExecutionLog
+        rows in the same transaction.
+        With a scheduler, areas are rescheduled as well.
+        """
+        states = []
+        events = []
+        for outcome in outcomes:
+            state = outcome.area.get_trigger_state()
+            changed = False
+            if outcome.fired:
+                state.last_fired_at = now
+                changed = True
+            events += [
+                TriggerEvent(area=outcome.area, context=context, created_at=now, available_at=now)
+                for context in outcome.events
+            ]
+            if outcome.status == "success" or outcome.events:
+                # A queued trigger is handled as far as the checker is concerned
+                state.last_success_at = now
+                changed = True
+            cursor_updates = pop_cursor_updates(outcome.area)
+            # Only move cursors past events whose reaction succeeded (or that did not fire)
+            committed = outcome.status == "success" or (outcome.status is None and outcome.deferred_until is None)
+            if cursor_updates and committed:
+                state.cursor = {**state.cursor, **cursor_updates}
+                changed = True
+            if scheduler is not None:
+                due_at = scheduler.reschedule(
+                    outcome.area, now,
+                    failed=outcome.status == "error",
+                    deferred_until=outcome.deferred_until,
+                    budget=outcome.budget,
+                )
+                if scheduler.has_schedule(outcome.area) and state.next_due_at != due_at:
+                    state.next_due_at = due_at
+                    changed = True
+            if changed:
+                states.append(state)
+
+        for outcome in outcomes:
+            if outcome.status:
+                self.logs.add(outcome.area, outcome.status, outcome.message, now)
+
+        with transaction.atomic():
+            if self.logs.due(now):
+                self.logs.flush(now)
+            if events:
+                TriggerEvent.objects.bulk_create(events)
+            if states:
+                AreaTriggerState.objects.bulk_create(
+                    states,
+                    update_conflicts=True,
+                    unique_fields=["area"],
+                    update_fields=["last_fired_at", "last_success_at", "next_due_at", "cursor"],
+                )
+
+    def run_tick(self, areas=None, now=None, scheduler=None) -> TickReport:
+        now = now or timezone.now()
+        areas = list(self.get_areas(now) if areas is None else areas)
+        started = time.perf_counter()
+        broker.prefetch(areas, now)
+
+        with coalesce.tick() as polls, messages.batch():
+            if self.workers == 1:
+                outcomes = [self.evaluate(area, now) for area in areas]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hook") as pool:
+                    outcomes = self._run_pool(pool, areas, now)
+                    self._close_worker_connections(pool)
+        self.apply_deliveries(outcomes)
+
+        self.record(outcomes, now, scheduler)
+
+        return TickReport(outcomes, time.perf_counter() - started, self.workers, polls)
+
+    def run_pushed(self, areas, now=None) -> TickReport:
+        """
+        Run the reactions of areas whose trigger was pushed by a webhook. The
+        trigger context must already be set on each area.
+        """
+        now = now or timezone.now()
+        started = time.perf_counter()
+        broker.prefetch(areas, now)
+        with messages.batch():
+            outcomes = [self.evaluate(area, now, pushed=True) for area in areas]
+        self.apply_deliveries(outcomes)
+        self.record(outcomes, now)
+        return TickReport(outcomes, time.perf_counter() - started, self.workers)
+
+    def run_due(self, scheduler, now=None):
+        """Evaluate the areas the scheduler has due at `now`, then reschedule them."""
+        now = now or timezone.now()
+        scheduler.sync(now)
+        due = scheduler.pop_due(now)
+        if not due:
+            return None
+
+        areas = list(self.get_areas(now).filter(id__in=due))
+        report = self.run_tick(areas=areas, now=now, scheduler=scheduler)
+
+        # Due areas that were not loaded are disabled, deleted or leased by another worker
+        loaded = {area.id for area in areas}
+        missing = [area_id for area_id in due if area_id not in loaded]
+        for area_id in Area.objects.filter(id__in=missing, enabled=True).values_list("id", flat=True):
+            scheduler.schedule(area_id, now + scheduler.poll_period)
+        return report
@@ -0,0 +1,97 @@
+"""
+Database leases used to split areas between several run_hooks processes.
+
+Every worker heartbeats a HookWorker row and keeps ownership of about
+1/N of the enabled areas through AreaLease rows. Leases are renewed while
+the worker runs and simply expire when it dies, so the surviving workers
+pick the areas up on their next renewal. Unowned leases are claimed with
+SELECT ... FOR UPDATE SKIP LOCKED on Postgres; on SQLite (no row locks) the
+conditional UPDATE that follows the select is what makes the claim exclusive.
+"""
+import math
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from automation.models import Area, AreaLease, HookWorker
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    def __init__(self, worker_id: str = None, ttl: int = 60, renew_every: int = 0):
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = timedelta(seconds=ttl)
+        # The scheduler may wake several times per lease period: renew at most this often
+        self.renew_every = timedelta(seconds=renew_every)
+        self._acquired_at = None
+        self._owned = 0
+
+    def _claimable(self, now):
+        return Q(owner="") | Q(expires_at__isnull=True) | Q(expires_at__lte=now)
+
+    def heartbeat(self, now) -> int:
+        """Record this worker as alive and return the number of live workers."""
+        HookWorker.objects.update_or_create(id=self.worker_id, defaults={"last_seen": now})
+        HookWorker.objects.filter(last_seen__lt=now - self.ttl * 10).delete()
+        return HookWorker.objects.filter(last_seen__gt=now - self.ttl).count()
+
+    def acquire(self, now=None) -> int:
+        """
+        Renew this worker's leases, release the ones above its fair share and
+        claim free or expired ones up to it. Returns the number of owned areas.
+        """
+        now = now or timezone.now()
+        if self._acquired_at is not None and self._acquired_at <= now < self._acquired_at + self.renew_every:
+            return self._owned
+        self._acquired_at = now
+        self._owned = self._acquire(now)
+        return self._owned
+
+    def _acquire(self, now) -> int:
+        expires_at = now + self.ttl
+        live_workers = max(1, self.heartbeat(now))
+
+        missing = Area.objects.filter(enabled=True, lease__isnull=True).values_list("id", flat=True)
+        AreaLease.objects.bulk_create([AreaLease(area_id=area_id) for area_id in missing], ignore_conflicts=True)
+
+        leases = AreaLease.objects.filter(area__enabled=True)
+        share = math.ceil(leases.count() / live_workers)
+
+        owned = list(
+            leases.filter(owner=self.worker_id, expires_at__gt=now).order_by("area_id").values_list("area_id", flat=True)
+        )
+        if len(owned) > share:
+            AreaLease.objects.filter(owner=self.worker_id, area_id__in=owned[share:]).update(owner="", expires_at=None)
+            owned = owned[:share]
+        AreaLease.objects.filter(owner=self.worker_id, area_id__in=owned).update(expires_at=expires_at)
+
+        needed = share - len(owned)
+        if needed > 0:
+            with transaction.atomic():
+                candidates = list(
+                    leases.select_for_update(skip_locked=True, of=("self",))
+                    .filter(self._claimable(now))
+                    .order_by("expires_at")
+                    .values_list("area_id", flat=True)[:needed]
+                )
+                claimed = AreaLease.objects.filter(area_id__in=candidates).filter(self._claimable(now)).update(
+                    owner=self.worker_id, expires_at=expires_at
+                )
+            return len(owned) + claimed
+        return len(owned)
+
+    def owned_areas(self, queryset, now=None):
+        """Restrict an Area queryset to the areas currently leased by this worker."""
+        now = now or timezone.now()
+        return queryset.filter(lease__owner=self.worker_id, lease__expires_at__gt=now)
+
+    def release_all(self):
+        AreaLease.objects.filter(owner=self.worker_id).update(owner="", expires_at=None)
+        HookWorker.objects.filter(id=self.worker_id).delete()
@@ -0,0 +1,109 @@
+"""
+Buffered ExecutionLog writes for the hook engine.
+
+Outcomes are collected in memory and written with a single bulk_create per
+flush instead of one INSERT per area. An error identical to the previous
+outcome of the same area (typically "Missing handler" on a misconfigured
+area) does not produce a new row: the previous row's repeat_count and
+last_executed_at are bumped instead.
+
+Every outcome is also counted in the hourly ExecutionStat row of its area,
+written in the same transaction as the logs, in three queries whatever the
+number of areas.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from automation.models import ExecutionLog, ExecutionStat
+
+
+def hour_bucket(when):
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def write_stats(counts):
+    """Add counts {(area id, user id, bucket): [successes, errors]} to the ExecutionStat rows."""
+    if not counts:
+        return
+    ExecutionStat.objects.bulk_create(
+        [ExecutionStat(area_id=area_id, user_id=user_id, bucket=bucket) for area_id, user_id, bucket in counts],
+        ignore_conflicts=True,
+    )
+    wanted = {(area_id, bucket): count for (area_id, _, bucket), count in counts.items()}
+    rows = ExecutionStat.objects.filter(
+        area_id__in={area_id for area_id, _ in wanted}, bucket__in={bucket for _, bucket in wanted},
+    ).values_list("id", "area_id", "bucket")
+    added = {row_id: wanted[(area_id, bucket)] for row_id, area_id, bucket in rows if (area_id, bucket) in wanted}
+    ExecutionStat.objects.filter(id__in=added).update(
+        successes=F("successes") + Case(*[When(id=row_id, then=count[0]) for row_id, count in added.items()], default=0),
+        errors=F("errors") + Case(*[When(id=row_id, then=count[1]) for row_id, count in added.items()], default=0),
+    )
+
+
+class LogBuffer:
+    """
+    flush_size: flush as soon as that many new rows are pending (also the
+    bulk_create batch size). flush_interval: flush at most every that many
+    seconds; 0 flushes after every tick.
+    """
+
+    def __init__(self, flush_size: int = 500, flush_interval: int = 0):
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = timedelta(seconds=max(0, int(flush_interval)))
+        self._pending = []
+        # log id -> [extra repeats, last executed at] for rows already written
+        self._repeats = defaultdict(lambda: [0, None])
+        # area id -> latest log of the area, written or not
+        self._last = {}
+        # (area id, user id, hour) -> [successes, errors] not written yet
+        self._stats = defaultdict(lambda: [0, 0])
+        self._flushed_at = None
+
+    def __len__(self):
+        return len(self._pending) + len(self._repeats)
+
+    def add(self, area, status, message, now):
+        self._stats[(area.id, area.user_id, hour_bucket(now))][0 if status == "success" else 1] += 1
+        last = self._last.get(area.id)
+        if last is not None and status == "error" and last.status == status and last.message == message:
+            last.repeat_count += 1
+            last.last_executed_at = now
+            if last._state.adding is False:
+                repeat = self._repeats[last.id]
+                repeat[0] += 1
+                repeat[1] = now
+            return last
+
+        log = ExecutionLog(area=area, executed_at=now, status=status, message=message)
+        self._pending.append(log)
+        self._last[area.id] = log
+        return log
+
+    def due(self, now=None) -> bool:
+        now = now or timezone.now()
+        if len(self._pending) >= self.flush_size:
+            return True
+        return self._flushed_at is None or now - self._flushed_at >= self.flush_interval
+
+    def flush(self, now=None) -> int:
+        """Write the pending rows and repeat counts. Returns the number of new rows."""
+        self._flushed_at = now or timezone.now()
+        pending, repeats, stats = self._pending, self._repeats, self._stats
+        if not pending and not repeats:
+            return 0
+        self._pending, self._repeats = [], defaultdict(lambda: [0, None])
+        self._stats = defaultdict(lambda: [0, 0])
+
+        with transaction.atomic():
+            ExecutionLog.objects.bulk_create(pending, batch_size=self.flush_size)
+            for log_id, (count, last_executed_at) in repeats.items():
+                ExecutionLog.objects.filter(id=log_id).update(
+                    repeat_count=F("repeat_count") + count,
+                    last_executed_at=last_executed_at,
+                )
+            write_stats(stats)
+        return len(pending)
@@ -0,0 +1,212 @@
+"""
+Batched outbound chat messages (Discord and Telegram send_message reactions).
+
+During a tick (or a run_reactions batch) send() does not call the platform:
+messages are grouped by destination and sent when the batch ends. Messages
+to the same channel are merged, one per line, into as few platform messages
+as the length limit allows, and consecutive sends to a channel are spaced by
+its min_interval (also across batches), below the documented per-channel
+limits. Outside of a batch a message is sent right away.
+
+send() returns a Delivery; executors return it and the engine reports its
+result (sent, failed, or rate limited: retried later) on the ExecutionLog
+of every area whose message it carried.
+
+The current batch is a context variable: concurrent batches (webhook
+requests on the threads of the web server) never see each other's. Work
+handed to a thread pool during a batch must run in a copy of the caller's
+context (contextvars.copy_context().run) to send into it.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from automation import ratelimit
+from automation.http_client import http
+
+DISCORD_MAX_LENGTH = 2000
+# Discord allows 5 messages per 5 seconds in a channel
+DISCORD_INTERVAL = 1.0
+TELEGRAM_MAX_LENGTH = 4096
+# Telegram: about one message per second in a chat, 20 per minute in a group
+TELEGRAM_INTERVAL = 1.0
+TELEGRAM_GROUP_INTERVAL = 3.0
+# Destinations flushed in parallel
+FLUSH_THREADS = 8
+# Longest wait for the result of a message, in seconds: it is sent when its batch ends
+RESULT_TIMEOUT = 120
+
+
+class Delivery:
+    """Pending result of a message: (status, message, deferred until)."""
+
+    def __init__(self):
+        self._result = None
+        self._done = threading.Event()
+
+    def resolve(self, status, message, deferred_until=None):
+        self._result = (status, message, deferred_until)
+        self._done.set()
+
+    def result(self, timeout=RESULT_TIMEOUT):
+        """(status, message, deferred_until); status is None when rate limited."""
+        if not self._done.wait(timeout):
+            return "error", f"Message not sent after {timeout}s", None
+        return self._result
+
+
+class DeliveryGroup:
+    """Deliveries of the events of one area, reported as one result."""
+
+    def __init__(self, deliveries):
+        self.deliveries = deliveries
+
+    def result(self):
+        results = [delivery.result() for delivery in self.deliveries]
+        deferred = [deferred_until for status, _, deferred_until in results if status is None]
+        if deferred:
+            return None, "", max(deferred)
+        errors = [message for status, message, _ in results if status == "error"]
+        if errors:
+            return "error", f"{len(errors)} of {len(results)} messages failed: {errors[0]}", None
+        return "success", f"{len(results)} events: {results[0][1]}", None
+
+
+class Destination:
+    """
+    A channel messages are sent to. send(text) posts one platform message and
+    returns the response; label names the platform in log messages.
+    """
+
+    def __init__(self, key, label, send, max_length, min_interval):
+        self.key = key
+        self.label = label
+        self.send = send
+        self.max_length = max_length
+        self.min_interval = min_interval
+
+
+def discord_channel(channel_id, token) -> Destination:
+    def send(text):
+        return http.post(
+            f"https://discord.com/api/v10/channels/{channel_id}/messages",
+            headers={"Authorization": f"Bot {token}", "Content-Type": "application/json"},
+            json={"content": text},
+        )
+
+    return Destination(("discord", str(channel_id)), "Discord", send, DISCORD_MAX_LENGTH, DISCORD_INTERVAL)
+
+
+def telegram_chat(chat_id, token) -> Destination:
+    def send(text):
+        return http.post(f"https://api.telegram.org/bot{token}/sendMessage", json={"chat_id": chat_id, "text": text})
+
+    interval = TELEGRAM_GROUP_INTERVAL if str(chat_id).startswith("-") else TELEGRAM_INTERVAL
+    return Destination(("telegram", str(chat_id)), "Telegram", send, TELEGRAM_MAX_LENGTH, interval)
+
+
+def merge(texts, max_length):
+    """Group consecutive texts into chunks of at most max_length characters, one text per line."""
+    chunks = []
+    for index, text in enumerate(texts):
+        if chunks and len(chunks[-1][0]) + 1 + len(text) <= max_length:
+            chunks[-1][0] += "\n" + text
+            chunks[-1][1].append(index)
+        else:
+            chunks.append([text, [index]])
+    return chunks
+
+
+_last_sent = {}
+_last_sent_lock = threading.Lock()
+
+
+def _wait_turn(destination):
+    """Sleep until destination may receive a message, and book that slot."""
+    with _last_sent_lock:
+        now = time.monotonic()
+        slot = max(now, _last_sent.get(destination.key, 0.0) + destination.min_interval)
+        _last_sent[destination.key] = slot
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def _deliver(destination, text, count):
+    """Send one platform message; returns the (status, message, deferred_until) of its deliveries."""
+    _wait_turn(destination)
+    try:
+        response = destination.send(text)
+    except ratelimit.RateLimited as exc:
+        return None, "", datetime.fromtimestamp(exc.until, tz=dt_timezone.utc)
+    except Exception as exc:
+        return "error", f"Exception: {exc}", None
+
+    merged = f" ({count} messages merged)" if count > 1 else ""
+    if 200 <= response.status_code < 300:
+        return "success", f"{destination.label} message sent{merged}", None
+    if response.status_code == 429:
+        retry_at = ratelimit.parse_retry_at(response.headers, time.time()) or time.time() + ratelimit.DEFAULT_RETRY_AFTER
+        return None, "", datetime.fromtimestamp(retry_at, tz=dt_timezone.utc)
+    return "error", f"Failed to send {destination.label} message: {response.text[:200]}", None
+
+
+class MessageBatch:
+    """Messages sent during one tick, grouped by destination."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> (destination, [(text, delivery)])
+        self.sent = 0
+        self.merged = 0
+
+    def add(self, destination, text) -> Delivery:
+        delivery = Delivery()
+        with self._lock:
+            self._pending.setdefault(destination.key, (destination, []))[1].append((text, delivery))
+        return delivery
+
+    def _flush_destination(self, destination, messages):
+        for text, indexes in merge([text for text, _ in messages], destination.max_length):
+            result = _deliver(destination, text, len(indexes))
+            for index in indexes:
+                messages[index][1].resolve(*result)
+            with self._lock:
+                self.sent += 1
+                self.merged += len(indexes) - 1
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        if len(pending) == 1:
+            self._flush_destination(*pending[0])
+        elif pending:
+            with ThreadPoolExecutor(max_workers=min(FLUSH_THREADS, len(pending)), thread_name_prefix="messages") as pool:
+                for future in [pool.submit(self._flush_destination, *p) for p in pending]:
+                    future.result()
+
+
+_current = ContextVar("message_batch", default=None)
+
+
+@contextmanager
+def batch():
+    """Batch the messages sent until the end of the block, then send them."""
+    current = MessageBatch()
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+        current.flush()
+
+
+def send(destination, text) -> Delivery:
+    current = _current.get()
+    if current is None:
+        delivery = Delivery()
+        delivery.resolve(*_deliver(destination, text, 1))
+        return delivery
+    return current.add(destination, text)
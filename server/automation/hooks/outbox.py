@@ -0,0 +1,208 @@
+"""
+Reaction workers draining the TriggerEvent outbox (`run_reactions`).
+
+With `run_hooks --outbox` (or settings.AUTOMATION_REACTION_OUTBOX) checkers
+only queue the context of their triggers, so a slow reaction (image
+generation, PDF conversion...) no longer delays the checkers after it.
+ReactionWorker claims batches of due events with SELECT ... FOR UPDATE SKIP
+LOCKED, so several run_reactions processes can share the queue, and runs
+their executors on a thread pool. A claim pushes available_at CLAIM_TTL
+ahead: events of a worker that died are picked up again after that.
+
+A failing reaction is logged and retried with exponential backoff up to
+MAX_ATTEMPTS times. Events blocked by an open circuit or an upstream rate
+limit are put back for when the service may be called, without counting an
+attempt. Events of disabled areas are dropped.
+
+The thread pool lives as long as the worker (close() shuts it down); like
+requests, every reaction run on it starts and ends with
+close_old_connections, so its threads do not hold on to connections past
+CONN_MAX_AGE.
+"""
+import contextvars
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from automation import ratelimit
+from automation.circuit import CircuitBreaker, CircuitOpen
+from automation.credentials import broker
+from automation.models import TriggerEvent
+from . import get_reaction_executor, messages
+from .engine import call_handler
+from .logbuffer import LogBuffer
+
+# Seconds a claimed event stays invisible to other workers
+CLAIM_TTL = 300
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 30  # doubled on every attempt
+
+
+class QueueStats:
+    def __init__(self, depth, ready, oldest_at, now):
+        self.depth = depth  # events in the outbox
+        self.ready = ready  # events due now (not claimed or waiting for a retry)
+        self.oldest_age = (now - oldest_at).total_seconds() if oldest_at else 0.0
+
+    def __str__(self):
+        return f"Outbox: {self.depth} events ({self.ready} ready), oldest {self.oldest_age:.0f}s old"
+
+
+def queue_stats(now=None) -> QueueStats:
+    now = now or timezone.now()
+    stats = TriggerEvent.objects.aggregate(
+        depth=Count("id"),
+        ready=Count("id", filter=Q(available_at__lte=now)),
+        oldest_at=Min("created_at"),
+    )
+    return QueueStats(stats["depth"], stats["ready"], stats["oldest_at"], now)
+
+
+class BatchReport:
+    """Outcome of one batch of reactions."""
+
+    def __init__(self, claimed, succeeded, failed, postponed, dropped, wall_time):
+        self.claimed = claimed
+        self.succeeded = succeeded
+        self.failed = failed
+        self.postponed = postponed  # circuit open or rate limited
+        self.dropped = dropped  # area disabled, or out of attempts
+        self.wall_time = wall_time
+
+    def __str__(self):
+        return (
+            f"Reactions: {self.claimed} events, {self.succeeded} succeeded, {self.failed} failed, "
+            f"{self.postponed} postponed, {self.dropped} dropped in {self.wall_time:.2f}s"
+        )
+
+
+class ReactionWorker:
+    def __init__(self, workers: int = 4, batch_size: int = 100, worker_id: str = None, logs=None, breaker=None):
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.logs = LogBuffer() if logs is None else logs
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        self._pool = None
+
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reaction")
+        return self._pool
+
+    def close(self):
+        """Stop the thread pool, once the worker is done."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def claim(self, now):
+        """Take up to batch_size due events for this worker."""
+        with transaction.atomic():
+            ids = list(
+                TriggerEvent.objects.select_for_update(skip_locked=True)
+                .filter(available_at__lte=now)
+                .order_by("available_at")
+                .values_list("id", flat=True)[:self.batch_size]
+            )
+            # On SQLite (no row locks) the conditional update is what makes the claim exclusive
+            TriggerEvent.objects.filter(id__in=ids, available_at__lte=now).update(
+                available_at=now + timedelta(seconds=CLAIM_TTL), claimed_by=self.worker_id,
+            )
+        return list(
+            TriggerEvent.objects.filter(id__in=ids, claimed_by=self.worker_id, available_at__gt=now)
+            .select_related("area__action__service", "area__reaction__service", "area__user")
+            .order_by("created_at")
+        )
+
+    def react(self, event):
+        """Run the reaction of an event. Returns (status, message, retry at or None)."""
+        area = event.area
+        react_type = (area.config_reaction or {}).get("type")
+        executor = get_reaction_executor(area)
+        if not executor:
+            return "error", f"Missing handler (reaction={react_type})", None
+
+        # Executors read the trigger context from the area, as when run inline
+        area._trigger_context = dict(event.context)
+        with ratelimit.track() as usage:
+            try:
+                with self.breaker.guard(area.reaction.service.name):
+                    result = call_handler(executor, area, context=dict(event.context))
+            except CircuitOpen as exc:
+                return None, "", datetime.fromtimestamp(exc.until, tz=dt_timezone.utc)
+            except Exception as exc:
+                if usage.deferred_until is not None:
+                    return None, "", usage.deferred_until
+                return "error", f"Exception: {exc}", None
+        if isinstance(result, messages.Delivery):
+            return result  # sent when the batch is flushed
+        detail = result.get("detail") if isinstance(result, dict) else str(result)
+        return "success", detail or "Reaction executed", None
+
+    def _react_in_worker(self, event):
+        close_old_connections()
+        try:
+            return self.react(event)
+        finally:
+            close_old_connections()
+
+    def run_batch(self, now=None) -> BatchReport:
+        now = now or timezone.now()
+        started = time.perf_counter()
+        events = self.claim(now)
+
+        runnable = [event for event in events if event.area.enabled]
+        broker.prefetch([event.area for event in runnable], now)
+        with messages.batch():
+            if self.workers == 1 or len(runnable) <= 1:
+                results = [self.react(event) for event in runnable]
+            else:
+                # In copies of this context, so that messages join the batch
+                contexts = [contextvars.copy_context() for _ in runnable]
+                results = list(self.pool().map(
+                    lambda context, event: context.run(self._react_in_worker, event), contexts, runnable,
+                ))
+        results = [r.result() if isinstance(r, messages.Delivery) else r for r in results]
+
+        done = [event.id for event in events if not event.area.enabled]
+        dropped = len(done)
+        retries = []
+        succeeded = failed = postponed = 0
+        for event, (status, message, retry_at) in zip(runnable, results):
+            if status is None:
+                postponed += 1
+                event.available_at = retry_at
+                retries.append(event)
+                continue
+            self.logs.add(event.area, status, message, now)
+            event.attempts += 1
+            if status == "success":
+                succeeded += 1
+                done.append(event.id)
+            elif event.attempts >= MAX_ATTEMPTS:
+                failed += 1
+                dropped += 1
+                done.append(event.id)
+            else:
+                failed += 1
+                event.available_at = now + timedelta(seconds=RETRY_DELAY * 2 ** (event.attempts - 1))
+                retries.append(event)
+
+        with transaction.atomic():
+            if self.logs.due(now):
+                self.logs.flush(now)
+            if done:
+                TriggerEvent.objects.filter(id__in=done).delete()
+            if retries:
+                for event in retries:
+                    event.claimed_by = ""
+                TriggerEvent.objects.bulk_update(retries, ["available_at", "attempts", "claimed_by"])
+
+        return BatchReport(len(events), succeeded, failed, postponed, dropped, time.perf_counter() - started)
@@ -1,8 +1,8 @@
 from .. import register_reaction
-import requests
+from ..messages import send, discord_channel
 import os
 
-@register_reaction("send_message")
+@register_reaction("send_message", service="discord")
 def executor(area, context=None):
     """
     Post a message to a Discord channel.
@@ -34,21 +34,8 @@ def executor(area, context=None):
 
         final_content = format_string(content_template, ctx)
         
-        url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
-        headers = {
-            "Authorization": f"Bot {token}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "content": final_content
-        }
-        
-        res = requests.post(url, headers=headers, json=payload)
-        
-        if res.status_code in [200, 201]:
-            print(f"Discord message sent: {res.json().get('id')}")
-        else:
-            print(f"Failed to send Discord message: {res.text}")
+        # Sent with the other messages of the tick to this channel, see automation.hooks.messages
+        return send(discord_channel(channel_id, token), final_content)
 
     except Exception as e:
         print(f"Error in discord_send_message: {e}")
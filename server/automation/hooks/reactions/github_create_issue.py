@@ -1,7 +1,6 @@
 from .. import register_reaction
-from automation.models import UserService, Service
-import requests
-from accounts.models import OAuthAccount
+from automation.http_client import http
+from automation.credentials import broker
 
 @register_reaction("create_issue")
 def executor(area, context=None):
@@ -11,12 +10,10 @@ def executor(area, context=None):
     """
     try:
         # Get Auth
-        oauth_account = OAuthAccount.objects.filter(user=area.user, provider='github').first()
-        if not oauth_account:
+        access_token = broker.access_token(area.user_id, "github")
+        if not access_token:
             print("No GitHub OAuth account found for user")
             return
-            
-        access_token = oauth_account.access_token
 
         # Config
         reaction_config = getattr(area, 'config_reaction', {}) or area.reaction_parameters or {}
@@ -64,7 +61,7 @@ def executor(area, context=None):
             "body": final_body
         }
         
-        res = requests.post(url, headers=headers, json=payload)
+        res = http.post(url, headers=headers, json=payload)
         
         if res.status_code == 201:
             print(f"Issue created successfully: {res.json().get('html_url')}")
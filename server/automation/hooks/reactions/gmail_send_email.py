@@ -1,8 +1,8 @@
 from .. import register_reaction
-from automation.models import UserService, Service
-import requests
+from automation.http_client import http
 import base64
 from email.mime.text import MIMEText
+from automation.credentials import broker
 
 @register_reaction("send_email")
 def executor(area, context=None):
@@ -11,14 +11,11 @@ def executor(area, context=None):
     Params: to (string), subject (string), body (string)
     """
     try:
-        from accounts.models import OAuthAccount
-        oauth_account = OAuthAccount.objects.filter(user=area.user, provider='google').first()
+        access_token = broker.access_token(area.user_id, "google")
         
-        if not oauth_account:
+        if not access_token:
             print("No Google OAuth account found")
             return
-            
-        access_token = oauth_account.access_token
 
         reaction_config = getattr(area, 'config_reaction', {}) or area.reaction_parameters or {}
         
@@ -57,7 +54,7 @@ def executor(area, context=None):
         }
         payload = {"raw": raw_message}
         
-        res = requests.post(url, headers=headers, json=payload)
+        res = http.post(url, headers=headers, json=payload)
         
         if res.status_code == 200:
             print(f"Email sent successfully: {res.json().get('id')}")
@@ -1,5 +1,5 @@
 from .. import register_reaction
-import requests
+from automation.http_client import http
 import os
 import json
 
@@ -53,7 +53,7 @@ def executor(area, context=None):
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = http.post(url, json=payload, headers=headers)
         
         if response.status_code != 200:
             return {"error": f"API Error {response.status_code}: {response.text}"}
@@ -1,7 +1,6 @@
 from .. import register_reaction
-from automation.models import UserService, Service
-from automation.utils_spotify import get_valid_spotify_token
-import requests
+from automation.credentials import broker
+from automation.http_client import http
 
 
 @register_reaction("add_to_playlist")
@@ -25,15 +24,11 @@ def executor(area, context=None):
         return {"ok": False, "detail": "No track_uri provided by trigger action"}
     
     try:
-        # Get user's Spotify token
-        service = Service.objects.get(name='spotify')
-        user_service = UserService.objects.get(user=area.user, service=service)
-        
-        # Use valid token
-        access_token = get_valid_spotify_token(user_service)
+        # Get user's Spotify token (refreshed by the broker when about to expire)
+        access_token = broker.access_token(area.user_id, "spotify")
         
         if not access_token:
-            return {"ok": False, "detail": "Spotify not connected"}
+            return {"ok": False, "detail": "Spotify not connected for this user"}
         
         # Add track to playlist via Spotify API
         url = f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks"
@@ -45,7 +40,7 @@ def executor(area, context=None):
             "uris": [track_uri]
         }
         
-        response = requests.post(url, json=data, headers=headers)
+        response = http.post(url, json=data, headers=headers)
         
         if response.status_code == 201:
             return {
@@ -63,9 +58,5 @@ def executor(area, context=None):
                 "detail": f"Spotify API error {response.status_code}: {response.text[:200]}"
             }
             
-    except Service.DoesNotExist:
-        return {"ok": False, "detail": "Spotify service not found"}
-    except UserService.DoesNotExist:
-        return {"ok": False, "detail": "Spotify not connected for this user"}
     except Exception as e:
         return {"ok": False, "detail": f"Error: {str(e)}"}
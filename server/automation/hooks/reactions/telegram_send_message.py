@@ -1,8 +1,8 @@
 from .. import register_reaction
-import requests
+from ..messages import send, telegram_chat
 import os
 
-@register_reaction("send_message")
+@register_reaction("send_message", service="telegram")
 def executor(area, context=None):
     """
     Send a message via Telegram Bot.
@@ -34,18 +34,8 @@ def executor(area, context=None):
 
         final_text = format_string(text_template, ctx)
         
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        payload = {
-            "chat_id": chat_id,
-            "text": final_text
-        }
-        
-        res = requests.post(url, json=payload)
-        
-        if res.status_code == 200:
-            print(f"Telegram message sent: {res.json().get('result', {}).get('message_id')}")
-        else:
-            print(f"Failed to send Telegram message: {res.text}")
+        # Sent with the other messages of the tick to this chat, see automation.hooks.messages
+        return send(telegram_chat(chat_id, token), final_text)
 
     except Exception as e:
         print(f"Error in telegram_send_message: {e}")
@@ -1,7 +1,7 @@
 from .. import register_reaction
-import requests
+from automation.http_client import http
 import os
-from accounts.models import OAuthAccount
+from automation.credentials import broker
 
 @register_reaction("post_tweet")
 def executor(area, context=None):
@@ -11,12 +11,10 @@ def executor(area, context=None):
     """
     try:
         # Check OAuth
-        oauth_account = OAuthAccount.objects.filter(user=area.user, provider='twitter').first()
-        if not oauth_account:
+        access_token = broker.access_token(area.user_id, "twitter")
+        if not access_token:
             print("No Twitter OAuth account found")
             return
-            
-        access_token = oauth_account.access_token
 
         reaction_config = getattr(area, 'config_reaction', {}) or area.reaction_parameters or {}
         text_template = reaction_config.get('text', 'Hello from Area!')
@@ -40,7 +38,7 @@ def executor(area, context=None):
         }
         payload = {"text": final_text}
         
-        res = requests.post(url, headers=headers, json=payload)
+        res = http.post(url, headers=headers, json=payload)
         
         if res.status_code == 201:
             print(f"Tweet posted: {res.json().get('data', {}).get('id')}")
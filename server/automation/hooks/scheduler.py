@@ -0,0 +1,114 @@
+"""
+Next-due scheduler for the hook engine loop.
+
+Keeps the time each enabled area is next due in a heap so the loop only
+loads and evaluates the areas that are due, and sleeps until the earliest
+one. The due time of an area comes from the schedule registered for its
+action type (@register_schedule: timer intervals, daily time, cron) and
+defaults to the polling period for checkers that poll an upstream API.
+Areas whose triggers are pushed by webhooks are only polled every
+PUSH_POLL_PERIOD, as a safety net.
+"""
+import heapq
+from datetime import timedelta
+
+from automation.models import Area
+from . import action_schedules
+from .webhooks import PUSH_POLL_PERIOD, is_push_backed
+
+# Changes saved shortly before a sync may commit after it: look back a little.
+SYNC_MARGIN = timedelta(minutes=5)
+# Below this fraction of upstream quota left, polls are spaced out (up to 4x)
+LOW_BUDGET = 0.2
+
+
+class Scheduler:
+    def __init__(self, poll_period: int = 15):
+        self.poll_period = timedelta(seconds=poll_period)
+        self._heap = []
+        self._due = {}
+        # area id -> updated_at of the area when it was last scheduled by sync
+        self._seen = {}
+        self._synced_at = None
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, area_id, due_at):
+        self._due[area_id] = due_at
+        heapq.heappush(self._heap, (due_at, area_id))
+
+    def forget(self, area_id):
+        self._due.pop(area_id, None)
+
+    def has_schedule(self, area) -> bool:
+        return (area.config_action or {}).get("type") in action_schedules
+
+    def next_due_at(self, area, now):
+        schedule = action_schedules.get((area.config_action or {}).get("type"))
+        if schedule:
+            try:
+                due_at = schedule(area, now)
+                if due_at is not None:
+                    return max(due_at, now)
+            except Exception:
+                pass
+        if is_push_backed(area):
+            return now + PUSH_POLL_PERIOD
+        return now + self.poll_period
+
+    def reschedule(self, area, now, failed: bool = False, deferred_until=None, budget=None):
+        due_at = self.next_due_at(area, now)
+        if budget is not None and budget < LOW_BUDGET and not self.has_schedule(area):
+            due_at = max(due_at, now + self.poll_period * (1 + 3 * (1 - budget / LOW_BUDGET)))
+        if failed:
+            # Retry failed evaluations at the polling period, whatever the schedule
+            due_at = min(due_at, now + self.poll_period)
+        if deferred_until is not None:
+            # Rate limited: not before the upstream accepts calls again
+            due_at = max(due_at, deferred_until)
+        self.schedule(area.id, due_at)
+        return due_at
+
+    def sync(self, now):
+        """
+        Schedule every enabled area on the first call, resuming from their
+        persisted next due time when there is one. Later calls schedule the
+        areas created since, and reschedule the ones saved since (edited or
+        re-enabled) from their current config: an edited schedule may be due
+        sooner than the time computed from the old one.
+        """
+        areas = Area.objects.filter(enabled=True)
+        if self._synced_at is None:
+            for area_id, updated_at, next_due_at in areas.values_list("id", "updated_at", "trigger_state__next_due_at"):
+                self._seen[area_id] = updated_at
+                self.schedule(area_id, max(next_due_at or now, now))
+        else:
+            for area in areas.filter(updated_at__gte=self._synced_at - SYNC_MARGIN).select_related("trigger_state"):
+                # Saves within SYNC_MARGIN are returned by several syncs: only reschedule each one once
+                if self._seen.get(area.id) == area.updated_at and area.id in self._due:
+                    continue
+                if area.id in self._seen:
+                    due_at = self.next_due_at(area, now)
+                else:
+                    # New area: evaluated right away, like every area on the first sync
+                    due_at = max(area.get_trigger_state().next_due_at or now, now)
+                self._seen[area.id] = area.updated_at
+                self.schedule(area.id, due_at)
+        self._synced_at = now
+
+    def pop_due(self, now):
+        """Remove and return the ids of the areas due at `now`."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, area_id = heapq.heappop(self._heap)
+            if self._due.get(area_id) == due_at:
+                del self._due[area_id]
+                due.append(area_id)
+        return due
+
+    def earliest(self):
+        """Earliest due time, or None when nothing is scheduled."""
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
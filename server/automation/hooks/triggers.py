@@ -0,0 +1,26 @@
+"""
+Several trigger events from one check.
+
+A checker that finds several new items in one poll (e.g. the emails received
+since the last one) adds one event per item and returns True:
+
+    for message in new_messages:
+        add_trigger(area, {"email_id": message["id"], ...})
+    return True
+
+The engine then runs the reaction once per event (or queues one TriggerEvent
+per event in outbox mode), each with its own context merged over the tick
+context. A checker that does not add events fires a single event with the
+context it stored in area._trigger_context, as before.
+"""
+
+
+def add_trigger(area, context):
+    if not hasattr(area, "_trigger_events"):
+        area._trigger_events = []
+    area._trigger_events.append(dict(context))
+
+
+def pop_triggers(area) -> list:
+    """Return and clear the trigger events added on an area."""
+    return area.__dict__.pop("_trigger_events", None) or []
@@ -0,0 +1,218 @@
+"""
+Push (webhook) delivery of triggers.
+
+Areas carry a trigger key naming the upstream resource their action watches.
+A verified webhook is turned into an event for a trigger key and the action
+types it concerns; the matching areas are found through the indexed key and
+their reactions run right away, without calling the checkers.
+
+Once pushes are known to arrive for a key, its areas leave the regular poll
+set: the scheduler only polls them every PUSH_POLL_PERIOD as a safety net
+(e.g. a webhook removed upstream). Discord has no HTTP push for channel
+messages (only the Gateway websocket), so Discord areas keep polling.
+
+A GitHub delivery only reaches the areas of users whose linked GitHub
+account can see the repository, checked with their token once per user and
+repository (ACCESS_TTL): anyone can create an area naming a private
+repository. Until the check has succeeded, an area keeps being polled with
+its owner's token, as before. Checks are stored in RepositoryAccess, as
+deliveries are received by the web process while run_hooks schedules.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from automation.credentials import broker
+from automation.http_client import http
+from automation.models import RepositoryAccess, WebhookSource
+from .cursors import set_cursor
+from .engine import HookEngine
+
+GITHUB_ACTIONS = ("new_commit", "new_issue", "new_pull_request")
+PUSH_POLL_PERIOD = timedelta(hours=1)
+# How long the keys with webhooks and the verified repository access are cached by the scheduler
+SOURCES_TTL = 60
+
+# How long a check of a user's access to a repository is trusted, in seconds
+ACCESS_TTL = 3600
+
+_sources = {"keys": frozenset(), "access": frozenset(), "loaded_at": None}
+# (user id, repository) -> (has access, monotonic time of the check), of this process
+_repo_access = {}
+
+
+def build_trigger_key(config_action) -> str:
+    config = config_action or {}
+    act_type = config.get("type")
+    if act_type in GITHUB_ACTIONS and config.get("repository"):
+        return f"github:{config['repository'].strip().lower()}"
+    if act_type == "new_message" and config.get("chat_id"):
+        return f"telegram:{str(config['chat_id']).strip()}"
+    return ""
+
+
+def telegram_webhook_enabled() -> bool:
+    # With a webhook set, Telegram rejects getUpdates: every chat is pushed
+    return bool(getattr(settings, "TELEGRAM_WEBHOOK_SECRET", ""))
+
+
+def _load_sources():
+    now = time.monotonic()
+    if _sources["loaded_at"] is None or now - _sources["loaded_at"] > SOURCES_TTL:
+        _sources["keys"] = frozenset(WebhookSource.objects.values_list("key", flat=True))
+        _sources["access"] = frozenset(RepositoryAccess.objects.filter(
+            allowed=True, checked_at__gt=timezone.now() - timedelta(seconds=ACCESS_TTL),
+        ).values_list("user_id", "repository"))
+        _sources["loaded_at"] = now
+    return _sources
+
+
+def _cached_access(user_id, repository):
+    checked = _repo_access.get((user_id, repository))
+    if checked is None or time.monotonic() - checked[1] > ACCESS_TTL:
+        return None
+    return checked[0]
+
+
+def has_repo_access(user_id, repository) -> bool:
+    """Whether the GitHub account linked by a user can read a repository."""
+    allowed = _cached_access(user_id, repository)
+    if allowed is not None:
+        return allowed
+    # Checked recently by another process
+    stored = RepositoryAccess.objects.filter(
+        user_id=user_id, repository=repository, checked_at__gt=timezone.now() - timedelta(seconds=ACCESS_TTL),
+    ).values_list("allowed", "checked_at").first()
+    if stored is not None:
+        age = (timezone.now() - stored[1]).total_seconds()
+        _repo_access[(user_id, repository)] = (stored[0], time.monotonic() - age)
+        return stored[0]
+    access_token = broker.access_token(user_id, "github")
+    if not access_token:
+        return False
+    try:
+        response = http.get(
+            f"https://api.github.com/repos/{repository}",
+            headers={"Authorization": f"Bearer {access_token}", "Accept": "application/vnd.github.v3+json"},
+        )
+    except Exception as e:
+        print(f"webhooks: cannot check access of user {user_id} to {repository}: {e}")
+        return False
+    if response.status_code >= 500:
+        return False  # not an answer: check again next time
+    allowed = response.status_code == 200
+    RepositoryAccess.objects.update_or_create(
+        user_id=user_id, repository=repository, defaults={"allowed": allowed, "checked_at": timezone.now()},
+    )
+    _repo_access[(user_id, repository)] = (allowed, time.monotonic())
+    if allowed:
+        _sources["access"] = _sources["access"] | {(user_id, repository)}
+    else:
+        _sources["access"] = _sources["access"] - {(user_id, repository)}
+    return allowed
+
+
+def is_push_backed(area) -> bool:
+    key = area.trigger_key
+    if not key:
+        return False
+    if key.startswith("telegram:"):
+        return telegram_webhook_enabled()
+    if key.startswith("github:"):
+        # Pushes only reach areas whose owner was checked to see the repository
+        sources = _load_sources()
+        return key in sources["keys"] and (area.user_id, key[len("github:"):]) in sources["access"]
+    return key in _load_sources()["keys"]
+
+
+def mark_source(key, now=None):
+    WebhookSource.objects.update_or_create(key=key, defaults={"last_delivery_at": now or timezone.now()})
+    _sources["keys"] = _sources["keys"] | {key}
+
+
+class PushEvent:
+    """
+    An upstream event for the areas of a trigger key whose action type is in
+    action_types. context becomes the trigger context of the reaction and
+    cursor the checker cursor it moves, so the safety poll does not re-fire.
+    """
+
+    def __init__(self, key, action_types, context, cursor=None):
+        self.key = key
+        self.action_types = action_types
+        self.context = context
+        self.cursor = cursor or {}
+
+
+def github_event(event_type, payload):
+    """PushEvent for a GitHub delivery, or None if no trigger is concerned."""
+    repository = (payload.get("repository") or {}).get("full_name")
+    if not repository:
+        return None
+    key = f"github:{repository.lower()}"
+
+    # The pollers watch the default branch: pushes to other branches and tags are not new commits
+    default_ref = "refs/heads/" + (payload["repository"].get("default_branch") or "")
+    if event_type == "push" and payload.get("head_commit") and payload.get("ref") == default_ref:
+        commit = payload["head_commit"]
+        return PushEvent(key, ["new_commit"], {
+            "commit_sha": commit["id"],
+            "commit_message": commit.get("message", ""),
+            "author_name": (commit.get("author") or {}).get("name", ""),
+            "repository": repository,
+        }, {"last_commit": commit["id"]})
+
+    if event_type == "issues" and payload.get("action") == "opened":
+        issue = payload["issue"]
+        return PushEvent(key, ["new_issue"], {
+            "issue_id": str(issue["id"]),
+            "issue_number": issue["number"],
+            "issue_title": issue["title"],
+            "issue_author": issue["user"]["login"],
+            "repository": repository,
+        }, {"last_issue": str(issue["id"])})
+
+    if event_type == "pull_request" and payload.get("action") == "opened":
+        pr = payload["pull_request"]
+        return PushEvent(key, ["new_pull_request"], {
+            "pr_id": str(pr["id"]),
+            "pr_number": pr["number"],
+            "pr_title": pr["title"],
+            "pr_author": pr["user"]["login"],
+            "pr_url": pr["html_url"],
+            "repository": repository,
+        }, {"last_pr": str(pr["id"])})
+    return None
+
+
+def telegram_event(update):
+    message = update.get("message") or {}
+    chat_id = (message.get("chat") or {}).get("id")
+    if chat_id is None:
+        return None
+    return PushEvent(f"telegram:{chat_id}", ["new_message"], {
+        "message_text": message.get("text", ""),
+        "sender_name": (message.get("from") or {}).get("first_name", "Unknown"),
+        "chat_id": str(chat_id),
+    }, {"last_update": update.get("update_id")})
+
+
+def dispatch(event, engine=None, now=None):
+    """Run the reactions of the areas concerned by a PushEvent. Returns the TickReport."""
+    engine = engine or HookEngine()
+    now = now or timezone.now()
+    areas = [
+        area for area in engine.get_areas(now).filter(trigger_key=event.key)
+        if (area.config_action or {}).get("type") in event.action_types
+    ]
+    if event.key.startswith("github:"):
+        repository = event.key[len("github:"):]
+        access = {user_id: has_repo_access(user_id, repository) for user_id in {area.user_id for area in areas}}
+        areas = [area for area in areas if access[area.user_id]]
+    for area in areas:
+        area._trigger_context = dict(event.context)
+        for name, value in event.cursor.items():
+            set_cursor(area, name, value)
+    return engine.run_pushed(areas, now)
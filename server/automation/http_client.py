@@ -0,0 +1,116 @@
+"""
+Shared HTTP client for providers, hooks and views.
+
+    from automation.http_client import http
+    response = http.get(url, headers=headers, params=params)
+
+Same call style as the `requests` module, but every call goes through one
+requests.Session: connections are kept alive in per-host pools instead of
+paying a TCP/TLS handshake per call, calls without an explicit timeout get
+DEFAULT_TIMEOUT, and the latency of each call is recorded per host.
+Calls are also rate limited per upstream and credential (automation.ratelimit):
+a call the upstream would refuse raises RateLimited instead of being sent,
+and failed calls (errors and 5xx) are reported to the circuit breaker of
+the hook handler making them (automation.circuit).
+
+The session never keeps cookies, so nothing leaks between users sharing it.
+requests only speaks HTTP/1.1; async handlers get HTTP/2 through httpx in
+automation.hooks.aio when it is installed.
+"""
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from automation.circuit import upstream_failed
+from automation.ratelimit import limiter as default_limiter
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 20)
+# Hosts kept in the pool cache and connections kept per host
+POOL_HOSTS = 32
+POOL_SIZE = 32
+
+
+class HostStats:
+    __slots__ = ("calls", "errors", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_hosts: int = POOL_HOSTS, pool_size: int = POOL_SIZE, limiter=None):
+        self.timeout = timeout
+        self.limiter = limiter or default_limiter
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        key = self.limiter.key(url, kwargs.get("headers"))
+        self.limiter.acquire(key)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            failed = response.status_code >= 500
+            self.limiter.observe(key, response)
+            return response
+        finally:
+            if failed:
+                upstream_failed()
+            self._record(urlsplit(url).hostname or "", time.perf_counter() - started, failed)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def _record(self, host, elapsed, failed):
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = HostStats()
+            stats.calls += 1
+            stats.errors += failed
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+
+    def stats(self, reset: bool = False) -> dict:
+        """Latency stats per host: {host: HostStats}. reset starts a new window."""
+        with self._lock:
+            stats = self._stats
+            if reset:
+                self._stats = {}
+            else:
+                stats = dict(stats)
+        return stats
+
+
+http = HttpClient()
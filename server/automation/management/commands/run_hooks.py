@@ -1,10 +1,16 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from time import sleep
-import importlib
 
-from automation.models import Area, ExecutionLog
-from automation.hooks import action_checkers, reaction_executors
+from automation.credentials import broker
+from automation.http_client import http
+from automation.providers.cache import response_cache
+from automation.hooks.engine import HookEngine
+from automation.hooks.async_engine import AsyncHookEngine
+from automation.hooks.leases import LeaseManager
+from automation.hooks.logbuffer import LogBuffer
+from automation.hooks.outbox import queue_stats
+from automation.hooks.scheduler import Scheduler
 
 # Ensure built-in handlers are loaded
 import automation.hooks.actions.timer  # noqa: F401
@@ -45,62 +51,113 @@ class Command(BaseCommand):
     help = "Run Hook Engine loop to evaluate areas and execute reactions."
 
     def add_arguments(self, parser):
-        parser.add_argument("--interval", type=int, default=15, help="Polling interval in seconds")
+        parser.add_argument(
+            "--interval", type=int, default=15,
+            help="Polling period in seconds of checkers without their own schedule; also the max sleep between wakeups",
+        )
         parser.add_argument("--oneshot", action="store_true", help="Run a single iteration and exit")
+        parser.add_argument("--engine", choices=["sync", "async"], default="sync", help="Hook engine backend")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Threads evaluating areas (sync engine, default 1) or running sync handlers (async engine, default 32)",
+        )
+        parser.add_argument("--concurrency", type=int, default=1000, help="Max areas in flight (async engine)")
+        parser.add_argument(
+            "--per-service-limit", type=int, default=None,
+            help="Max areas of one service in flight (default: no limit; timer and system areas are never limited)",
+        )
+        parser.add_argument(
+            "--per-host-limit", type=int, default=10,
+            help="Max concurrent requests per upstream host made by async handlers (async engine)",
+        )
+        parser.add_argument(
+            "--outbox", action="store_true", default=None,
+            help="Queue fired triggers for run_reactions instead of running reactions inline",
+        )
+        parser.add_argument("--shard", action="store_true", help="Split areas with other run_hooks processes through DB leases")
+        parser.add_argument("--worker-id", default=None, help="Worker identity used for leases (default: hostname-pid)")
+        parser.add_argument("--lease-ttl", type=int, default=None, help="Lease lifetime in seconds (default: 4 x interval, min 60)")
+        parser.add_argument("--log-flush-size", type=int, default=500, help="Flush execution logs once this many rows are buffered")
+        parser.add_argument(
+            "--log-flush-interval", type=int, default=0,
+            help="Flush execution logs at most every N seconds (default 0: after every tick)",
+        )
 
     def handle(self, *args, **options):
         interval = options["interval"]
         oneshot = options["oneshot"]
+        verbosity = options["verbosity"]
 
-        self.stdout.write(self.style.SUCCESS(f"Hook engine started (interval={interval}s, oneshot={oneshot})"))
+        leases = None
+        if options["shard"]:
+            ttl = options["lease_ttl"] or max(60, interval * 4)
+            leases = LeaseManager(worker_id=options["worker_id"], ttl=ttl, renew_every=ttl // 4)
+            self.stdout.write(f"Sharding enabled (worker={leases.worker_id}, lease_ttl={ttl}s)")
 
-        def iteration():
-            now = timezone.now()
-            areas = Area.objects.filter(enabled=True).select_related("action__service", "reaction__service", "user")
-            for area in areas:
-                act_type = (area.config_action or {}).get("type")
-                react_type = (area.config_reaction or {}).get("type")
+        logs = LogBuffer(flush_size=options["log_flush_size"], flush_interval=options["log_flush_interval"])
 
-                checker = action_checkers.get(act_type)
-                executor = reaction_executors.get(react_type)
-                if not checker or not executor:
-                    ExecutionLog.objects.create(
-                        area=area,
-                        executed_at=now,
-                        status="error",
-                        message=f"Missing handler (action={act_type}, reaction={react_type})",
-                    )
-                    continue
+        if options["engine"] == "async":
+            workers = max(1, options["workers"] or 32)
+            engine = AsyncHookEngine(
+                workers=workers,
+                concurrency=options["concurrency"],
+                per_host=options["per_host_limit"],
+                leases=leases,
+                logs=logs,
+                per_service=options["per_service_limit"],
+                outbox=options["outbox"],
+            )
+        else:
+            workers = max(1, options["workers"] or 1)
+            engine = HookEngine(
+                workers=workers, leases=leases, logs=logs,
+                per_service=options["per_service_limit"], outbox=options["outbox"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Hook engine started (engine={options['engine']}, interval={interval}s, oneshot={oneshot}, "
+            f"workers={workers}, outbox={engine.outbox})"
+        ))
 
-                try:
-                    if checker(area, now=now):
-                        # Build context with timestamp and any data from trigger
-                        context = {"now": now.isoformat()}
-                        
-                        # If the action checker stored context data, merge it
-                        if hasattr(area, '_trigger_context'):
-                            context.update(area._trigger_context)
-                        
-                        result = executor(area, context=context)
-                        detail = result.get("detail") if isinstance(result, dict) else str(result)
-                        ExecutionLog.objects.create(
-                            area=area,
-                            executed_at=now,
-                            status="success",
-                            message=detail or "Reaction executed",
-                        )
-                except Exception as exc:
-                    ExecutionLog.objects.create(
-                        area=area,
-                        executed_at=now,
-                        status="error",
-                        message=f"Exception: {exc}",
+        def report(result):
+            if verbosity >= 1:
+                self.stdout.write(str(result))
+                if engine.outbox:
+                    self.stdout.write(str(queue_stats()))
+            if verbosity >= 2:
+                for host, stats in sorted(http.stats(reset=True).items()):
+                    self.stdout.write(
+                        f"  {host}: {stats.calls} calls, {stats.errors} errors, "
+                        f"mean {stats.mean * 1000:.0f}ms, max {stats.max * 1000:.0f}ms"
                     )
+                for name, stats in sorted(response_cache.stats().items()):
+                    self.stdout.write(
+                        f"  cache {name}: {stats.hits} hits, {stats.misses} misses ({stats.shared} shared)"
+                    )
+            if not oneshot and result.wall_time > interval:
+                self.stdout.write(self.style.WARNING(
+                    f"Tick took {result.wall_time:.2f}s, longer than the {interval}s interval"
+                ))
 
         if oneshot:
-            iteration()
+            report(engine.run_tick())
+            logs.flush()
             return
 
-        while True:
-            iteration()
-            sleep(interval)
+        scheduler = Scheduler(poll_period=interval)
+        # Refresh OAuth tokens before they expire, so checkers never wait for it
+        stop_refresh = broker.start_background_refresh(interval=max(interval, 30))
+        try:
+            while True:
+                result = engine.run_due(scheduler, timezone.now())
+                if result is not None:
+                    report(result)
+
+                earliest = scheduler.earliest()
+                wait = interval if earliest is None else (earliest - timezone.now()).total_seconds()
+                sleep(min(interval, max(1, wait)))
+        finally:
+            stop_refresh.set()
+            logs.flush()
+            if leases is not None:
+                leases.release_all()
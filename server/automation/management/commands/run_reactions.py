@@ -0,0 +1,71 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from automation.credentials import broker
+from automation.hooks.logbuffer import LogBuffer
+from automation.hooks.outbox import ReactionWorker, queue_stats
+
+# Ensure built-in reactions are loaded
+import automation.hooks.reactions.log  # noqa: F401
+import automation.hooks.reactions.gmail_send_email  # noqa: F401
+import automation.hooks.reactions.github_create_issue  # noqa: F401
+import automation.hooks.reactions.discord_send_message  # noqa: F401
+import automation.hooks.reactions.spotify_add_to_playlist  # noqa: F401
+import automation.hooks.reactions.telegram_send_message  # noqa: F401
+import automation.hooks.reactions.twitter_post_tweet  # noqa: F401
+import automation.hooks.reactions.image_gen_generate_image  # noqa: F401
+import automation.hooks.reactions.anime_get_anime_details  # noqa: F401
+import automation.hooks.reactions.games_get_game_news  # noqa: F401
+import automation.hooks.reactions.yahoo_finance_get_market_news  # noqa: F401
+import automation.hooks.reactions.pdf_converter_pdf_to_text  # noqa: F401
+import automation.hooks.reactions.job_search_get_job_details  # noqa: F401
+import automation.hooks.reactions.contact_crawler_scrape_contacts  # noqa: F401
+import automation.hooks.reactions.vehicle_detect_license_plate  # noqa: F401
+import automation.hooks.reactions.spotify_dl_download_song  # noqa: F401
+
+
+class Command(BaseCommand):
+    help = "Run the reactions of the triggers queued by run_hooks --outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=2, help="Seconds to sleep when the outbox has no due event")
+        parser.add_argument("--oneshot", action="store_true", help="Run a single batch and exit")
+        parser.add_argument("--workers", type=int, default=4, help="Threads running reactions")
+        parser.add_argument("--batch-size", type=int, default=100, help="Events claimed per batch")
+        parser.add_argument("--worker-id", default=None, help="Identity recorded on claimed events (default: hostname-pid)")
+        parser.add_argument("--log-flush-size", type=int, default=500, help="Flush execution logs once this many rows are buffered")
+        parser.add_argument(
+            "--log-flush-interval", type=int, default=0,
+            help="Flush execution logs at most every N seconds (default 0: after every batch)",
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options["verbosity"]
+        logs = LogBuffer(flush_size=options["log_flush_size"], flush_interval=options["log_flush_interval"])
+        worker = ReactionWorker(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            worker_id=options["worker_id"],
+            logs=logs,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Reaction worker started (worker={worker.worker_id}, workers={worker.workers}, batch={worker.batch_size})"
+        ))
+
+        # Refresh OAuth tokens before they expire, so reactions never wait for it
+        stop_refresh = broker.start_background_refresh(interval=max(options["interval"], 30))
+        try:
+            while True:
+                report = worker.run_batch()
+                if report.claimed and verbosity >= 1:
+                    self.stdout.write(str(report))
+                    self.stdout.write(str(queue_stats()))
+                if options["oneshot"]:
+                    return
+                if report.claimed < worker.batch_size:
+                    sleep(options["interval"])
+        finally:
+            stop_refresh.set()
+            worker.close()
+            logs.flush()
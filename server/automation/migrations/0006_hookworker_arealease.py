@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0005_remove_action_config_schema_remove_action_slug_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaLease',
+            fields=[
+                ('area', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lease', serialize=False, to='automation.area')),
+                ('owner', models.CharField(blank=True, default='', max_length=128)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'expires_at'], name='automation__owner_478418_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HookWorker',
+            fields=[
+                ('id', models.CharField(max_length=128, primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_seen'], name='automation__last_se_0b1413_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0006_hookworker_arealease'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(fields=['enabled', 'updated_at'], name='automation__enabled_6d4903_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_last_success(apps, schema_editor):
+    ExecutionLog = apps.get_model('automation', 'ExecutionLog')
+    AreaTriggerState = apps.get_model('automation', 'AreaTriggerState')
+    latest = (
+        ExecutionLog.objects.filter(status='success')
+        .values('area_id')
+        .annotate(last=Max('executed_at'))
+    )
+    AreaTriggerState.objects.bulk_create(
+        [AreaTriggerState(area_id=row['area_id'], last_success_at=row['last']) for row in latest],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0007_area_enabled_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaTriggerState',
+            fields=[
+                ('area', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trigger_state', serialize=False, to='automation.area')),
+                ('last_fired_at', models.DateTimeField(blank=True, null=True)),
+                ('last_success_at', models.DateTimeField(blank=True, null=True)),
+                ('next_due_at', models.DateTimeField(blank=True, null=True)),
+                ('cursor', models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.RunPython(backfill_last_success, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0008_areatriggerstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='executionlog',
+            name='last_executed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='executionlog',
+            name='repeat_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:44
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_trigger_keys(apps, schema_editor):
+    # Same keys as automation.hooks.webhooks.build_trigger_key at the time of this migration
+    Area = apps.get_model('automation', 'Area')
+    areas = []
+    for area in Area.objects.all().only('id', 'config_action'):
+        config = area.config_action or {}
+        act_type = config.get('type')
+        if act_type in ('new_commit', 'new_issue', 'new_pull_request') and config.get('repository'):
+            area.trigger_key = f"github:{config['repository'].strip().lower()}"
+        elif act_type == 'new_message' and config.get('chat_id'):
+            area.trigger_key = f"telegram:{str(config['chat_id']).strip()}"
+        else:
+            continue
+        areas.append(area)
+    Area.objects.bulk_update(areas, ['trigger_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0009_executionlog_repeat_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookSource',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('last_delivery_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='area',
+            name='trigger_key',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(fields=['trigger_key', 'enabled'], name='automation__trigger_c3e866_idx'),
+        ),
+        migrations.RunPython(backfill_trigger_keys, migrations.RunPython.noop),
+    ]
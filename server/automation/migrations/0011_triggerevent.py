@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0010_area_trigger_key_webhooksource'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TriggerEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('context', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=128)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigger_events', to='automation.area')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['available_at'], name='automation__availab_211abb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_stats(apps, schema_editor):
+    ExecutionLog = apps.get_model('automation', 'ExecutionLog')
+    ExecutionStat = apps.get_model('automation', 'ExecutionStat')
+    rows = (
+        ExecutionLog.objects.annotate(bucket=TruncHour('executed_at'))
+        .values('area_id', 'area__user_id', 'bucket', 'status')
+        .annotate(count=Sum('repeat_count'))
+        .order_by()
+    )
+    stats = {}
+    for row in rows:
+        key = (row['area_id'], row['bucket'])
+        if key not in stats:
+            stats[key] = ExecutionStat(area_id=row['area_id'], user_id=row['area__user_id'], bucket=row['bucket'])
+        if row['status'] == 'success':
+            stats[key].successes += row['count']
+        else:
+            stats[key].errors += row['count']
+    ExecutionStat.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0011_triggerevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecutionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execution_stats', to='automation.area')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execution_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'bucket'], name='automation__user_id_770dde_idx')],
+                'unique_together': {('area', 'bucket')},
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automation', '0012_executionstat'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='executionlog',
+            name='automation__area_id_9acda9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='executionlog',
+            index=models.Index(fields=['area', '-executed_at', '-id'], name='automation__area_id_0f5154_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='executionlog',
+            index=models.Index(fields=['-executed_at', '-id'], name='automation__execute_52f2eb_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import base64
 import hashlib
 import uuid
+from functools import lru_cache
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
@@ -9,12 +10,16 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-def _fernet():
+@lru_cache(maxsize=4)
+def _fernet_for(secret_key: str):
     # Derive a 32-byte key from SECRET_KEY (simple deterministic derivation)
-    digest = hashlib.sha256(settings.SECRET_KEY.encode("utf-8")).digest()
+    digest = hashlib.sha256(secret_key.encode("utf-8")).digest()
     key = base64.urlsafe_b64encode(digest)
     return Fernet(key)
 
+def _fernet():
+    return _fernet_for(settings.SECRET_KEY)
+
 def encrypt_token(value: str) -> str:
     if not value:
         return ""
@@ -96,6 +101,17 @@ class Reaction(models.Model):
     def __str__(self):
         return f"{self.service.name}:{self.name}"
 
+class CatalogVersion(models.Model):
+    """
+    Single row bumped whenever a Service, Action or Reaction is saved or
+    deleted, from any process: the about.json catalog of every process is
+    rebuilt when it changes (see automation.catalog).
+    """
+    generation = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Catalog generation {self.generation}"
+
 class Area(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="areas")
@@ -107,29 +123,152 @@ class Area(models.Model):
     config_reaction = models.JSONField(default=dict, blank=True)
     enabled = models.BooleanField(default=True)
     name = models.CharField(max_length=255, default="Untitled Area")
+    # Upstream resource the action watches (e.g. "github:owner/repo"), used to route webhooks
+    trigger_key = models.CharField(max_length=255, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        indexes = [models.Index(fields=["user", "enabled"])]
+        indexes = [
+            models.Index(fields=["user", "enabled"]),
+            models.Index(fields=["enabled", "updated_at"]),
+            models.Index(fields=["trigger_key", "enabled"]),
+        ]
 
     def __str__(self):
         return f"AREA {self.id} user={self.user_id} action={self.action_id} -> reaction={self.reaction_id}"
 
+    def save(self, *args, **kwargs):
+        from automation.hooks.webhooks import build_trigger_key
+        self.trigger_key = build_trigger_key(self.config_action)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "config_action" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "trigger_key"}
+        super().save(*args, **kwargs)
+
+    def get_trigger_state(self):
+        """Return the area's AreaTriggerState, or a fresh unsaved one if none exists yet."""
+        try:
+            return self.trigger_state
+        except AreaTriggerState.DoesNotExist:
+            return AreaTriggerState(area=self)
+
+class AreaTriggerState(models.Model):
+    """Trigger bookkeeping of an area, maintained by the hook engine."""
+    area = models.OneToOneField(Area, on_delete=models.CASCADE, primary_key=True, related_name="trigger_state")
+    last_fired_at = models.DateTimeField(blank=True, null=True)
+    last_success_at = models.DateTimeField(blank=True, null=True)
+    next_due_at = models.DateTimeField(blank=True, null=True)
+    cursor = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"TriggerState area={self.area_id} last_success_at={self.last_success_at}"
+
+class WebhookSource(models.Model):
+    """Trigger key an upstream has delivered a verified webhook for."""
+    key = models.CharField(max_length=255, primary_key=True)
+    last_delivery_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"WebhookSource {self.key} last_delivery_at={self.last_delivery_at}"
+
+class RepositoryAccess(models.Model):
+    """Whether a user's linked GitHub account could read a repository, as last checked for webhook deliveries."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="repository_access")
+    repository = models.CharField(max_length=255)  # "owner/name", lowercase like trigger keys
+    allowed = models.BooleanField(default=False)
+    checked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("user", "repository")
+
+    def __str__(self):
+        return f"RepositoryAccess {self.user_id} {self.repository} allowed={self.allowed}"
+
+class HookWorker(models.Model):
+    """A run_hooks process taking part in sharded area evaluation (run_hooks --shard)."""
+    id = models.CharField(max_length=128, primary_key=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["last_seen"])]
+
+    def __str__(self):
+        return f"HookWorker {self.id} last_seen={self.last_seen}"
+
+class AreaLease(models.Model):
+    """Ownership of an area by a hook worker, valid until expires_at."""
+    area = models.OneToOneField(Area, on_delete=models.CASCADE, primary_key=True, related_name="lease")
+    owner = models.CharField(max_length=128, blank=True, default="")
+    expires_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "expires_at"])]
+
+    def __str__(self):
+        return f"Lease area={self.area_id} owner={self.owner or '-'} expires_at={self.expires_at}"
+
+class TriggerEvent(models.Model):
+    """
+    A fired trigger waiting for its reaction (outbox filled by run_hooks --outbox,
+    drained by run_reactions). available_at is pushed forward while a worker
+    holds the event and on retries.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name="trigger_events")
+    context = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_by = models.CharField(max_length=128, blank=True, default="")
+
+    class Meta:
+        indexes = [models.Index(fields=["available_at"])]
+
+    def __str__(self):
+        return f"TriggerEvent {self.id} area={self.area_id} attempts={self.attempts}"
+
 class ExecutionLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name="execution_logs")
     executed_at = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=32)  # success / error
     message = models.TextField(blank=True)
+    # Identical consecutive errors of an area are coalesced into one row
+    repeat_count = models.PositiveIntegerField(default=1)
+    last_executed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["area", "executed_at"])]
+        # Keyset pagination of the logs (see automation.pagination), per area and overall
+        indexes = [
+            models.Index(fields=["area", "-executed_at", "-id"]),
+            models.Index(fields=["-executed_at", "-id"]),
+        ]
         ordering = ["-executed_at"]
 
     def __str__(self):
         return f"Log {self.id} area={self.area_id} status={self.status}"
 
+class ExecutionStat(models.Model):
+    """
+    Executions of an area per hour, kept up to date by the hook engine's
+    LogBuffer. Dashboard statistics are read from these rows instead of
+    counting ExecutionLog. Repeats of a coalesced log row are counted too.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="execution_stats")
+    area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name="execution_stats")
+    bucket = models.DateTimeField()  # start of the hour
+    successes = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("area", "bucket")
+        indexes = [models.Index(fields=["user", "bucket"])]
+
+    def __str__(self):
+        return f"Stats area={self.area_id} bucket={self.bucket} success={self.successes} error={self.errors}"
+
 class Session(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sessions")
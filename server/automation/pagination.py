@@ -0,0 +1,89 @@
+"""
+Keyset pagination of execution logs.
+
+Pages are ordered by (executed_at, id), newest first. The cursor is the key
+of the last row of a page, and the next page is read with
+WHERE (executed_at, id) < cursor, which the (area, executed_at, id) and
+(executed_at, id) indexes of ExecutionLog serve directly: fetching a page
+costs the same however deep it is in the history (unlike OFFSET).
+
+The body stays a plain JSON list; the cursor of the next page is sent in
+the Link (rel="next") and X-Next-Cursor headers, and is absent on the last
+page. Clients load older logs by passing it back (useAreas().logs on the
+web, "Charger plus" on the mobile logs screen).
+"""
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(executed_at, pk) -> str:
+    return base64.urlsafe_b64encode(f"{executed_at.isoformat()}|{pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(executed_at, id) of a cursor; raises ValidationError when it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        executed_at, pk = raw.split("|")
+        executed_at = datetime.fromisoformat(executed_at)
+        if timezone.is_naive(executed_at):
+            raise ValueError("naive datetime")
+        return executed_at, uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+class LogCursorPagination(BasePagination):
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = 50
+    max_limit = 200
+
+    def get_limit(self, request):
+        value = request.query_params.get(self.limit_query_param)
+        if value is None:
+            return self.default_limit
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ValidationError({"limit": "A positive integer is required."})
+        if limit < 1:
+            raise ValidationError({"limit": "A positive integer is required."})
+        return min(limit, self.max_limit)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_limit(request)
+        queryset = queryset.order_by("-executed_at", "-id")
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            executed_at, pk = decode_cursor(cursor)
+            queryset = queryset.filter(Q(executed_at__lt=executed_at) | Q(executed_at=executed_at, id__lt=pk))
+
+        # One row more than asked tells whether there is a next page
+        page = list(queryset[:limit + 1])
+        self.next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            self.next_cursor = encode_cursor(page[-1].executed_at, page[-1].pk)
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        if self.next_cursor is not None:
+            headers = {"Link": f'<{self.get_next_link()}>; rel="next"', "X-Next-Cursor": self.next_cursor}
+        return Response(data, headers=headers)
@@ -4,7 +4,8 @@ Uses public API: https://api.jikan.moe/v4/ (MyAnimeList unofficial API)
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
+from .cache import cached_response
 from datetime import datetime
 
 
@@ -88,46 +89,32 @@ class AnimeProvider(BaseProvider):
     def check_new_episode(self, params, context=None):
         """Check if a new episode has aired"""
         anime_id = params.get("anime_id")
-        area_id = context.get("area_id") if context else None
+        # Episode count seen on the previous poll, kept in the area's cursor by the checker
+        last_episode_count = (context or {}).get("last_episode_count", 0)
         
         try:
             url = f"https://api.jikan.moe/v4/anime/{anime_id}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json().get("data", {})
-            current_episodes = data.get("episodes", 0)
+            current_episodes = data.get("episodes") or 0
             
-            # Get saved state
-            if area_id:
-                from automation.models import Area
-                area = Area.objects.get(id=area_id)
-                last_episode_count = area.trigger_state.get("last_episode_count", 0)
-                
-                # Check if new episode
-                if current_episodes > last_episode_count:
-                    # Update state
-                    area.trigger_state["last_episode_count"] = current_episodes
-                    area.save()
-                    
-                    return {
-                        "triggered": True,
-                        "anime_title": data.get("title", "Unknown"),
-                        "new_episode": current_episodes,
-                        "aired_date": data.get("aired", {}).get("from", "")
-                    }
-                else:
-                    # No new episode, just update state
-                    if last_episode_count == 0:
-                        area.trigger_state["last_episode_count"] = current_episodes
-                        area.save()
-                    return {"triggered": False}
-            
-            return {"triggered": False, "error": "No area context"}
+            # Check if new episode
+            if current_episodes > last_episode_count:
+                return {
+                    "triggered": True,
+                    "anime_title": data.get("title", "Unknown"),
+                    "new_episode": current_episodes,
+                    "aired_date": data.get("aired", {}).get("from", ""),
+                    "episode_count": current_episodes
+                }
+            return {"triggered": False, "episode_count": current_episodes}
             
         except Exception as e:
             return {"triggered": False, "error": str(e)}
     
+    @cached_response(ttl=60 * 60, params={"query": "", "limit": 10})
     def search_anime(self, params, context=None):
         """Search for anime"""
         query = params.get("query", "")
@@ -135,7 +122,7 @@ class AnimeProvider(BaseProvider):
         
         try:
             url = f"https://api.jikan.moe/v4/anime?q={query}&limit={limit}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json().get("data", [])
@@ -159,13 +146,14 @@ class AnimeProvider(BaseProvider):
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @cached_response(ttl=6 * 60 * 60, params={"anime_id": None})
     def get_anime_details(self, params, context=None):
         """Get anime details"""
         anime_id = params.get("anime_id")
         
         try:
             url = f"https://api.jikan.moe/v4/anime/{anime_id}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json().get("data", {})
@@ -28,6 +28,11 @@ class BaseProvider(ABC):
         """Whether this service requires OAuth authentication. Default is True."""
         return True
 
+    @property
+    def calls_upstream(self) -> bool:
+        """Whether handlers of this service call an external API. Default is True."""
+        return True
+
     @abstractmethod
     def get_actions(self) -> List[Dict[str, Any]]:
         """
@@ -4,7 +4,8 @@ Uses public API: https://openlibrary.org/dev/docs/api/search
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
+from .cache import cached_response
 
 
 @ProviderRegistry.register
@@ -71,6 +72,7 @@ class BooksProvider(BaseProvider):
             }
         ]
     
+    @cached_response(ttl=6 * 60 * 60, params={"query": "", "limit": 10})
     def search_books(self, params, context=None):
         """Search for books"""
         query = params.get("query", "")
@@ -78,7 +80,7 @@ class BooksProvider(BaseProvider):
         
         try:
             url = f"https://openlibrary.org/search.json?q={query}&limit={limit}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -105,13 +107,14 @@ class BooksProvider(BaseProvider):
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @cached_response(ttl=24 * 60 * 60, params={"isbn": ""})
     def get_book_by_isbn(self, params, context=None):
         """Get book details by ISBN"""
         isbn = params.get("isbn", "")
         
         try:
             url = f"https://openlibrary.org/isbn/{isbn}.json"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -0,0 +1,152 @@
+"""
+Response cache for provider methods returning public data.
+
+    @cached_response(ttl=3600, params={"anime_id": None})
+    def get_anime_details(self, params, context=None):
+        ...
+
+Results are keyed by provider service name, method name and the declared
+params, normalized: missing params take their default and values are
+compared as stripped, lowercased strings, so other config keys (the
+reaction type, templates already rendered...) never split the cache.
+Only successful results ({"success": True, ...}) are kept, for ttl seconds.
+
+The cache is a process-wide LRU bounded by the estimated size of the
+results (settings.AUTOMATION_RESPONSE_CACHE_BYTES, default 16 MB).
+Concurrent misses on the same key make a single upstream call whose result
+every caller gets. Hit / miss counters are kept per provider method.
+"""
+import copy
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "shared")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # misses answered by another caller's request
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or getattr(settings, "AUTOMATION_RESPONSE_CACHE_BYTES", DEFAULT_MAX_BYTES)
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, size, result)
+        self._flights = {}
+        self._stats = {}
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+    def _store(self, key, ttl, result, now):
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (now + ttl, size, result)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def get_or_call(self, name, key, ttl, fn):
+        """Return the cached result for key, or call fn() once for all concurrent callers."""
+        with self._lock:
+            stats = self._stats.setdefault(name, CacheStats())
+            entry = self._lookup(key, time.monotonic())
+            if entry is not None:
+                stats.hits += 1
+                return copy.deepcopy(entry[2])
+            stats.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                stats.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if isinstance(flight.result, dict) and flight.result.get("success") is True:
+                    self._store(key, ttl, flight.result, time.monotonic())
+            flight.done.set()
+        return copy.deepcopy(flight.result)
+
+    def stats(self) -> dict:
+        """Counters per provider method: {"service.method": CacheStats}."""
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self._stats = {}
+
+
+response_cache = ResponseCache()
+
+
+def _normalize(value):
+    return str(value).strip().lower() if value is not None else None
+
+
+def cached_response(ttl, params):
+    """
+    Cache a provider method `method(self, params, context=None)` for ttl seconds.
+    params maps the names of the params the result depends on to their default.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, call_params, context=None):
+            call_params = call_params or {}
+            name = f"{self.service_name}.{method.__name__}"
+            key = (name,) + tuple(
+                (param, _normalize(call_params.get(param, default))) for param, default in sorted(params.items())
+            )
+            return response_cache.get_or_call(name, key, ttl, lambda: method(self, call_params, context))
+        return wrapper
+    return decorator
@@ -4,7 +4,7 @@ Uses public API: https://rapidapi.com/website-contacts-scraper/api/website-conta
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
 import os
 
 @ProviderRegistry.register
@@ -58,7 +58,7 @@ class ContactCrawlerProvider(BaseProvider):
         }
 
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = http.post(url, json=payload, headers=headers)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except Exception as e:
@@ -4,7 +4,8 @@ Uses public API: https://rapidapi.com/digimonk/api/games-details
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
+from .cache import cached_response
 import os
 
 @ProviderRegistry.register
@@ -52,6 +53,7 @@ class GamesProvider(BaseProvider):
             }
         ]
     
+    @cached_response(ttl=15 * 60, params={"game_id": None, "limit": 10, "offset": 0})
     def get_game_news(self, params, context=None):
         game_id = params.get('game_id')
         limit = params.get('limit', 10)
@@ -65,7 +67,7 @@ class GamesProvider(BaseProvider):
         }
 
         try:
-            response = requests.get(url, headers=headers, params=querystring)
+            response = http.get(url, headers=headers, params=querystring)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except Exception as e:
@@ -4,7 +4,8 @@ Uses public API: https://horoscope-app-api.vercel.app/
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
+from .cache import cached_response
 
 
 @ProviderRegistry.register
@@ -72,6 +73,7 @@ class HoroscopeProvider(BaseProvider):
             }
         ]
     
+    @cached_response(ttl=60 * 60, params={"sign": "aries", "day": "today"})
     def get_daily_horoscope(self, params, context=None):
         """Fetch horoscope from public API"""
         sign = params.get("sign", "aries").lower()
@@ -79,7 +81,7 @@ class HoroscopeProvider(BaseProvider):
         
         try:
             url = f"https://horoscope-app-api.vercel.app/api/v1/get-horoscope/daily?sign={sign}&day={day}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -4,7 +4,7 @@ Uses public API: https://rapidapi.com/letscrape-6bRBa3QguO5/api/jsearch
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
 import os
 
 @ProviderRegistry.register
@@ -63,7 +63,7 @@ class JobSearchProvider(BaseProvider):
         }
 
         try:
-            response = requests.get(url, headers=headers, params=querystring)
+            response = http.get(url, headers=headers, params=querystring)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except Exception as e:
@@ -4,7 +4,7 @@ Uses public API: https://rapidapi.com/pdf-converter-api/api/pdf-converter-api
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
 import os
 
 @ProviderRegistry.register
@@ -65,7 +65,7 @@ class PDFConverterProvider(BaseProvider):
         }
 
         try:
-            response = requests.post(url, data=pdf_data, headers=headers)
+            response = http.post(url, data=pdf_data, headers=headers)
             response.raise_for_status()
             return {"success": True, "text": response.text}
         except Exception as e:
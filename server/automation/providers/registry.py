@@ -1,13 +1,59 @@
-from typing import Dict, Type
+from types import MappingProxyType
+from typing import Dict, NamedTuple, Tuple, Type
 from .base import BaseProvider
 
+ACTION = "action"
+REACTION = "reaction"
+
+
+class Definition(NamedTuple):
+    """An action or reaction declared by a provider, frozen at registration."""
+    service: str
+    kind: str  # ACTION or REACTION
+    name: str
+    display_name: str
+    description: str
+    params: Tuple[MappingProxyType, ...]
+
+
+def _freeze(service, kind, definition) -> Definition:
+    return Definition(
+        service=service,
+        kind=kind,
+        name=definition["name"],
+        display_name=definition.get("display_name", definition["name"]),
+        description=definition.get("description", ""),
+        params=tuple(MappingProxyType(dict(param)) for param in definition.get("params", [])),
+    )
+
+
 class ProviderRegistry:
+    """
+    Registered providers, and an index of their actions and reactions keyed by
+    (service, kind, name). Definitions are read once when a provider is
+    registered, so lookups and counts never call get_actions / get_reactions,
+    which rebuild their lists (with bound handlers) on every call.
+    """
     _providers: Dict[str, BaseProvider] = {}
+    _definitions: Dict[Tuple[str, str, str], Definition] = {}
+    _counts: Dict[Tuple[str, str], int] = {}
+    _requires_auth: Dict[str, bool] = {}
+    _calls_upstream: Dict[str, bool] = {}
 
     @classmethod
     def register(cls, provider_cls: Type[BaseProvider]):
         provider = provider_cls()
-        cls._providers[provider.service_name] = provider
+        service = provider.service_name
+        cls._providers[service] = provider
+        cls._requires_auth[service] = bool(provider.requires_auth)
+        cls._calls_upstream[service] = bool(provider.calls_upstream)
+
+        # Registering a provider again replaces its definitions
+        cls._definitions = {key: d for key, d in cls._definitions.items() if key[0] != service}
+        for kind, definitions in ((ACTION, provider.get_actions()), (REACTION, provider.get_reactions())):
+            frozen = [_freeze(service, kind, definition) for definition in definitions]
+            cls._definitions.update({(service, kind, d.name): d for d in frozen})
+            cls._counts[(service, kind)] = len(frozen)
         return provider_cls
 
     @classmethod
@@ -17,3 +63,28 @@ class ProviderRegistry:
     @classmethod
     def get_all_providers(cls):
         return cls._providers.values()
+
+    @classmethod
+    def get_definition(cls, service_name: str, kind: str, name: str) -> Definition:
+        return cls._definitions.get((service_name, kind, name))
+
+    @classmethod
+    def get_params(cls, service_name: str, kind: str, name: str) -> list:
+        """Param specs of an action / reaction (copies, safe to serialize or modify)."""
+        definition = cls._definitions.get((service_name, kind, name))
+        return [dict(param) for param in definition.params] if definition else []
+
+    @classmethod
+    def requires_auth(cls, service_name: str) -> bool:
+        """Whether users must link an account; True for unknown services, for safety."""
+        return cls._requires_auth.get(service_name, True)
+
+    @classmethod
+    def calls_upstream(cls, service_name: str) -> bool:
+        """Whether handlers of a service call an external API; True for unknown services."""
+        return cls._calls_upstream.get(service_name, True)
+
+    @classmethod
+    def count(cls, service_name: str, kind: str) -> int:
+        """Number of actions / reactions a provider declares."""
+        return cls._counts.get((service_name, kind), 0)
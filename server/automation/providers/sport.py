@@ -4,7 +4,8 @@ Uses public API: https://www.thesportsdb.com/api.php (free tier)
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
+from .cache import cached_response
 
 
 @ProviderRegistry.register
@@ -84,13 +85,14 @@ class SportProvider(BaseProvider):
             }
         ]
     
+    @cached_response(ttl=24 * 60 * 60, params={"team_name": ""})
     def search_team(self, params, context=None):
         """Search for a team"""
         team_name = params.get("team_name", "")
         
         try:
             url = f"https://www.thesportsdb.com/api/v1/json/3/searchteams.php?t={team_name}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -119,13 +121,14 @@ class SportProvider(BaseProvider):
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @cached_response(ttl=24 * 60 * 60, params={"team_id": None})
     def get_team_details(self, params, context=None):
         """Get team details"""
         team_id = params.get("team_id")
         
         try:
             url = f"https://www.thesportsdb.com/api/v1/json/3/lookupteam.php?id={team_id}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -155,6 +158,7 @@ class SportProvider(BaseProvider):
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @cached_response(ttl=15 * 60, params={"league_id": None, "season": None})
     def get_league_table(self, params, context=None):
         """Get league standings"""
         league_id = params.get("league_id")
@@ -162,7 +166,7 @@ class SportProvider(BaseProvider):
         
         try:
             url = f"https://www.thesportsdb.com/api/v1/json/3/lookuptable.php?l={league_id}&s={season}"
-            response = requests.get(url, timeout=10)
+            response = http.get(url, timeout=10)
             response.raise_for_status()
             
             data = response.json()
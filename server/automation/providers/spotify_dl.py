@@ -5,7 +5,7 @@ Note: This is separate from the Spotify Provider which uses OAuth for playlists.
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
 import os
 
 @ProviderRegistry.register
@@ -58,7 +58,7 @@ class SpotifyDownloaderProvider(BaseProvider):
         }
 
         try:
-            response = requests.get(url, headers=headers, params=querystring)
+            response = http.get(url, headers=headers, params=querystring)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except Exception as e:
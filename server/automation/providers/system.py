@@ -20,6 +20,10 @@ class SystemProvider(BaseProvider):
     def requires_auth(self) -> bool:
         return False
 
+    @property
+    def calls_upstream(self) -> bool:
+        return False
+
     def get_actions(self) -> List[Dict[str, Any]]:
         return [
             {
@@ -20,6 +20,10 @@ class TimerProvider(BaseProvider):
     def requires_auth(self) -> bool:
         return False
 
+    @property
+    def calls_upstream(self) -> bool:
+        return False
+
     def get_actions(self) -> List[Dict[str, Any]]:
         return [
             {
@@ -47,7 +51,8 @@ class TimerProvider(BaseProvider):
                 'display_name': 'Planification Cron',
                 'description': 'Triggers based on a cron expression',
                 'params': [
-                    {'name': 'expression', 'type': 'string', 'description': 'Cron expression (e.g. "*/5 * * * *")'}
+                    {'name': 'expression', 'type': 'string', 'description': 'Cron expression (e.g. "*/5 * * * *", "0 9 * * mon-fri", "0 18 L * *")'},
+                    {'name': 'timezone', 'type': 'string', 'description': 'Timezone of the expression (e.g. "Europe/Paris", default UTC)'}
                 ]
             }
         ]
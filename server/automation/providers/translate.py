@@ -4,7 +4,7 @@ Uses public API: https://libretranslate.com (free tier)
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
 
 
 @ProviderRegistry.register
@@ -114,7 +114,7 @@ class TranslateProvider(BaseProvider):
                 "format": "text"
             }
             
-            response = requests.post(url, json=payload, timeout=15)
+            response = http.post(url, json=payload, timeout=15)
             response.raise_for_status()
             
             data = response.json()
@@ -138,7 +138,7 @@ class TranslateProvider(BaseProvider):
             url = "https://libretranslate.com/detect"
             payload = {"q": text}
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = http.post(url, json=payload, timeout=10)
             response.raise_for_status()
             
             data = response.json()
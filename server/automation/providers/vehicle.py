@@ -4,7 +4,7 @@ Uses public API: https://rapidapi.com/hermes-solutions/api/vehicle-database
 """
 from .base import BaseProvider
 from .registry import ProviderRegistry
-import requests
+from automation.http_client import http
 import os
 
 @ProviderRegistry.register
@@ -48,7 +48,7 @@ class VehicleProvider(BaseProvider):
         }
 
         try:
-            response = requests.post(url, headers=headers)
+            response = http.post(url, headers=headers)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except Exception as e:
@@ -0,0 +1,242 @@
+"""
+Per-upstream, per-credential rate limiting of outbound HTTP calls.
+
+Every call made through automation.http_client goes through the shared
+RateLimiter. Calls are keyed by (host, credential fingerprint): the user's
+OAuth token or the shared API key found in the request headers, hashed so
+no secret is kept in memory. Each key has a token bucket sized from
+RATE_LIMITS (overridable with settings.AUTOMATION_RATE_LIMITS) and is
+blocked until the time an upstream asks for with a 429, Retry-After,
+X-RateLimit-Reset or X-RateLimit-Reset-After.
+
+A call on an empty or blocked key is not sent: RateLimited is raised
+instead. The hook engine tracks what happened during each area evaluation
+(see track()) and reschedules deferred areas at the time the upstream is
+available again rather than logging an error. The lowest remaining budget
+seen is reported too, so the scheduler can space out the polls of areas
+whose quota runs low.
+"""
+import contextlib
+import hashlib
+import math
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+# host (or ".suffix") -> (requests per second, burst)
+RATE_LIMITS = {
+    "api.github.com": (5000 / 3600, 100),
+    "api.spotify.com": (3, 30),
+    "discord.com": (50, 50),
+    "api.telegram.org": (30, 30),
+    "gmail.googleapis.com": (10, 50),
+    ".p.rapidapi.com": (1, 5),
+}
+# Wait this long after a 429 that does not say for how long
+DEFAULT_RETRY_AFTER = 60
+# Headers that carry the credential a call is made with
+CREDENTIAL_HEADERS = ("authorization", "x-rapidapi-key", "x-api-key")
+
+
+class RateLimited(Exception):
+    def __init__(self, host, until):
+        super().__init__(f"Rate limited by {host} until {datetime.fromtimestamp(until, tz=timezone.utc).isoformat()}")
+        self.host = host
+        self.until = until
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds until the upstream accepts calls again, for a Retry-After header."""
+        return max(1, math.ceil(self.until - time.time()))
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "blocked_until", "budget")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.time()
+        self.blocked_until = 0.0
+        self.budget = None  # remaining / limit reported by the upstream
+
+    def refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def remaining(self):
+        local = self.tokens / self.capacity if self.rate else None
+        values = [v for v in (local, self.budget) if v is not None]
+        return min(values) if values else None
+
+
+class RateUsage:
+    """What the calls of one area evaluation ran into."""
+
+    def __init__(self):
+        self.until = None  # epoch seconds the area should be deferred to
+        self.budget = None  # lowest remaining budget fraction seen
+
+    def defer(self, until):
+        self.until = max(self.until or 0, until)
+
+    def saw_budget(self, budget):
+        if budget is not None:
+            self.budget = budget if self.budget is None else min(self.budget, budget)
+
+    @property
+    def deferred_until(self):
+        return datetime.fromtimestamp(self.until, tz=timezone.utc) if self.until else None
+
+
+_usage: ContextVar = ContextVar("rate_usage", default=None)
+
+
+@contextlib.contextmanager
+def track():
+    """Collect the deferrals and budgets of the calls made inside the block."""
+    usage = RateUsage()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def defer(until):
+    """Record a deferral for the area being evaluated (e.g. from a shared RateLimited)."""
+    usage = _usage.get()
+    if usage is not None:
+        usage.defer(until)
+
+
+def parse_retry_at(headers, now):
+    """Epoch time an upstream asks us to wait until, or None."""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return now + float(retry_after)
+        except ValueError:
+            try:
+                return parsedate_to_datetime(retry_after).timestamp()
+            except (TypeError, ValueError):
+                pass
+    reset_after = headers.get("X-RateLimit-Reset-After")  # Discord: seconds
+    if reset_after:
+        try:
+            return now + float(reset_after)
+        except ValueError:
+            pass
+    reset = headers.get("X-RateLimit-Reset")  # GitHub: epoch seconds
+    if reset:
+        try:
+            value = float(reset)
+            return value if value > now else now + value
+        except ValueError:
+            pass
+    return None
+
+
+class RateLimiter:
+    def __init__(self, limits=None):
+        self.limits = dict(RATE_LIMITS)
+        self.limits.update(limits if limits is not None else getattr(settings, "AUTOMATION_RATE_LIMITS", {}))
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def key(self, url, headers=None):
+        host = urlsplit(url).hostname or ""
+        credential = ""
+        for name, value in (headers or {}).items():
+            if name.lower() in CREDENTIAL_HEADERS and value:
+                credential = hashlib.sha256(str(value).encode()).hexdigest()[:16]
+                break
+        return host, credential
+
+    def _limit_for(self, host):
+        if host in self.limits:
+            return self.limits[host]
+        for pattern, limit in self.limits.items():
+            if pattern.startswith(".") and host.endswith(pattern):
+                return limit
+        return None, 1
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, capacity = self._limit_for(key[0])
+            bucket = self._buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+    def acquire(self, key):
+        """Take a token for a call on key, or raise RateLimited."""
+        now = time.time()
+        usage = _usage.get()
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.refill(now)
+            until = None
+            if bucket.blocked_until > now:
+                until = bucket.blocked_until
+            elif bucket.rate and bucket.tokens < 1:
+                until = now + (1 - bucket.tokens) / bucket.rate
+            else:
+                if bucket.rate:
+                    bucket.tokens -= 1
+                remaining = bucket.remaining()
+        if until is not None:
+            if usage is not None:
+                usage.defer(until)
+            raise RateLimited(key[0], until)
+        if usage is not None:
+            usage.saw_budget(remaining)
+
+    def observe(self, key, response):
+        """Update the key from the rate limit headers of a response."""
+        now = time.time()
+        headers = response.headers
+        until = None
+        if response.status_code == 429 or (response.status_code == 403 and headers.get("X-RateLimit-Remaining") == "0"):
+            until = parse_retry_at(headers, now) or now + DEFAULT_RETRY_AFTER
+
+        budget = None
+        remaining, limit = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Limit")
+        if remaining is not None and limit:
+            try:
+                budget = max(0.0, float(remaining) / float(limit))
+            except (ValueError, ZeroDivisionError):
+                budget = None
+            if budget == 0 and until is None:
+                until = parse_retry_at(headers, now)
+
+        with self._lock:
+            bucket = self._bucket(key)
+            if budget is not None:
+                bucket.budget = budget
+            if until is not None:
+                bucket.blocked_until = max(bucket.blocked_until, until)
+
+        usage = _usage.get()
+        if usage is not None:
+            usage.saw_budget(budget)
+            if until is not None:
+                usage.defer(until)
+
+    def remaining(self, url, headers=None):
+        """Remaining budget (0..1) of the key a call would use, None if unknown."""
+        with self._lock:
+            bucket = self._buckets.get(self.key(url, headers))
+            if bucket is None:
+                return None
+            bucket.refill(time.time())
+            return bucket.remaining()
+
+
+limiter = RateLimiter()
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Service, Action, Reaction, UserService, Area, ExecutionLog
+from .providers.registry import ACTION, REACTION, ProviderRegistry
 
 
 class ActionSerializer(serializers.ModelSerializer):
@@ -14,15 +15,7 @@ class ActionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def get_params(self, obj):
-        from .providers.registry import ProviderRegistry
-        provider = ProviderRegistry.get_provider(obj.service.name)
-        if not provider:
-            return []
-        
-        for action in provider.get_actions():
-            if action['name'] == obj.name:
-                return action.get('params', [])
-        return []
+        return ProviderRegistry.get_params(obj.service.name, ACTION, obj.name)
 
 
 class ReactionSerializer(serializers.ModelSerializer):
@@ -36,15 +29,7 @@ class ReactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def get_params(self, obj):
-        from .providers.registry import ProviderRegistry
-        provider = ProviderRegistry.get_provider(obj.service.name)
-        if not provider:
-            return []
-        
-        for reaction in provider.get_reactions():
-            if reaction['name'] == obj.name:
-                return reaction.get('params', [])
-        return []
+        return ProviderRegistry.get_params(obj.service.name, REACTION, obj.name)
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -58,6 +43,22 @@ class ServiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+def connected_service_ids(context) -> set:
+    """
+    Ids of the services the requesting user is subscribed to, loaded once per
+    request: the serializers of every row share the same context.
+    """
+    if '_connected_service_ids' not in context:
+        request = context.get('request')
+        if not request or not request.user.is_authenticated:
+            context['_connected_service_ids'] = set()
+        else:
+            context['_connected_service_ids'] = set(
+                UserService.objects.filter(user=request.user).values_list('service_id', flat=True)
+            )
+    return context['_connected_service_ids']
+
+
 class ServiceListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing services without nested data"""
     actions_count = serializers.SerializerMethodField()
@@ -71,29 +72,20 @@ class ServiceListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
     
     def get_actions_count(self, obj):
-        provider = obj.get_provider()
-        return len(provider.get_actions()) if provider else 0
+        return ProviderRegistry.count(obj.name, ACTION)
     
     def get_reactions_count(self, obj):
-        provider = obj.get_provider()
-        return len(provider.get_reactions()) if provider else 0
+        return ProviderRegistry.count(obj.name, REACTION)
 
     def get_is_connected(self, obj):
-        # Auto-connected services
-        if obj.name in ['timer', 'system', 'weatherapi']:
+        # Services without auth are always connected
+        if not ProviderRegistry.requires_auth(obj.name):
             return True
-
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-        return UserService.objects.filter(user=request.user, service=obj).exists()
+        return obj.id in connected_service_ids(self.context)
     
     def get_requires_auth(self, obj):
         """Check if the service requires OAuth authentication"""
-        provider = obj.get_provider()
-        if provider and hasattr(provider, 'requires_auth'):
-            return provider.requires_auth
-        return True  # Default to requiring auth for safety
+        return ProviderRegistry.requires_auth(obj.name)
 
 
 class UserServiceSerializer(serializers.ModelSerializer):
@@ -199,5 +191,5 @@ class ExecutionLogSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ExecutionLog
-        fields = ['id', 'area_id', 'executed_at', 'status', 'message']
+        fields = ['id', 'area_id', 'executed_at', 'status', 'message', 'repeat_count', 'last_executed_at']
         read_only_fields = fields
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -42,7 +42,7 @@ class DetectAITextReaction(IReaction):
 
         try:
             print(f"[AIDetection] Analyzing text for AI detection (language: {lang})...")
-            response = requests.post(url, json=payload, headers=AIDetectionService.HEADERS)
+            response = http.post(url, json=payload, headers=AIDetectionService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 from automation.interfaces import IService, IAction
 from automation.models import Area
@@ -41,7 +41,7 @@ class PriceChangeTrigger(IAction):
         querystring = {"itemId": item_id}
 
         try:
-            response = requests.get(url, headers=AliExpressService.HEADERS, params=querystring)
+            response = http.get(url, headers=AliExpressService.HEADERS, params=querystring)
             response.raise_for_status()
             data = response.json()
             
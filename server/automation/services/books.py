@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -31,7 +31,7 @@ class GetBooksReaction(IReaction):
 
         try:
             print("[Books] Fetching books list...")
-            response = requests.get(url, headers=BooksService.HEADERS)
+            response = http.get(url, headers=BooksService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
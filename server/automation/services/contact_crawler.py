@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -40,7 +40,7 @@ class ScrapeContactsReaction(IReaction):
 
         try:
             print(f"[ContactCrawler] Scraping contacts from: '{domain}'...")
-            response = requests.post(url, json=payload, headers=ContactCrawlerService.HEADERS)
+            response = http.post(url, json=payload, headers=ContactCrawlerService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
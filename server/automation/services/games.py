@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -44,7 +44,7 @@ class GetGameNewsReaction(IReaction):
 
         try:
             print(f"[Games] Fetching news for game ID: '{game_id}'...")
-            response = requests.get(url, headers=GamesService.HEADERS, params=querystring)
+            response = http.get(url, headers=GamesService.HEADERS, params=querystring)
             response.raise_for_status()
             
             result = response.json()
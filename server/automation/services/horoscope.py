@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -43,7 +43,7 @@ class GetHoroscopeReaction(IReaction):
 
         try:
             print(f"[Horoscope] Fetching horoscope for {sign} ({period})...")
-            response = requests.get(url, headers=HoroscopeService.HEADERS)
+            response = http.get(url, headers=HoroscopeService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
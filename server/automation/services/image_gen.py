@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -47,7 +47,7 @@ class GenerateImageReaction(IReaction):
 
         try:
             print(f"[ImageGen] Generating image for prompt: '{prompt}'...")
-            response = requests.post(url, json=payload, headers=ImageGenService.HEADERS)
+            response = http.post(url, json=payload, headers=ImageGenService.HEADERS)
             response.raise_for_status()
             
             # The API returns structured data, usually with a URL.
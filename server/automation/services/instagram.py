@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -45,7 +45,7 @@ class GetUserPostsReaction(IReaction):
 
         try:
             print(f"[Instagram] Fetching posts for user: '{username}'...")
-            response = requests.post(url, json=payload, headers=InstagramService.HEADERS)
+            response = http.post(url, json=payload, headers=InstagramService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
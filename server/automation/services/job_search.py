@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -41,7 +41,7 @@ class GetJobDetailsReaction(IReaction):
 
         try:
             print(f"[JobSearch] Fetching job details for ID: '{job_id}'...")
-            response = requests.get(url, headers=JobSearchService.HEADERS, params=querystring)
+            response = http.get(url, headers=JobSearchService.HEADERS, params=querystring)
             response.raise_for_status()
             
             result = response.json()
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 from automation.interfaces import IService, IAction
 from automation.models import Area
@@ -48,7 +48,7 @@ class NewEpisodeTrigger(IAction):
         }
 
         try:
-            response = requests.get(url, headers=NetflixService.HEADERS, params=querystring)
+            response = http.get(url, headers=NetflixService.HEADERS, params=querystring)
             response.raise_for_status()
             data = response.json()
             
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -43,7 +43,7 @@ class PDFToTextReaction(IReaction):
             
             # Note: In a real scenario, pdf_data would be actual PDF binary content
             # For testing without actual PDF data, this will likely fail but demonstrates the pattern
-            response = requests.post(url, data=pdf_data, headers=PDFConverterService.HEADERS)
+            response = http.post(url, data=pdf_data, headers=PDFConverterService.HEADERS)
             response.raise_for_status()
             
             result = response.text  # PDF converter likely returns plain text
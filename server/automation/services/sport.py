@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 from automation.interfaces import IService, IAction
 from automation.models import Area
@@ -42,7 +42,7 @@ class PlayerRatingTrigger(IAction):
         url = f"https://sportapi7.p.rapidapi.com/api/v1/player/{player_id}/unique-tournament/{tournament_id}/season/{season_id}/ratings"
         
         try:
-            response = requests.get(url, headers=SportService.HEADERS)
+            response = http.get(url, headers=SportService.HEADERS)
             response.raise_for_status()
             data = response.json()
             
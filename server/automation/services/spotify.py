@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -39,7 +39,7 @@ class DownloadSongReaction(IReaction):
 
         try:
             print(f"[Spotify] Downloading song: '{song_id}'...")
-            response = requests.get(url, headers=SpotifyService.HEADERS, params=querystring)
+            response = http.get(url, headers=SpotifyService.HEADERS, params=querystring)
             response.raise_for_status()
             
             result = response.json()
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -56,7 +56,7 @@ class TranslateJsonReaction(IReaction):
 
         try:
             print(f"[Translate] Sending request to translate to {target_language}...")
-            response = requests.post(url, json=payload, headers=TranslateService.HEADERS)
+            response = http.post(url, json=payload, headers=TranslateService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -32,7 +32,7 @@ class DetectLicensePlateReaction(IReaction):
 
         try:
             print("[Vehicle] Detecting license plate...")
-            response = requests.post(url, headers=VehicleService.HEADERS)
+            response = http.post(url, headers=VehicleService.HEADERS)
             response.raise_for_status()
             
             result = response.json()
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -39,7 +39,7 @@ class GetMarketNewsReaction(IReaction):
 
         try:
             print(f"[YahooFinance] Fetching market news for: '{ticker}'...")
-            response = requests.get(url, headers=YahooFinanceService.HEADERS, params=querystring)
+            response = http.get(url, headers=YahooFinanceService.HEADERS, params=querystring)
             response.raise_for_status()
             
             result = response.json()
@@ -1,4 +1,4 @@
-import requests
+from automation.http_client import http
 import os
 import json
 from automation.interfaces import IService, IReaction
@@ -39,7 +39,7 @@ class GetMp3LinkReaction(IReaction):
 
         try:
             print(f"[YouTube] Fetching MP3 link for video ID: '{video_id}'...")
-            response = requests.get(url, headers=YouTubeService.HEADERS, params=querystring)
+            response = http.get(url, headers=YouTubeService.HEADERS, params=querystring)
             response.raise_for_status()
             
             result = response.json()
@@ -1,8 +1,17 @@
+import re
+import time
+from django.core.signing import Signer
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Service, Action, Reaction, UserService
+from . import catalog
+from django.utils import timezone
+from django.db.models import F
+from .models import Service, Action, Reaction, UserService, Area, CatalogVersion, ExecutionLog, ExecutionStat
+from .providers.registry import ACTION, REACTION, ProviderRegistry
+from .ratelimit import RateLimited
+from unittest import mock
 import uuid
 
 User = get_user_model()
@@ -271,3 +280,274 @@ class TokenEncryptionTestCase(TestCase):
         
         self.assertEqual(user_service.get_access_token(), 'access')
         self.assertEqual(user_service.get_refresh_token(), '')
+
+
+class AboutJsonTestCase(TestCase):
+    """Test suite for the /about.json catalog"""
+
+    def setUp(self):
+        catalog.invalidate()
+        self.client = APIClient()
+        self.github = Service.objects.create(name='github', display_name='GitHub')
+        Action.objects.create(service=self.github, name='new_commit', description='Triggers on new commit')
+        Reaction.objects.create(service=self.github, name='create_issue', description='Create an issue')
+
+    def test_about_lists_services_with_params(self):
+        """Test services are listed with the params declared by their provider"""
+        response = self.client.get('/about.json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('current_time', response.data['server'])
+        github = response.data['server']['services'][0]
+        self.assertEqual(github['name'], 'github')
+        self.assertEqual(github['actions'][0]['params'], [{'name': 'repository', 'type': 'string'}])
+        self.assertEqual([p['name'] for p in github['reactions'][0]['params']], ['repository', 'title', 'body'])
+
+    def test_catalog_is_built_once(self):
+        """Test the catalog is reused between requests"""
+        self.client.get('/about.json')
+        # Only the catalog generation is read
+        with self.assertNumQueries(1):
+            response = self.client.get('/about.json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_changes_from_another_process(self):
+        """Test the catalog is rebuilt when another process bumps the generation in the database"""
+        etag = self.client.get('/about.json')['ETag']
+
+        # As sync_providers would from its own process: signals there only bump the database row
+        Action.objects.filter(service=self.github).update(description='Changed')
+        CatalogVersion.objects.filter(pk=catalog.VERSION_ID).update(generation=F('generation') + 1)
+
+        response = self.client.get('/about.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['server']['services'][0]['actions'][0]['description'], 'Changed')
+
+    def test_etag_revalidation(self):
+        """Test a matching If-None-Match gets a 304 until the catalog changes"""
+        etag = self.client.get('/about.json')['ETag']
+
+        response = self.client.get('/about.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        Action.objects.create(service=self.github, name='new_issue', description='Triggers on new issue')
+        response = self.client.get('/about.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['server']['services'][0]['actions']), 2)
+
+
+class ProviderRegistryTestCase(TestCase):
+    """Test suite for the provider definition index"""
+
+    def test_definitions_are_indexed(self):
+        """Test params and counts come from the index built at registration"""
+        provider = ProviderRegistry.get_provider('github')
+        self.assertEqual(ProviderRegistry.count('github', ACTION), len(provider.get_actions()))
+        self.assertEqual(ProviderRegistry.count('github', REACTION), len(provider.get_reactions()))
+        self.assertEqual(ProviderRegistry.get_params('github', ACTION, 'new_commit'), [{'name': 'repository', 'type': 'string'}])
+        self.assertEqual(ProviderRegistry.get_params('github', ACTION, 'unknown'), [])
+        self.assertEqual(ProviderRegistry.count('unknown', ACTION), 0)
+
+        params = ProviderRegistry.get_params('github', ACTION, 'new_commit')
+        params[0]['name'] = 'changed'
+        self.assertEqual(ProviderRegistry.get_definition('github', ACTION, 'new_commit').params[0]['name'], 'repository')
+
+    def test_serializers_do_not_rebuild_definitions(self):
+        """Test serializing services and actions never calls get_actions / get_reactions"""
+        github = Service.objects.create(name='github', display_name='GitHub')
+        Action.objects.create(service=github, name='new_commit')
+        provider = ProviderRegistry.get_provider('github')
+
+        with mock.patch.object(provider, 'get_actions', side_effect=AssertionError), \
+                mock.patch.object(provider, 'get_reactions', side_effect=AssertionError):
+            services = self.client.get('/services/').json()
+            actions = self.client.get(f'/services/{github.id}/actions/').json()
+
+        github_data = next(s for s in services if s['name'] == 'github')
+        self.assertEqual(github_data['actions_count'], ProviderRegistry.count('github', ACTION))
+        self.assertEqual(actions[0]['params'], [{'name': 'repository', 'type': 'string'}])
+
+
+class ServiceConnectionTestCase(TestCase):
+    """Test suite for is_connected on service lists"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='connected@example.com', password='testpass123')
+        self.services = [
+            Service.objects.create(name=name, display_name=name)
+            for name in ['github', 'spotify', 'discord', 'timer', 'horoscope']
+        ]
+        UserService.objects.create(user=self.user, service=self.services[0])
+        UserService.objects.create(user=self.user, service=self.services[1])
+
+    def test_service_list_is_connected(self):
+        """Test connection status comes from subscriptions, or requires_auth for public services"""
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get('/services/')
+
+        connected = {s['name']: s['is_connected'] for s in response.json()}
+        self.assertEqual(connected, {
+            'github': True, 'spotify': True, 'discord': False, 'timer': True, 'horoscope': True,
+        })
+
+    def test_query_count_does_not_grow_with_services(self):
+        """Test listing services and subscriptions costs a constant number of queries"""
+        for i in range(10):
+            service = Service.objects.create(name=f'extra-{i}', display_name=f'Extra {i}')
+            UserService.objects.create(user=self.user, service=service)
+
+        with self.assertNumQueries(1):
+            self.client.get('/services/')
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(2):
+            self.client.get('/services/')
+        with self.assertNumQueries(2):
+            response = self.client.get('/services/subscriptions/')
+        self.assertEqual(len(response.json()), 12)
+        self.assertTrue(all(s['service']['is_connected'] for s in response.json()))
+
+
+class DashboardStatsTestCase(TestCase):
+    """Test suite for GET /stats/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='stats@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        service = Service.objects.create(name='timer', display_name='Timer')
+        action = Action.objects.create(service=service, name='every_minute')
+        reaction = Reaction.objects.create(service=service, name='delay')
+        self.area = Area.objects.create(user=self.user, action=action, reaction=reaction)
+        Area.objects.create(user=self.user, action=action, reaction=reaction, enabled=False)
+
+    def add_stats(self, hours_ago, successes, errors):
+        bucket = timezone.now().replace(minute=0, second=0, microsecond=0) - timezone.timedelta(hours=hours_ago)
+        ExecutionStat.objects.create(user=self.user, area=self.area, bucket=bucket, successes=successes, errors=errors)
+
+    def test_stats_from_rollup(self):
+        """Test totals, 24h success rate and trend come from the hourly rollup"""
+        self.add_stats(1, 9, 1)
+        self.add_stats(5, 6, 4)
+        self.add_stats(30, 5, 5)
+        self.add_stats(100, 20, 0)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/stats/')
+
+        self.assertEqual(response.data, {
+            "total_executions": 50,
+            "active_workflows": 1,
+            "inactive_workflows": 1,
+            "success_rate": 75,
+            "executions_24h": 20,
+            "executions_trend": 10,
+            "previous_success_rate": 50,
+            "success_rate_trend": 25,
+        })
+
+    def test_no_activity(self):
+        """Test the success rate defaults to 100% without executions"""
+        response = self.client.get('/stats/')
+        self.assertEqual(response.data['total_executions'], 0)
+        self.assertEqual(response.data['success_rate'], 100)
+
+
+class AreaLogsTestCase(TestCase):
+    """Test suite for GET /areas/logs/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='logs@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        service = Service.objects.create(name='timer', display_name='Timer')
+        action = Action.objects.create(service=service, name='every_minute')
+        reaction = Reaction.objects.create(service=service, name='delay')
+        self.area = Area.objects.create(user=self.user, action=action, reaction=reaction)
+        self.other_area = Area.objects.create(user=self.user, action=action, reaction=reaction)
+        self.start = timezone.now().replace(microsecond=0) - timezone.timedelta(hours=1)
+        # Two logs per minute, so that pages split logs executed at the same time
+        self.logs = [
+            ExecutionLog.objects.create(
+                area=self.area if index % 3 else self.other_area,
+                executed_at=self.start + timezone.timedelta(minutes=index // 2),
+                status='error' if index % 4 == 0 else 'success',
+            )
+            for index in range(25)
+        ]
+        stranger = User.objects.create_user(email='stranger@example.com', password='testpass123')
+        ExecutionLog.objects.create(area=Area.objects.create(user=stranger, action=action, reaction=reaction))
+
+    def expected(self, logs):
+        return [str(log.id) for log in sorted(logs, key=lambda log: (log.executed_at, log.id), reverse=True)]
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [str(log['id']) for log in response.data]
+            pages += 1
+            url = re.match(r'<(.*)>; rel="next"', response['Link']).group(1) if 'Link' in response else None
+        return ids, pages
+
+    def test_pages_cover_all_logs_once(self):
+        """Test walking the cursor returns every log of the user once, newest first"""
+        ids, pages = self.walk('/areas/logs/?limit=4')
+        self.assertEqual(ids, self.expected(self.logs))
+        self.assertEqual(pages, 7)
+
+    def test_page_queries(self):
+        """Test a page deep in the history is read in one query, with a next link"""
+        response = self.client.get('/areas/logs/?limit=10')
+        cursor = response['X-Next-Cursor']
+        self.assertIn(f'cursor={cursor}', response['Link'])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/areas/logs/?limit=10&cursor={cursor}')
+        self.assertEqual([str(log['id']) for log in response.data], self.expected(self.logs)[10:20])
+
+    def test_filters(self):
+        """Test area, status and time range filters combine with pagination"""
+        since = self.start + timezone.timedelta(minutes=2)
+        until = self.start + timezone.timedelta(minutes=10)
+        query = f'area={self.area.id}&status=success&since={since.isoformat()}&until={until.isoformat()}'.replace('+', '%2B')
+        ids, _ = self.walk(f'/areas/logs/?limit=2&{query}')
+        self.assertEqual(ids, self.expected(
+            log for log in self.logs
+            if log.area_id == self.area.id and log.status == 'success' and since <= log.executed_at < until
+        ))
+
+    def test_last_page_has_no_cursor(self):
+        """Test the default page holds every log when they fit, without a cursor"""
+        response = self.client.get('/areas/logs/')
+        self.assertEqual(len(response.data), 25)
+        self.assertNotIn('X-Next-Cursor', response)
+        self.assertNotIn('Link', response)
+
+    def test_invalid_params(self):
+        """Test malformed cursor, limit, area and dates are rejected"""
+        for query in ('cursor=nope', 'limit=0', 'limit=x', 'area=1', 'since=yesterday', 'until=2024-13-01T00:00:00'):
+            response = self.client.get(f'/areas/logs/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+
+class OAuthCallbackTestCase(TestCase):
+    """Test suite for the OAuth callbacks of service connections"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='oauth@example.com', password='Test1234!')
+        self.state = Signer().sign(f"{self.user.id}|/dashboard")
+
+    def test_throttled_token_exchange_redirects_with_error(self):
+        """Test a rate limited token exchange redirects to the dashboard instead of failing with a 500"""
+        throttled = RateLimited('github.com', time.time() + 60)
+        for provider in ('github', 'spotify'):
+            with mock.patch('automation.views_oauth.http.post', side_effect=throttled):
+                response = self.client.get(f'/{provider}/callback/', {'code': 'abc', 'state': self.state})
+            self.assertEqual(response.status_code, 302)
+            self.assertTrue(response['Location'].endswith(f'error={provider}_rate_limited'))
+        self.assertFalse(UserService.objects.filter(user=self.user).exists())
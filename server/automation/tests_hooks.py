@@ -0,0 +1,1317 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import re
+import threading
+import time
+from unittest import mock
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from accounts.models import OAuthAccount
+from django.utils import timezone
+from automation.circuit import CircuitBreaker, upstream_failed
+from automation.credentials import REFRESHERS, RefreshError, broker
+from automation.models import Service, Action, Reaction, Area, AreaLease, AreaTriggerState, ExecutionLog, ExecutionStat, RepositoryAccess, TriggerEvent, UserService
+from automation.hooks import register_action, register_reaction, register_schedule
+from automation.hooks.engine import HookEngine
+from automation.hooks.async_engine import AsyncHookEngine
+from automation.hooks.leases import LeaseManager
+from automation.hooks.logbuffer import LogBuffer
+from automation.hooks import messages
+from automation.hooks.messages import Destination, send
+from automation.hooks.outbox import MAX_ATTEMPTS, ReactionWorker, queue_stats
+from automation.hooks import coalesce
+from automation.hooks.coalesce import fetch_once
+from automation.hooks.cursors import get_cursor, set_cursor
+from automation.hooks.triggers import add_trigger
+from automation.hooks.cron import CronError, compile_cron
+from automation.hooks.scheduler import Scheduler
+from automation.hooks import webhooks
+from automation.hooks.actions.timer import check_timer
+from automation.hooks.actions.timer_cron_schedule import check_cron, next_cron_check
+import automation.hooks.actions.github_new_commit  # noqa: F401
+import automation.hooks.actions.github_new_issue  # noqa: F401
+from automation.hooks.actions import gmail_new_email
+import automation.hooks.actions.telegram_new_message  # noqa: F401
+
+User = get_user_model()
+
+executed = []
+polled = []
+
+
+@register_action("test_always")
+def always_checker(area, now=None):
+    area._trigger_context = {"thread": threading.current_thread().name}
+    return True
+
+
+@register_action("test_never")
+def never_checker(area, now=None):
+    return False
+
+
+@register_schedule("test_never")
+def hourly(area, now):
+    return now + timedelta(hours=1)
+
+
+@register_action("test_explode")
+def explode_checker(area, now=None):
+    raise RuntimeError("boom")
+
+
+@register_action("test_shared_poll")
+def shared_poll_checker(area, now=None):
+    resource = area.config_action['resource']
+
+    def poll():
+        time.sleep(0.05)
+        polled.append(resource)
+        return resource
+
+    area._trigger_context = {"thread": fetch_once(("test", resource), poll)}
+    return True
+
+
+@register_action("test_cursor")
+def cursor_checker(area, now=None):
+    latest = area.config_action['latest']
+    seen = get_cursor(area, 'seen')
+    set_cursor(area, 'seen', latest)
+    area._trigger_context = {"thread": "cursor"}
+    return seen is not None and latest > seen
+
+
+@register_action("test_many")
+def many_checker(area, now=None):
+    for item in area.config_action['items']:
+        add_trigger(area, {"item": item})
+    return bool(area.config_action['items'])
+
+
+@register_action("test_upstream_down")
+def upstream_down_checker(area, now=None):
+    polled.append(area.id)
+    upstream_failed()
+    return False
+
+
+in_flight = {"now": 0, "max": 0}
+in_flight_lock = threading.Lock()
+
+
+@register_action("test_in_flight")
+def in_flight_checker(area, now=None):
+    with in_flight_lock:
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+    time.sleep(0.05)
+    with in_flight_lock:
+        in_flight["now"] -= 1
+    return False
+
+
+@register_reaction("test_broken")
+def broken_executor(area, context=None):
+    raise RuntimeError("reaction failed")
+
+
+@register_reaction("test_record")
+def record_executor(area, context=None):
+    executed.append((area.id, {k: v for k, v in context.items() if k != 'now'}))
+    return {"detail": "recorded"}
+
+
+@register_reaction("test_slow")
+def slow_executor(area, context=None):
+    time.sleep(0.05)
+    executed.append((area.id, context["thread"]))
+    return {"detail": f"ran on {context['thread']}"}
+
+
+@register_action("test_async_always")
+async def async_checker(area, now=None):
+    await asyncio.sleep(0)
+    area._trigger_context = {"thread": "event-loop"}
+    return True
+
+
+@register_reaction("test_async_slow")
+async def async_executor(area, context=None):
+    await asyncio.sleep(0.05)
+    executed.append((area.id, context["thread"]))
+    return {"detail": "async reaction"}
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+chat_sent = []
+
+
+def send_to_chat(text):
+    chat_sent.append(text)
+    if "fail" in text:
+        return FakeResponse(400, "Bad Request: chat not found")
+    return FakeResponse(200)
+
+
+@register_reaction("test_chat")
+def chat_executor(area, context=None):
+    channel = area.config_reaction['channel']
+    destination = Destination(("test", channel), "Chat", send_to_chat, max_length=12, min_interval=0)
+    return send(destination, area.config_reaction['text'])
+
+
+class HookTestCase(TestCase):
+    """Shared fixtures for hook engine tests"""
+
+    def setUp(self):
+        executed.clear()
+        polled.clear()
+        self.user = User.objects.create_user(email='hooks@example.com', password='Test1234!')
+        service = Service.objects.create(name='system', display_name='System')
+        self.action = Action.objects.create(service=service, name='test_always')
+        self.reaction = Reaction.objects.create(service=service, name='test_slow')
+
+    def make_area(self, action_type='test_always', reaction_type='test_slow', **kwargs):
+        return Area.objects.create(
+            user=self.user,
+            action=self.action,
+            reaction=self.reaction,
+            config_action={'type': action_type},
+            config_reaction={'type': reaction_type},
+            **kwargs
+        )
+
+
+class HookEngineTests(HookTestCase):
+    """Tests for the hook engine tick"""
+
+    def test_serial_tick_logs_outcomes(self):
+        """Test a tick logs success, errors and skips untriggered areas"""
+        ok = self.make_area()
+        missing = self.make_area(reaction_type='unknown')
+        failing = self.make_area(action_type='test_explode')
+        idle = self.make_area(action_type='test_never')
+        self.make_area(enabled=False)
+
+        report = HookEngine().run_tick()
+
+        self.assertEqual(len(report.outcomes), 4)
+        self.assertEqual(ExecutionLog.objects.get(area=ok).status, 'success')
+        self.assertIn('Missing handler', ExecutionLog.objects.get(area=missing).message)
+        self.assertEqual(ExecutionLog.objects.get(area=failing).message, 'Exception: boom')
+        self.assertFalse(ExecutionLog.objects.filter(area=idle).exists())
+
+    def test_worker_pool_runs_areas_concurrently(self):
+        """Test --workers evaluates areas in parallel and reports timings"""
+        areas = [self.make_area() for _ in range(8)]
+
+        report = HookEngine(workers=4).run_tick(now=timezone.now())
+
+        self.assertEqual(len(executed), 8)
+        self.assertEqual({area_id for area_id, _ in executed}, {a.id for a in areas})
+        self.assertGreater(len({thread for _, thread in executed}), 1)
+        self.assertLess(report.wall_time, report.area_time)
+        self.assertEqual(ExecutionLog.objects.filter(status='success').count(), 8)
+        self.assertIn('workers=4', str(report))
+
+    def test_sync_engine_runs_async_handlers(self):
+        """Test the sync engine accepts coroutine checkers and executors"""
+        area = self.make_area(action_type='test_async_always', reaction_type='test_async_slow')
+
+        HookEngine().run_tick()
+
+        self.assertEqual(ExecutionLog.objects.get(area=area).message, 'async reaction')
+
+    def test_async_engine_mixes_async_and_sync_handlers(self):
+        """Test --engine async awaits async handlers and offloads sync ones"""
+        async_areas = [
+            self.make_area(action_type='test_async_always', reaction_type='test_async_slow') for _ in range(10)
+        ]
+        sync_area = self.make_area()
+        mixed_area = self.make_area(action_type='test_async_always', reaction_type='test_slow')
+
+        report = AsyncHookEngine(workers=2).run_tick()
+
+        self.assertEqual(len(executed), 12)
+        self.assertLess(report.wall_time, report.area_time)
+        for area in async_areas:
+            self.assertEqual(ExecutionLog.objects.get(area=area).message, 'async reaction')
+        self.assertTrue(ExecutionLog.objects.get(area=sync_area).message.startswith('ran on hook'))
+        self.assertEqual(ExecutionLog.objects.get(area=mixed_area).message, 'ran on event-loop')
+
+
+class LeaseTests(HookTestCase):
+    """Tests for sharding areas between hook workers"""
+
+    def owned(self, manager, now):
+        return set(manager.owned_areas(Area.objects.all(), now).values_list('id', flat=True))
+
+    def test_workers_split_areas_without_overlap(self):
+        """Test two workers rebalance to disjoint halves of the area set"""
+        areas = {self.make_area().id for _ in range(10)}
+        now = timezone.now()
+        first = LeaseManager('worker-1', ttl=60)
+        second = LeaseManager('worker-2', ttl=60)
+
+        self.assertEqual(first.acquire(now), 10)
+        self.assertEqual(second.acquire(now), 0)
+        self.assertEqual(first.acquire(now), 5)
+        self.assertEqual(second.acquire(now), 5)
+
+        owned_first, owned_second = self.owned(first, now), self.owned(second, now)
+        self.assertFalse(owned_first & owned_second)
+        self.assertEqual(owned_first | owned_second, areas)
+
+    def test_expired_leases_move_to_live_worker(self):
+        """Test the areas of a dead worker are claimed once its leases expire"""
+        for _ in range(4):
+            self.make_area()
+        now = timezone.now()
+        dead = LeaseManager('worker-dead', ttl=60)
+        alive = LeaseManager('worker-alive', ttl=60)
+        dead.acquire(now)
+        alive.acquire(now)
+        dead.acquire(now)
+        alive.acquire(now)
+
+        later = now + timedelta(seconds=61)
+        self.assertEqual(alive.acquire(later), 4)
+        self.assertFalse(AreaLease.objects.filter(owner='worker-dead').exists())
+
+    def test_engine_only_runs_leased_areas(self):
+        """Test a sharded engine evaluates only the areas it owns"""
+        for _ in range(6):
+            self.make_area()
+        now = timezone.now()
+        other = LeaseManager('worker-other', ttl=60)
+        other.acquire(now)
+        mine = LeaseManager('worker-mine', ttl=60)
+        mine.acquire(now)
+        other.acquire(now)
+
+        report = HookEngine(leases=mine).run_tick(now=now)
+
+        self.assertEqual(len(report.outcomes), 3)
+        self.assertEqual(self.owned(mine, now), {o.area.id for o in report.outcomes})
+
+
+class SchedulerTests(HookTestCase):
+    """Tests for the next-due scheduler"""
+
+    def evaluated(self, engine, scheduler, now):
+        report = engine.run_due(scheduler, now)
+        return {o.area.id for o in report.outcomes} if report else set()
+
+    def test_only_due_areas_are_evaluated(self):
+        """Test areas are evaluated according to their schedule"""
+        polling = self.make_area()
+        hourly_area = self.make_area(action_type='test_never')
+        engine, scheduler = HookEngine(), Scheduler(poll_period=15)
+        now = timezone.now()
+
+        self.assertEqual(self.evaluated(engine, scheduler, now), {polling.id, hourly_area.id})
+        self.assertEqual(self.evaluated(engine, scheduler, now + timedelta(seconds=5)), set())
+        self.assertEqual(self.evaluated(engine, scheduler, now + timedelta(seconds=16)), {polling.id})
+        self.assertEqual(scheduler.earliest(), now + timedelta(seconds=31))
+        self.assertIn(hourly_area.id, self.evaluated(engine, scheduler, now + timedelta(hours=1)))
+
+    def test_new_and_disabled_areas(self):
+        """Test new areas are picked up and disabled ones dropped"""
+        first = self.make_area(action_type='test_never')
+        engine, scheduler = HookEngine(), Scheduler(poll_period=15)
+        now = timezone.now()
+        self.evaluated(engine, scheduler, now)
+
+        second = self.make_area(action_type='test_never')
+        self.assertEqual(self.evaluated(engine, scheduler, now + timedelta(seconds=1)), {second.id})
+
+        Area.objects.filter(id=first.id).update(enabled=False)
+        self.assertEqual(self.evaluated(engine, scheduler, now + timedelta(hours=2)), {second.id})
+        self.assertEqual(len(scheduler), 1)
+
+    def test_failed_areas_are_retried_at_poll_period(self):
+        """Test an error reschedules the area at the polling period"""
+        area = self.make_area(action_type='test_never', reaction_type='unknown')
+        engine, scheduler = HookEngine(), Scheduler(poll_period=15)
+        now = timezone.now()
+        self.evaluated(engine, scheduler, now)
+
+        self.assertEqual(self.evaluated(engine, scheduler, now + timedelta(seconds=15)), {area.id})
+
+
+class TriggerStateTests(HookTestCase):
+    """Tests for the persisted per-area trigger state"""
+
+    def test_tick_records_fired_and_success(self):
+        """Test the engine persists last fired / last success per area"""
+        ok = self.make_area()
+        failing = self.make_area(reaction_type='unknown')
+        idle = self.make_area(action_type='test_never')
+        now = timezone.now()
+
+        HookEngine().run_tick(now=now)
+
+        state = AreaTriggerState.objects.get(area=ok)
+        self.assertEqual(state.last_fired_at, now)
+        self.assertEqual(state.last_success_at, now)
+        self.assertFalse(AreaTriggerState.objects.filter(area__in=[failing, idle]).exists())
+
+    def test_timer_reads_state_without_queries(self):
+        """Test the timer checker uses the prefetched state instead of ExecutionLog"""
+        area = self.make_area(action_type='timer')
+        now = timezone.now()
+        AreaTriggerState.objects.create(area=area, last_success_at=now - timedelta(seconds=30))
+        area = HookEngine().get_areas(now).get(id=area.id)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(check_timer(area, now=now))
+            self.assertTrue(check_timer(area, now=now + timedelta(seconds=31)))
+
+    def test_scheduler_resumes_from_persisted_due_time(self):
+        """Test a restarted scheduler does not re-evaluate areas before they are due"""
+        area = self.make_area(action_type='test_never')
+        now = timezone.now()
+        HookEngine().run_due(Scheduler(poll_period=15), now)
+
+        self.assertEqual(AreaTriggerState.objects.get(area=area).next_due_at, now + timedelta(hours=1))
+        restarted = Scheduler(poll_period=15)
+        self.assertIsNone(HookEngine().run_due(restarted, now + timedelta(minutes=1)))
+        self.assertEqual(restarted.earliest(), now + timedelta(hours=1))
+
+    def test_scheduler_reschedules_edited_areas(self):
+        """Test editing the schedule of a scheduled area moves its due time on the next sync"""
+        area = self.make_area(action_type='cron_schedule')
+        area.config_action['expression'] = '0 0 1 1 *'
+        area.save()
+        now = datetime(2026, 3, 10, 12, 1, tzinfo=dt_timezone.utc)
+        scheduler = Scheduler(poll_period=15)
+        scheduler.sync(now)
+        scheduler.reschedule(area, now)
+        self.assertEqual(scheduler.earliest(), datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+
+        area.config_action['expression'] = '*/5 * * * *'
+        area.save()
+        scheduler.sync(now + timedelta(seconds=30))
+        self.assertEqual(scheduler.earliest(), datetime(2026, 3, 10, 12, 5, tzinfo=dt_timezone.utc))
+
+        # Later syncs still see the save (SYNC_MARGIN) but keep the due time it gave
+        scheduler.sync(now + timedelta(minutes=4))
+        self.assertEqual(scheduler.earliest(), datetime(2026, 3, 10, 12, 5, tzinfo=dt_timezone.utc))
+
+
+class LogBufferTests(HookTestCase):
+    """Tests for buffered execution log writes"""
+
+    def test_repeated_errors_are_coalesced(self):
+        """Test an identical error on consecutive ticks bumps one row"""
+        area = self.make_area(reaction_type='unknown')
+        engine = HookEngine()
+        now = timezone.now()
+
+        for tick in range(3):
+            engine.run_tick(now=now + timedelta(seconds=15 * tick))
+
+        log = ExecutionLog.objects.get(area=area)
+        self.assertEqual(log.repeat_count, 3)
+        self.assertEqual(log.last_executed_at, now + timedelta(seconds=30))
+
+    def test_different_outcome_starts_new_row(self):
+        """Test coalescing only applies to consecutive identical errors"""
+        area = self.make_area(action_type='test_explode')
+        engine = HookEngine()
+        now = timezone.now()
+        engine.run_tick(now=now)
+        Area.objects.filter(id=area.id).update(config_action={'type': 'test_always'})
+        engine.run_tick(now=now + timedelta(seconds=15))
+        Area.objects.filter(id=area.id).update(config_action={'type': 'test_explode'})
+        engine.run_tick(now=now + timedelta(seconds=30))
+
+        statuses = list(ExecutionLog.objects.filter(area=area).order_by('executed_at').values_list('status', 'repeat_count'))
+        self.assertEqual(statuses, [('error', 1), ('success', 1), ('error', 1)])
+
+    def test_logs_are_flushed_in_bulk(self):
+        """Test logs are held until the flush interval and written with one insert"""
+        for _ in range(5):
+            self.make_area()
+        engine = HookEngine(logs=LogBuffer(flush_interval=60))
+        now = timezone.now()
+        engine.run_tick(now=now)
+        self.assertEqual(ExecutionLog.objects.count(), 5)
+
+        engine.run_tick(now=now + timedelta(seconds=15))
+        self.assertEqual(ExecutionLog.objects.count(), 5)
+        self.assertEqual(len(engine.logs), 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            engine.logs.flush()
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(sum('automation_executionlog' in sql for sql in inserts), 1)
+        self.assertEqual(ExecutionLog.objects.count(), 10)
+
+    def test_hourly_stats(self):
+        """Test every outcome, repeats included, is counted in its area's hourly stats"""
+        area = self.make_area(reaction_type='unknown')
+        other = self.make_area()
+        engine = HookEngine()
+        hour = timezone.now().replace(minute=10, second=0, microsecond=0)
+
+        for tick in range(3):
+            engine.run_tick(now=hour + timedelta(minutes=25 * tick))
+
+        stats = {(s.area_id, s.bucket): (s.successes, s.errors) for s in ExecutionStat.objects.all()}
+        self.assertEqual(stats, {
+            (area.id, hour.replace(minute=0)): (0, 2),
+            (area.id, hour.replace(minute=0) + timedelta(hours=1)): (0, 1),
+            (other.id, hour.replace(minute=0)): (2, 0),
+            (other.id, hour.replace(minute=0) + timedelta(hours=1)): (1, 0),
+        })
+        self.assertEqual(set(ExecutionStat.objects.values_list('user_id', flat=True)), {self.user.id})
+
+
+class PollCoalescingTests(HookTestCase):
+    """Tests for per-tick upstream poll coalescing"""
+
+    def make_poll_area(self, resource):
+        area = self.make_area(action_type='test_shared_poll')
+        area.config_action['resource'] = resource
+        area.save()
+        return area
+
+    def test_identical_keys_fetch_once_per_tick(self):
+        """Test concurrent checkers with the same key share one fetch"""
+        for _ in range(6):
+            self.make_poll_area('repo-a')
+        for _ in range(2):
+            self.make_poll_area('repo-b')
+
+        report = HookEngine(workers=4).run_tick()
+
+        self.assertEqual(sorted(polled), ['repo-a', 'repo-b'])
+        self.assertEqual(report.triggered, 8)
+        self.assertEqual(sorted(context for _, context in executed), ['repo-a'] * 6 + ['repo-b'] * 2)
+        self.assertIn('2 upstream polls shared by 8 checks', str(report))
+
+        HookEngine().run_tick()
+        self.assertEqual(len(polled), 4)
+
+    def test_async_checkers_share_one_poll(self):
+        """Test --engine async awaits the GitHub checkers, which share one poll per repository and token"""
+        broker.invalidate()
+        self.addCleanup(broker.invalidate)
+        OAuthAccount.objects.create(user=self.user, provider='github', external_user_id='gh', access_token='gh-token')
+        github = Service.objects.create(name='github', display_name='GitHub')
+        action = Action.objects.create(service=github, name='new_commit')
+        for _ in range(4):
+            area = self.make_area(action_type='new_commit', reaction_type='test_record')
+            area.action = action
+            area.config_action['repository'] = 'owner/repo'
+            area.save()
+        calls = []
+
+        async def fake_get(url, params=None, headers=None):
+            calls.append((url, headers['Authorization']))
+            await asyncio.sleep(0.01)
+            commit = {'sha': 'abc', 'commit': {'message': 'fix', 'author': {'name': 'octocat'}}}
+            return FakeResponse(200, json.dumps([commit]))
+
+        with mock.patch.object(coalesce.aio, 'get', fake_get):
+            report = AsyncHookEngine(workers=1).run_tick()
+
+        self.assertEqual(calls, [('https://api.github.com/repos/owner/repo/commits', 'Bearer gh-token')])
+        self.assertEqual(report.triggered, 4)
+        self.assertEqual({context['commit_sha'] for _, context in executed}, {'abc'})
+
+    def test_overlapping_ticks_are_isolated(self):
+        """Test a tick started in another thread neither shares nor replaces this one"""
+        inside, fetched_other, done = threading.Event(), threading.Event(), threading.Event()
+        fetched = []
+
+        def other_tick():
+            inside.wait(5)
+            with coalesce.tick():
+                fetch_once('key', lambda: fetched.append('other'))
+                fetched_other.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=other_tick)
+        thread.start()
+        with coalesce.tick() as polls:
+            inside.set()
+            fetched_other.wait(5)
+            fetch_once('key', lambda: fetched.append('this'))
+            fetch_once('key', lambda: fetched.append('this'))
+        done.set()
+        thread.join()
+
+        self.assertEqual(fetched, ['other', 'this'])
+        self.assertEqual((polls.fetched, polls.shared), (1, 1))
+
+    def test_fetch_outside_tick_is_not_cached(self):
+        """Test fetch_once calls through when no tick is running"""
+        calls = []
+        fetch_once('key', lambda: calls.append(1))
+        fetch_once('key', lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+
+class CursorTests(HookTestCase):
+    """Tests for durable checker cursors"""
+
+    def make_cursor_area(self, latest, reaction_type='test_async_slow'):
+        area = self.make_area(action_type='test_cursor', reaction_type=reaction_type)
+        return self.set_latest(area, latest)
+
+    def set_latest(self, area, latest):
+        Area.objects.filter(id=area.id).update(config_action={'type': 'test_cursor', 'latest': latest})
+        return area
+
+    def cursor(self, area):
+        return AreaTriggerState.objects.get(area=area).cursor
+
+    def test_seed_and_advance_cursor(self):
+        """Test a cursor is seeded without firing and advanced after the reaction"""
+        area = self.make_cursor_area(1)
+        engine = HookEngine()
+
+        engine.run_tick()
+        self.assertEqual(self.cursor(area), {'seen': 1})
+        self.assertFalse(ExecutionLog.objects.exists())
+
+        self.set_latest(area, 2)
+        engine.run_tick()
+        self.assertEqual(self.cursor(area), {'seen': 2})
+        self.assertEqual(ExecutionLog.objects.get(area=area).status, 'success')
+
+        # A fresh engine (restart) does not fire again on the same event
+        HookEngine().run_tick()
+        self.assertEqual(ExecutionLog.objects.filter(area=area).count(), 1)
+
+    def test_cursor_not_committed_when_reaction_fails(self):
+        """Test a failed reaction leaves the cursor so the event is retried"""
+        area = self.make_cursor_area(1, reaction_type='test_broken')
+        engine = HookEngine()
+        engine.run_tick()
+
+        self.set_latest(area, 2)
+        engine.run_tick()
+        engine.run_tick()
+
+        self.assertEqual(self.cursor(area), {'seen': 1})
+        self.assertEqual(ExecutionLog.objects.get(area=area).repeat_count, 2)
+
+
+class CronTests(HookTestCase):
+    """Tests for cron expressions and the cron_schedule action"""
+
+    def at(self, *args):
+        return datetime(*args, tzinfo=dt_timezone.utc)
+
+    def next_fire(self, expression, after, tz_name=None):
+        return compile_cron(expression, tz_name).next_fire_after(after)
+
+    def test_fields_ranges_and_names(self):
+        """Test steps, ranges and names resolve to the next matching minute"""
+        monday = self.at(2026, 3, 2, 8, 59, 30)
+        self.assertEqual(self.next_fire('*/15 9-17 * * mon-fri', monday), self.at(2026, 3, 2, 9, 0))
+        self.assertEqual(self.next_fire('0 9 * * sat,sun', monday), self.at(2026, 3, 7, 9, 0))
+        self.assertEqual(self.next_fire('30 2 1 jan,jul *', monday), self.at(2026, 7, 1, 2, 30))
+        self.assertEqual(self.next_fire('@hourly', monday), self.at(2026, 3, 2, 9, 0))
+
+    def test_special_days(self):
+        """Test L, W, LW, nL and n#k day rules"""
+        start = self.at(2026, 2, 1, 0, 0)
+        self.assertEqual(self.next_fire('0 0 L * *', start), self.at(2026, 2, 28, 0, 0))
+        # 2026-02-14 is a Saturday: nearest weekday is Friday 13th
+        self.assertEqual(self.next_fire('0 0 14W * *', start), self.at(2026, 2, 13, 0, 0))
+        # 2026-05-31 is a Sunday: last weekday is Friday 29th
+        self.assertEqual(self.next_fire('0 0 LW * *', self.at(2026, 5, 1)), self.at(2026, 5, 29, 0, 0))
+        self.assertEqual(self.next_fire('0 0 * * 5L', start), self.at(2026, 2, 27, 0, 0))
+        self.assertEqual(self.next_fire('0 0 * * mon#2', start), self.at(2026, 2, 9, 0, 0))
+
+    def test_timezone(self):
+        """Test expressions are evaluated in the configured timezone, across DST"""
+        # Paris is UTC+1 in winter and UTC+2 after 2026-03-29
+        self.assertEqual(self.next_fire('0 9 * * *', self.at(2026, 3, 1), 'Europe/Paris'), self.at(2026, 3, 1, 8, 0))
+        self.assertEqual(self.next_fire('0 9 * * *', self.at(2026, 3, 30), 'Europe/Paris'), self.at(2026, 3, 30, 7, 0))
+
+    def test_invalid_expressions(self):
+        """Test malformed expressions and timezones are rejected"""
+        for expression in ('* * *', '61 * * * *', '*/0 * * * *', '5-1 * * * *', '0 0 30 2 *'):
+            with self.assertRaises(CronError):
+                compile_cron(expression).next_fire_after(self.at(2026, 1, 1))
+        with self.assertRaises(CronError):
+            compile_cron('* * * * *', 'Mars/Olympus')
+
+    def test_checker_catches_up_missed_fire(self):
+        """Test a fire is not lost when the evaluation runs after the minute"""
+        area = self.make_area(action_type='cron_schedule')
+        area.config_action['expression'] = '0 * * * *'
+        area.save()
+        AreaTriggerState.objects.create(area=area, last_success_at=self.at(2026, 3, 2, 9, 0, 1))
+        area = Area.objects.select_related('trigger_state').get(id=area.id)
+
+        self.assertFalse(check_cron(area, now=self.at(2026, 3, 2, 9, 59, 59)))
+        self.assertTrue(check_cron(area, now=self.at(2026, 3, 2, 10, 0, 45)))
+        self.assertTrue(check_cron(area, now=self.at(2026, 3, 2, 10, 3)))
+        self.assertEqual(next_cron_check(area, self.at(2026, 3, 2, 9, 10)), self.at(2026, 3, 2, 10, 0))
+
+
+class CircuitBreakerTests(HookTestCase):
+    """Tests for per-service circuit breakers and bulkheads"""
+
+    def setUp(self):
+        super().setUp()
+        flaky = Service.objects.create(name='flaky', display_name='Flaky')
+        self.flaky_action = Action.objects.create(service=flaky, name='test_upstream_down')
+        self.flaky_reaction = Reaction.objects.create(service=flaky, name='test_slow')
+
+    def make_flaky_area(self, action_type='test_upstream_down'):
+        return Area.objects.create(
+            user=self.user, action=self.flaky_action, reaction=self.flaky_reaction,
+            config_action={'type': action_type}, config_reaction={'type': 'test_slow'},
+        )
+
+    def test_open_circuit_skips_service(self):
+        """Test a failing upstream opens its circuit and only its areas are skipped"""
+        flaky = [self.make_flaky_area() for _ in range(4)]
+        healthy = self.make_area()
+        engine = HookEngine(breaker=CircuitBreaker(threshold=2, cooldown=60))
+
+        with self.assertLogs('automation.circuit', 'WARNING') as logs:
+            report = engine.run_tick()
+
+        self.assertEqual(len(polled), 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(report.skipped, {'flaky': 2})
+        self.assertIn('2 skipped by open circuits (flaky: 2)', str(report))
+        self.assertEqual(report.triggered, 1)
+        self.assertEqual(ExecutionLog.objects.filter(area__in=flaky).count(), 0)
+        self.assertTrue(ExecutionLog.objects.filter(area=healthy, status='success').exists())
+
+    def test_half_open_probe(self):
+        """Test one probe is let through after the cooldown and its result closes or reopens the circuit"""
+        breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+        with self.assertLogs('automation.circuit', 'INFO') as logs:
+            with breaker.guard('flaky'):
+                upstream_failed()
+            self.assertEqual(breaker.state('flaky'), 'open')
+
+            time.sleep(0.06)
+            with breaker.guard('flaky'):
+                upstream_failed()
+            self.assertEqual(breaker.state('flaky'), 'open')
+            self.assertEqual(breaker._circuits['flaky'].cooldown, 0.1)
+
+            time.sleep(0.11)
+            with breaker.guard('flaky'):
+                pass
+        self.assertEqual(breaker.state('flaky'), 'closed')
+        self.assertIn('closed', logs.output[-1])
+
+    def test_bulkhead_caps_service_in_flight(self):
+        """Test at most per_service areas of one service run at once on the pool"""
+        in_flight.update(now=0, max=0)
+        for _ in range(4):
+            self.make_flaky_area('test_in_flight')
+        others = [self.make_area() for _ in range(4)]
+
+        report = HookEngine(workers=4, per_service=2).run_tick()
+
+        self.assertEqual(len(report.outcomes), 8)
+        self.assertEqual(in_flight["max"], 2)
+        self.assertEqual(report.triggered, 4)
+        self.assertEqual({area_id for area_id, _ in executed}, {a.id for a in others})
+
+
+    def test_bulkhead_spares_local_services(self):
+        """Test there is no bulkhead by default, and none on services making no upstream calls"""
+        in_flight.update(now=0, max=0)
+        for _ in range(4):
+            self.make_area('test_in_flight')
+
+        self.assertIsNone(HookEngine(workers=4).per_service)
+        HookEngine(workers=4, per_service=1).run_tick()
+
+        self.assertGreater(in_flight["max"], 1)
+
+
+class MessageBatchTests(HookTestCase):
+    """Tests for batched outbound messages"""
+
+    def make_chat_area(self, channel, text):
+        area = self.make_area(reaction_type='test_chat')
+        Area.objects.filter(id=area.id).update(config_reaction={'type': 'test_chat', 'channel': channel, 'text': text})
+        return area
+
+    def setUp(self):
+        super().setUp()
+        chat_sent.clear()
+
+    def test_messages_to_a_channel_are_merged(self):
+        """Test messages of a tick are merged per channel within the length limit"""
+        areas = [self.make_chat_area('a', f'msg {i}') for i in range(3)]
+        other = self.make_chat_area('b', 'hello')
+
+        report = HookEngine(workers=2).run_tick()
+
+        self.assertEqual(len(chat_sent), 3)
+        self.assertIn('hello', chat_sent)
+        self.assertEqual(sum(text.count('\n') for text in chat_sent), 1)
+        self.assertEqual(report.triggered, 4)
+        self.assertEqual(ExecutionLog.objects.get(area=other).message, 'Chat message sent')
+        merged = ExecutionLog.objects.filter(area__in=areas, message='Chat message sent (2 messages merged)')
+        self.assertEqual(merged.count(), 2)
+
+    def test_failed_delivery_is_reported_on_each_area(self):
+        """Test a rejected message is logged as an error on every area it carried"""
+        areas = [self.make_chat_area('a', 'fail'), self.make_chat_area('a', 'x')]
+
+        HookEngine().run_tick()
+
+        self.assertEqual(chat_sent, ['fail\nx'])
+        for area in areas:
+            log = ExecutionLog.objects.get(area=area)
+            self.assertEqual((log.status, log.message), ('error', 'Failed to send Chat message: Bad Request: chat not found'))
+
+    def test_overlapping_batches_are_isolated(self):
+        """Test batches of concurrent threads (webhook requests) never leak into each other"""
+        destination = Destination(("test", "a"), "Chat", send_to_chat, max_length=12, min_interval=0)
+        entered, first_done = threading.Event(), threading.Event()
+        deliveries = {}
+
+        def first():
+            with messages.batch():
+                deliveries['first'] = send(destination, 'one')
+                entered.set()
+                self.assertTrue(first_done.wait(5))
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        self.assertTrue(entered.wait(5))
+        with messages.batch():
+            deliveries['second'] = send(destination, 'two')
+            first_done.set()
+            thread.join()
+        # Outside of any batch: sent right away, not into the (flushed) batch of the other thread
+        deliveries['after'] = send(destination, 'three')
+
+        self.assertEqual(sorted(chat_sent), ['one', 'three', 'two'])
+        self.assertEqual({name: d.result(timeout=1)[0] for name, d in deliveries.items()},
+                         {'first': 'success', 'second': 'success', 'after': 'success'})
+
+    def test_unsent_message_result_times_out(self):
+        """Test waiting for a message that is never sent ends in an error"""
+        self.assertEqual(messages.Delivery().result(timeout=0.01), ('error', 'Message not sent after 0.01s', None))
+
+    def test_same_reaction_type_per_service(self):
+        """Test Discord and Telegram send_message reactions both resolve"""
+        import automation.hooks.reactions.discord_send_message as discord
+        import automation.hooks.reactions.telegram_send_message as telegram
+        engine = HookEngine()
+        for module, name in ((discord, 'discord'), (telegram, 'telegram')):
+            service = Service.objects.create(name=name)
+            area = Area(user=self.user, action=self.action, reaction=Reaction(service=service, name='send_message'),
+                        config_action={'type': 'test_always'}, config_reaction={'type': 'send_message'})
+            self.assertIs(engine.resolve(area)[1], module.executor)
+
+
+class OutboxTests(HookTestCase):
+    """Tests for the trigger outbox and the reaction workers"""
+
+    def test_checkers_queue_and_workers_react(self):
+        """Test outbox ticks queue triggers that run_reactions then runs"""
+        areas = [self.make_area() for _ in range(3)]
+        report = HookEngine(outbox=True).run_tick()
+
+        self.assertEqual(report.queued, 3)
+        self.assertEqual(executed, [])
+        self.assertEqual(queue_stats().depth, 3)
+        self.assertTrue(all(s.last_success_at for s in AreaTriggerState.objects.filter(area__in=areas)))
+
+        batch = ReactionWorker(workers=2).run_batch()
+
+        self.assertEqual((batch.claimed, batch.succeeded), (3, 3))
+        self.assertEqual({area_id for area_id, _ in executed}, {a.id for a in areas})
+        self.assertEqual(ExecutionLog.objects.filter(status='success').count(), 3)
+        self.assertEqual(queue_stats().depth, 0)
+
+    def test_worker_keeps_one_thread_pool(self):
+        """Test batches share the worker's thread pool until it is closed"""
+        for _ in range(3):
+            self.make_area()
+        worker = ReactionWorker(workers=2)
+        self.addCleanup(worker.close)
+        pools = []
+        for _ in range(2):
+            HookEngine(outbox=True).run_tick()
+            self.assertEqual(worker.run_batch().succeeded, 3)
+            pools.append(worker.pool())
+
+        self.assertIs(pools[0], pools[1])
+        worker.close()
+        self.assertFalse(any(thread.is_alive() for thread in pools[0]._threads))
+
+    def test_failed_reactions_are_retried_then_dropped(self):
+        """Test a failing reaction is retried with backoff up to MAX_ATTEMPTS"""
+        area = self.make_area(reaction_type='test_broken')
+        HookEngine(outbox=True).run_tick()
+        worker = ReactionWorker(workers=1)
+
+        now = timezone.now()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            batch = worker.run_batch(now)
+            self.assertEqual(batch.failed, 1)
+            if attempt < MAX_ATTEMPTS:
+                event = TriggerEvent.objects.get(area=area)
+                self.assertEqual(event.attempts, attempt)
+                self.assertEqual(worker.run_batch(now).claimed, 0)
+                now = event.available_at
+
+        self.assertFalse(TriggerEvent.objects.exists())
+        self.assertEqual(ExecutionLog.objects.get(area=area).repeat_count, MAX_ATTEMPTS)
+
+    def test_claimed_events_are_not_shared(self):
+        """Test an event claimed by a worker is not handed to another one"""
+        area = self.make_area()
+        disabled = self.make_area()
+        HookEngine(outbox=True).run_tick()
+        Area.objects.filter(id=disabled.id).update(enabled=False)
+
+        now = timezone.now()
+        first = ReactionWorker(worker_id='a').claim(now)
+        second = ReactionWorker(worker_id='b').claim(now)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(second, [])
+
+        TriggerEvent.objects.update(available_at=now)
+        batch = ReactionWorker().run_batch(now)
+        self.assertEqual((batch.succeeded, batch.dropped), (1, 1))
+        self.assertEqual([area_id for area_id, _ in executed], [area.id])
+
+
+class CredentialBrokerTests(TransactionTestCase):
+    """Committed rows: the single-flight test reads them from other threads"""
+
+    def setUp(self):
+        broker.invalidate()
+        self.user = User.objects.create_user(email='tokens@example.com', password='Test1234!')
+        self.refreshes = []
+        self.spotify = Service.objects.create(name='spotify', display_name='Spotify')
+        self.user_service = UserService.objects.create(user=self.user, service=self.spotify)
+
+    def tearDown(self):
+        broker.invalidate()
+
+    def link(self, access, expires_in):
+        self.user_service.set_tokens(access, 'refresh-1')
+        self.user_service.expires_at = timezone.now() + timedelta(seconds=expires_in)
+        self.user_service.save()
+
+    def fake_refresh(self, refresh_token):
+        self.refreshes.append(refresh_token)
+        time.sleep(0.1)
+        return {'access_token': f'fresh-{len(self.refreshes)}', 'expires_in': 3600}
+
+    def test_token_is_cached(self):
+        """The decrypted token is served from memory until the cache TTL"""
+        self.link('tok-1', 3600)
+        self.assertEqual(broker.access_token(self.user.id, 'spotify'), 'tok-1')
+        with self.assertNumQueries(0):
+            self.assertEqual(broker.access_token(self.user.id, 'spotify'), 'tok-1')
+        self.assertEqual(broker.access_token(self.user.id, 'github'), '')
+
+    def test_expiring_token_is_refreshed_once(self):
+        """Concurrent callers share a single refresh of an expiring token"""
+        self.link('old', 60)
+        tokens = []
+        with mock.patch.dict(REFRESHERS, {'spotify': self.fake_refresh}):
+            threads = [threading.Thread(target=lambda: tokens.append(broker.access_token(self.user.id, 'spotify'))) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(tokens, ['fresh-1'] * 4)
+        self.assertEqual(self.refreshes, ['refresh-1'])
+        self.user_service.refresh_from_db()
+        self.assertEqual(self.user_service.get_access_token(), 'fresh-1')
+        self.assertEqual(self.user_service.get_refresh_token(), 'refresh-1')
+
+    def test_background_refresh(self):
+        """refresh_expiring renews the tokens expiring soon and leaves the others"""
+        self.link('old', 600)
+        other = User.objects.create_user(email='other@example.com', password='Test1234!')
+        fresh = UserService.objects.create(user=other, service=self.spotify, expires_at=timezone.now() + timedelta(hours=1))
+        fresh.set_tokens('valid', 'refresh-2')
+        fresh.save()
+
+        with mock.patch.dict(REFRESHERS, {'spotify': self.fake_refresh}):
+            self.assertEqual(broker.refresh_expiring(), 1)
+            self.assertEqual(broker.access_token(self.user.id, 'spotify'), 'fresh-1')
+            self.assertEqual(broker.access_token(other.id, 'spotify'), 'valid')
+        self.assertEqual(self.refreshes, ['refresh-1'])
+
+    def test_prefetch(self):
+        """prefetch loads the credentials of all areas in two queries, handlers then query nothing"""
+        gmail = Service.objects.create(name='gmail', display_name='Gmail')
+        action = Action.objects.create(service=gmail, name='new_email')
+        reaction = Reaction.objects.create(service=self.spotify, name='add_to_playlist')
+        self.link('spotify-1', 3600)
+        users = [self.user] + [User.objects.create_user(email=f'u{i}@example.com', password='Test1234!') for i in range(3)]
+        for i, user in enumerate(users[:3]):
+            OAuthAccount.objects.create(user=user, provider='google', external_user_id=str(i), access_token=f'google-{i}')
+        for user in users:
+            Area.objects.create(user=user, action=action, reaction=reaction)
+        areas = list(Area.objects.select_related('action__service', 'reaction__service'))
+
+        with self.assertNumQueries(2):
+            broker.prefetch(areas)
+        with self.assertNumQueries(0):
+            tokens = [(broker.access_token(u.id, 'google'), broker.access_token(u.id, 'spotify')) for u in users]
+            self.assertEqual(broker.prefetch(areas), 0)
+        self.assertEqual(tokens, [('google-0', 'spotify-1'), ('google-1', ''), ('google-2', ''), ('', '')])
+
+    def test_failed_refresh_keeps_token(self):
+        """A failing refresh hands out the current token"""
+        self.link('old', 60)
+
+        def failing(refresh_token):
+            raise RefreshError('invalid_grant')
+
+        with mock.patch.dict(REFRESHERS, {'spotify': failing}):
+            self.assertEqual(broker.access_token(self.user.id, 'spotify'), 'old')
+
+    def test_failed_refresh_backs_off(self):
+        """A token whose refresh fails is not refreshed again before its backoff delay"""
+        self.link('old', -60)
+        attempts = []
+
+        def failing(refresh_token):
+            attempts.append(refresh_token)
+            raise RefreshError('400 {"error": "invalid_grant"}')
+
+        with mock.patch.dict(REFRESHERS, {'spotify': failing}):
+            for _ in range(3):
+                broker.refresh_expiring()
+            self.assertEqual(broker.access_token(self.user.id, 'spotify'), 'old')
+            with self.assertNumQueries(0):
+                self.assertEqual(broker.access_token(self.user.id, 'spotify'), 'old')
+            self.assertEqual(attempts, ['refresh-1'])
+            self.assertGreater(broker._failures[(self.user.id, 'spotify')][1], time.monotonic() + 3600)
+
+            # Relinking the account allows a new attempt right away
+            self.user_service.set_tokens('old', 'refresh-2')
+            self.user_service.save()
+            broker.invalidate(self.user.id, 'spotify')
+            broker.refresh_expiring()
+        self.assertEqual(attempts, ['refresh-1', 'refresh-2'])
+
+
+class MultipleTriggerTests(HookTestCase):
+    def test_reaction_runs_once_per_event(self):
+        """Events added with add_trigger each run the reaction with their own context"""
+        area = self.make_area('test_many', 'test_record')
+        area.config_action['items'] = ['a', 'b', 'c']
+        area.save()
+
+        report = HookEngine().run_tick()
+
+        self.assertEqual(report.triggered, 1)
+        self.assertEqual(executed, [(area.id, {'item': item}) for item in 'abc'])
+        self.assertEqual(ExecutionLog.objects.get(area=area).message, '3 events: recorded; recorded; recorded')
+
+    def test_outbox_queues_one_event_per_trigger(self):
+        """In outbox mode each added event becomes its own TriggerEvent"""
+        area = self.make_area('test_many', 'test_record')
+        area.config_action['items'] = ['a', 'b']
+        area.save()
+
+        self.assertEqual(HookEngine(outbox=True).run_tick().queued, 2)
+        self.assertEqual(sorted(e.context['item'] for e in TriggerEvent.objects.filter(area=area)), ['a', 'b'])
+
+
+GMAIL_BATCH = (
+    "--batch_x\r\nContent-Type: application/http\r\nContent-ID: <response-m1>\r\n\r\n"
+    "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n"
+    '{"id": "m1", "snippet": "hello", "payload": {"headers": [{"name": "Subject", "value": "Hi"}, {"name": "From", "value": "a@example.com"}]}}\r\n'
+    "--batch_x\r\nContent-Type: application/http\r\nContent-ID: <response-m2>\r\n\r\n"
+    "HTTP/1.1 404 Not Found\r\nContent-Type: application/json\r\n\r\n"
+    '{"error": {"code": 404}}\r\n'
+    "--batch_x\r\nContent-Type: application/http\r\nContent-ID: <response-m3>\r\n\r\n"
+    "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n"
+    '{"id": "m3", "snippet": "again", "payload": {"headers": [{"name": "Subject", "value": "Re: Hi"}]}}\r\n'
+    "--batch_x--\r\n"
+)
+
+
+class GmailNewEmailTests(HookTestCase):
+    def setUp(self):
+        super().setUp()
+        broker.invalidate()
+        OAuthAccount.objects.create(user=self.user, provider='google', external_user_id='g', access_token='google-token')
+        self.calls = []
+
+    def tearDown(self):
+        broker.invalidate()
+
+    def fake_get_json(self, url, owner=None, params=None, headers=None):
+        self.calls.append(url.rsplit('/', 1)[-1])
+        if url.endswith('/profile'):
+            return 200, {'historyId': '100'}
+        self.assertEqual(params['startHistoryId'], '100')
+        return 200, {'historyId': '130', 'history': [
+            {'id': '110', 'messagesAdded': [{'message': {'id': 'm1', 'labelIds': ['INBOX']}}]},
+            {'id': '120', 'messagesAdded': [
+                {'message': {'id': 'm2', 'labelIds': ['INBOX']}},
+                {'message': {'id': 'sent', 'labelIds': ['SENT']}},
+            ]},
+            {'id': '125', 'messagesAdded': [{'message': {'id': 'm3', 'labelIds': ['INBOX', 'UNREAD']}}]},
+        ]}
+
+    def fake_post(self, url, headers=None, data=None):
+        self.calls.append('batch')
+        self.assertEqual(data.count('GET /gmail/v1/users/me/messages/'), 3)
+        return FakeResponse(200, GMAIL_BATCH, {'Content-Type': 'multipart/mixed; boundary=batch_x'})
+
+    def test_new_emails_from_history(self):
+        """The first poll stores the historyId, the next one fires once per new inbox email"""
+        area = self.make_area('new_email', 'test_record')
+
+        with mock.patch.object(gmail_new_email, 'get_json', self.fake_get_json), \
+                mock.patch.object(gmail_new_email.http, 'post', self.fake_post):
+            HookEngine().run_tick()
+            self.assertEqual(executed, [])
+            HookEngine().run_tick()
+
+        self.assertEqual(self.calls, ['profile', 'history', 'batch'])
+        self.assertEqual([context['email_id'] for _, context in executed], ['m1', 'm3'])
+        self.assertEqual(executed[0][1]['email_subject'], 'Hi')
+        self.assertEqual(executed[1][1]['email_from'], 'Unknown')
+        self.assertEqual(AreaTriggerState.objects.get(area=area).cursor['history_id'], '130')
+
+    def test_large_history_record_is_fetched_in_batches(self):
+        """A history record adding more than 100 emails is fetched in batches of at most 100 calls"""
+        area = self.make_area('new_email', 'test_record')
+        AreaTriggerState.objects.create(area=area, cursor={'history_id': '100'})
+        ids = [f'm{i}' for i in range(150)]
+        batches = []
+
+        def fake_get_json(url, owner=None, params=None, headers=None):
+            return 200, {'historyId': '200', 'history': [
+                {'id': '150', 'messagesAdded': [{'message': {'id': msg_id, 'labelIds': ['INBOX']}} for msg_id in ids]},
+            ]}
+
+        def fake_post(url, headers=None, data=None):
+            requested = re.findall(r'messages/(\w+)\?', data)
+            batches.append(len(requested))
+            body = ''.join(
+                f'--batch_x\r\nContent-Type: application/http\r\nContent-ID: <response-{msg_id}>\r\n\r\n'
+                f'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{{"id": "{msg_id}", "snippet": ""}}\r\n'
+                for msg_id in requested
+            ) + '--batch_x--\r\n'
+            return FakeResponse(200, body, {'Content-Type': 'multipart/mixed; boundary=batch_x'})
+
+        with mock.patch.object(gmail_new_email, 'get_json', fake_get_json), \
+                mock.patch.object(gmail_new_email.http, 'post', fake_post):
+            HookEngine().run_tick()
+
+        self.assertEqual(batches, [100, 50])
+        self.assertEqual([context['email_id'] for _, context in executed], ids)
+        # Past MAX_EMAILS: the next poll resumes after the record
+        self.assertEqual(AreaTriggerState.objects.get(area=area).cursor['history_id'], '150')
+
+    def test_failed_batch_parts_keep_the_cursor(self):
+        """A part failing with anything but 404 fires nothing and keeps the historyId for the next poll"""
+        area = self.make_area('new_email', 'test_record')
+        throttled = GMAIL_BATCH.replace('HTTP/1.1 404 Not Found', 'HTTP/1.1 429 Too Many Requests')
+        batches = [throttled, GMAIL_BATCH]
+
+        def fake_post(url, headers=None, data=None):
+            return FakeResponse(200, batches.pop(0), {'Content-Type': 'multipart/mixed; boundary=batch_x'})
+
+        with mock.patch.object(gmail_new_email, 'get_json', self.fake_get_json), \
+                mock.patch.object(gmail_new_email.http, 'post', fake_post):
+            HookEngine().run_tick()
+            HookEngine().run_tick()
+            self.assertEqual(executed, [])
+            self.assertEqual(AreaTriggerState.objects.get(area=area).cursor['history_id'], '100')
+            HookEngine().run_tick()
+
+        self.assertEqual([context['email_id'] for _, context in executed], ['m1', 'm3'])
+        self.assertEqual(AreaTriggerState.objects.get(area=area).cursor['history_id'], '130')
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET='gh-secret', TELEGRAM_WEBHOOK_SECRET='tg-secret')
+class WebhookTests(HookTestCase):
+    """Tests for inbound webhook triggers"""
+
+    def setUp(self):
+        super().setUp()
+        broker.invalidate()
+        webhooks._repo_access.clear()
+        webhooks._sources['loaded_at'] = None
+        OAuthAccount.objects.create(user=self.user, provider='github', external_user_id='gh', access_token='gh-token')
+        self.readable = {'gh-token': {'owner/repo', 'owner/other'}}
+        self.access_checks = []
+        patcher = mock.patch.object(webhooks.http, 'get', self.fake_get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        broker.invalidate()
+        webhooks._repo_access.clear()
+
+    def fake_get(self, url, headers=None):
+        token = headers['Authorization'].split()[-1]
+        repository = url.split('/repos/', 1)[1]
+        self.access_checks.append((token, repository))
+        return FakeResponse(200 if repository in self.readable.get(token, ()) else 404)
+
+    def make_push_area(self, **config):
+        area = self.make_area(reaction_type='test_record')
+        area.config_action.update(config)
+        area.save()
+        return area
+
+    def post_github(self, event, payload, secret='gh-secret'):
+        body = json.dumps(payload).encode()
+        signature = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            '/webhooks/github/', body, content_type='application/json',
+            HTTP_X_GITHUB_EVENT=event, HTTP_X_HUB_SIGNATURE_256=signature,
+        )
+
+    def test_github_push_runs_matching_areas(self):
+        """Test a signed push runs the reactions of the repository's new_commit areas"""
+        area = self.make_push_area(type='new_commit', repository='Owner/Repo')
+        self.make_push_area(type='new_issue', repository='owner/repo')
+        self.make_push_area(type='new_commit', repository='owner/other')
+        payload = {
+            'ref': 'refs/heads/main',
+            'repository': {'full_name': 'owner/repo', 'default_branch': 'main'},
+            'head_commit': {'id': 'abc123', 'message': 'Fix', 'author': {'name': 'Ada'}},
+        }
+
+        response = self.post_github('push', payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['triggered'], 1)
+        self.assertEqual(executed, [(area.id, {'commit_sha': 'abc123', 'commit_message': 'Fix',
+                                               'author_name': 'Ada', 'repository': 'owner/repo'})])
+        self.assertEqual(AreaTriggerState.objects.get(area=area).cursor, {'last_commit': 'abc123'})
+        self.assertEqual(ExecutionLog.objects.get(area=area).status, 'success')
+
+    def test_github_push_skips_other_branches(self):
+        """Test pushes to other branches and tags do not fire new_commit nor move its cursor"""
+        area = self.make_push_area(type='new_commit', repository='owner/repo')
+        for ref in ('refs/heads/feature', 'refs/tags/v1.0'):
+            response = self.post_github('push', {
+                'ref': ref,
+                'repository': {'full_name': 'owner/repo', 'default_branch': 'main'},
+                'head_commit': {'id': 'abc123', 'message': 'Fix', 'author': {'name': 'Ada'}},
+            })
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(executed, [])
+        self.assertFalse(AreaTriggerState.objects.filter(area=area, cursor__has_key='last_commit').exists())
+
+    def test_github_push_needs_repository_access(self):
+        """Test a delivery only reaches areas whose owner's GitHub account can read the repository"""
+        area = self.make_push_area(type='new_issue', repository='owner/repo')
+        intruder = User.objects.create_user(email='intruder@example.com', password='Test1234!')
+        OAuthAccount.objects.create(user=intruder, provider='github', external_user_id='in', access_token='in-token')
+        spying = Area.objects.create(
+            user=intruder, action=self.action, reaction=self.reaction,
+            config_action={'type': 'new_issue', 'repository': 'owner/repo'}, config_reaction={'type': 'test_record'},
+        )
+        Area.objects.create(
+            user=User.objects.create_user(email='unlinked@example.com', password='Test1234!'),
+            action=self.action, reaction=self.reaction,
+            config_action={'type': 'new_issue', 'repository': 'owner/repo'}, config_reaction={'type': 'test_record'},
+        )
+        payload = {
+            'action': 'opened', 'repository': {'full_name': 'owner/repo'},
+            'issue': {'id': 1, 'number': 1, 'title': 'Secret', 'user': {'login': 'ada'}},
+        }
+
+        self.post_github('issues', payload)
+        self.post_github('issues', {**payload, 'issue': {**payload['issue'], 'id': 2}})
+
+        self.assertEqual([area_id for area_id, _ in executed], [area.id, area.id])
+        # Checked once per user and repository, then cached
+        self.assertEqual(sorted(self.access_checks), [('gh-token', 'owner/repo'), ('in-token', 'owner/repo')])
+        scheduler, now = Scheduler(poll_period=15), timezone.now()
+        self.assertEqual(scheduler.next_due_at(area, now), now + timedelta(hours=1))
+        self.assertEqual(scheduler.next_due_at(spying, now), now + timedelta(seconds=15))
+
+    def test_github_rejects_bad_signature(self):
+        """Test deliveries with a wrong signature are refused"""
+        self.make_push_area(type='new_commit', repository='owner/repo')
+        response = self.post_github('push', {'repository': {'full_name': 'owner/repo'}}, secret='wrong')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(executed, [])
+
+    def test_webhook_backed_areas_leave_poll_set(self):
+        """Test areas of a repository delivering webhooks are only polled as a safety net"""
+        pushed = self.make_push_area(type='new_commit', repository='owner/repo')
+        polled = self.make_push_area(type='new_commit', repository='owner/other')
+        scheduler, now = Scheduler(poll_period=15), timezone.now()
+
+        self.post_github('ping', {'repository': {'full_name': 'owner/repo'}})
+        # Polled as usual until the owner's access to the repository is checked
+        self.assertEqual(scheduler.next_due_at(pushed, now), now + timedelta(seconds=15))
+        webhooks.has_repo_access(self.user.id, 'owner/repo')
+
+        self.assertEqual(scheduler.next_due_at(pushed, now), now + timedelta(hours=1))
+        self.assertEqual(scheduler.next_due_at(polled, now), now + timedelta(seconds=15))
+
+    def test_repository_access_is_shared_with_the_scheduler(self):
+        """Test run_hooks sees the access checked by the web process that received the delivery"""
+        pushed = self.make_push_area(type='new_commit', repository='owner/repo')
+        self.post_github('push', {
+            'ref': 'refs/heads/main',
+            'repository': {'full_name': 'owner/repo', 'default_branch': 'main'},
+            'head_commit': {'id': 'abc123', 'message': 'Fix', 'author': {'name': 'Ada'}},
+        })
+        self.assertEqual(RepositoryAccess.objects.get(user=self.user, repository='owner/repo').allowed, True)
+
+        # Another process: nothing cached in memory
+        webhooks._repo_access.clear()
+        webhooks._sources.update(keys=frozenset(), access=frozenset(), loaded_at=None)
+        scheduler, now = Scheduler(poll_period=15), timezone.now()
+        self.assertEqual(scheduler.next_due_at(pushed, now), now + timedelta(hours=1))
+
+        self.assertTrue(webhooks.has_repo_access(self.user.id, 'owner/repo'))
+        self.assertEqual(len(self.access_checks), 1)
+
+    def test_telegram_secret_token(self):
+        """Test Telegram updates need the secret token and route by chat id"""
+        area = self.make_push_area(type='new_message', chat_id='42')
+        update = {'update_id': 7, 'message': {'chat': {'id': 42}, 'text': 'hi', 'from': {'first_name': 'Bob'}}}
+
+        refused = self.client.post('/webhooks/telegram/', update, content_type='application/json')
+        response = self.client.post(
+            '/webhooks/telegram/', update, content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='tg-secret',
+        )
+
+        self.assertEqual(refused.status_code, 403)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(executed, [(area.id, {'message_text': 'hi', 'sender_name': 'Bob', 'chat_id': '42'})])
+        self.assertEqual(AreaTriggerState.objects.get(area=area).cursor, {'last_update': 7})
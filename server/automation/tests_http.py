@@ -0,0 +1,339 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from automation.hooks import aio, register_action, register_reaction
+from automation.hooks.cursors import set_cursor
+from automation.hooks import coalesce
+from automation.hooks.coalesce import get_json, get_json_async, validators
+from automation.hooks.engine import HookEngine
+from automation.hooks.scheduler import Scheduler
+from automation.http_client import HttpClient, DEFAULT_TIMEOUT, http
+from automation.models import ExecutionLog
+from automation.providers.cache import ResponseCache, cached_response, response_cache
+from automation.ratelimit import RateLimited, RateLimiter
+from automation.tests_hooks import HookTestCase
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """
+    Local upstream answering every request with the client port. X-Status
+    sets the status and X-Reply-<Name> headers are sent back as <Name>.
+    """
+    protocol_version = "HTTP/1.1"
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        body = str(self.client_address[1]).encode()
+        etag = self.headers.get("X-Reply-ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(int(self.headers.get("X-Status", 200)))
+        for name, value in self.headers.items():
+            if name.lower().startswith("x-reply-"):
+                self.send_header(name[len("x-reply-"):], value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UpstreamMixin:
+    """Runs a local HTTP upstream for the duration of the test case"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        UpstreamHandler.hits.clear()
+
+
+class UpstreamTestCase(UpstreamMixin, SimpleTestCase):
+    pass
+
+
+class HttpClientTests(UpstreamTestCase):
+    """Tests for the shared pooled HTTP client"""
+
+    def test_connections_are_kept_alive(self):
+        """Test consecutive calls to a host reuse the pooled connection"""
+        client = HttpClient()
+        ports = {client.get(self.url).text for _ in range(3)}
+        self.assertEqual(len(ports), 1)
+
+    def test_latency_is_recorded_per_host(self):
+        """Test each call is counted in the host's stats, 5xx as errors"""
+        client = HttpClient()
+        client.get(self.url)
+        client.get(self.url, headers={"X-Status": "503"})
+
+        stats = client.stats(reset=True)["127.0.0.1"]
+        self.assertEqual((stats.calls, stats.errors), (2, 1))
+        self.assertGreater(stats.max, 0)
+        self.assertEqual(client.stats(), {})
+
+    def test_default_timeout(self):
+        """Test calls without a timeout get the default one"""
+        client = HttpClient()
+        seen = []
+        send = client.session.send
+        client.session.send = lambda request, **kwargs: seen.append(kwargs["timeout"]) or send(request, **kwargs)
+        client.get(self.url)
+        client.get(self.url, timeout=1)
+        self.assertEqual(seen, [DEFAULT_TIMEOUT, 1])
+
+
+class RateLimiterTests(UpstreamTestCase):
+    """Tests for per-upstream, per-credential rate limiting"""
+
+    def test_retry_after_blocks_the_credential(self):
+        """Test a 429 blocks further calls with that credential only"""
+        client = HttpClient(limiter=RateLimiter(limits={}))
+        limited = {"Authorization": "Bearer one", "X-Status": "429", "X-Reply-Retry-After": "120"}
+        client.get(self.url, headers=limited)
+
+        with self.assertRaises(RateLimited) as raised:
+            client.get(self.url, headers={"Authorization": "Bearer one"})
+        client.get(self.url, headers={"Authorization": "Bearer two"})
+
+        self.assertEqual(len(UpstreamHandler.hits), 2)
+        self.assertAlmostEqual(raised.exception.until - time.time(), 120, delta=5)
+
+    def test_token_bucket(self):
+        """Test calls above the configured burst are not sent"""
+        client = HttpClient(limiter=RateLimiter(limits={"127.0.0.1": (0.5, 2)}))
+        client.get(self.url)
+        client.get(self.url)
+        with self.assertRaises(RateLimited):
+            client.get(self.url)
+        self.assertEqual(len(UpstreamHandler.hits), 2)
+
+    def test_reported_budget(self):
+        """Test X-RateLimit-Remaining / X-RateLimit-Limit is exposed as remaining budget"""
+        limiter = RateLimiter(limits={})
+        client = HttpClient(limiter=limiter)
+        client.get(self.url, headers={"X-Reply-X-RateLimit-Remaining": "10", "X-Reply-X-RateLimit-Limit": "100"})
+        self.assertAlmostEqual(limiter.remaining(self.url), 0.1)
+
+    def test_async_calls_are_rate_limited(self):
+        """Test aio calls (httpx or the thread fallback) share the limiter of the sync client"""
+        limited = {"Authorization": "Bearer aio", "X-Status": "429", "X-Reply-Retry-After": "120"}
+        asyncio.run(aio.get(self.url, headers=limited))
+
+        with self.assertRaises(RateLimited):
+            asyncio.run(aio.get(self.url, headers={"Authorization": "Bearer aio"}))
+        with self.assertRaises(RateLimited):
+            http.get(self.url, headers={"Authorization": "Bearer aio"})
+        self.assertEqual(len(UpstreamHandler.hits), 1)
+
+
+@register_action("test_rate_limited_poll")
+def rate_limited_checker(area, now=None):
+    # Like the real checkers: upstream errors are swallowed
+    try:
+        http.get(area.config_action["url"], headers=area.config_action["headers"])
+    except Exception:
+        pass
+    return False
+
+
+@register_action("test_fire_with_cursor")
+def fire_with_cursor_checker(area, now=None):
+    set_cursor(area, "seen", "event-1")
+    return True
+
+
+@register_reaction("test_swallowing_send")
+def swallowing_executor(area, context=None):
+    # Like most providers: every exception becomes an error result
+    try:
+        http.get(area.config_reaction["url"], headers=area.config_reaction["headers"])
+        return {"detail": "sent"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+class RateLimitedAreaTests(UpstreamMixin, HookTestCase):
+    """Tests for rescheduling rate limited areas"""
+
+    def make_poll_area(self, **headers):
+        area = self.make_area(action_type='test_rate_limited_poll')
+        area.config_action.update(url=self.url, headers={"Authorization": f"Bearer {area.id}", **headers})
+        area.save()
+        return area
+
+    def test_rate_limited_area_is_deferred_not_failed(self):
+        """Test a 429 defers the area to Retry-After instead of logging an error"""
+        area = self.make_poll_area(**{"X-Status": "429", "X-Reply-Retry-After": "300"})
+        scheduler, now = Scheduler(poll_period=15), timezone.now()
+
+        report = HookEngine().run_due(scheduler, now)
+
+        self.assertEqual(report.errors, 0)
+        self.assertEqual(report.deferred, 1)
+        self.assertFalse(ExecutionLog.objects.filter(area=area).exists())
+        self.assertGreater(scheduler.earliest(), now + timedelta(seconds=250))
+
+    def test_swallowed_rate_limit_defers_the_reaction(self):
+        """Test a reaction whose provider catches RateLimited is deferred, not logged as a success"""
+        throttled = {"Authorization": "Bearer throttled"}
+        http.get(self.url, headers={**throttled, "X-Status": "429", "X-Reply-Retry-After": "300"})
+        area = self.make_area(action_type='test_fire_with_cursor', reaction_type='test_swallowing_send')
+        area.config_reaction.update(url=self.url, headers=throttled)
+        area.save()
+        scheduler, now = Scheduler(poll_period=15), timezone.now()
+
+        report = HookEngine().run_due(scheduler, now)
+
+        self.assertEqual(report.deferred, 1)
+        self.assertFalse(ExecutionLog.objects.filter(area=area).exists())
+        self.assertNotIn("seen", area.get_trigger_state().cursor)
+        self.assertGreater(scheduler.earliest(), now + timedelta(seconds=250))
+
+    def test_low_budget_spaces_out_polls(self):
+        """Test areas polling an upstream with little quota left are polled less often"""
+        self.make_poll_area(**{"X-Reply-X-RateLimit-Remaining": "0", "X-Reply-X-RateLimit-Limit": "100"})
+        scheduler, now = Scheduler(poll_period=15), timezone.now()
+
+        HookEngine().run_due(scheduler, now)
+
+        self.assertEqual(scheduler.earliest(), now + timedelta(seconds=60))
+
+
+class ConditionalGetTests(UpstreamTestCase):
+    """Tests for ETag based conditional polling"""
+
+    def setUp(self):
+        super().setUp()
+        validators.clear()
+        validators.not_modified = 0
+
+    def test_not_modified_returns_remembered_body(self):
+        """Test a 304 answer returns the body of the previous 200"""
+        headers = {"Authorization": "Bearer etag", "X-Reply-ETag": '"v1"'}
+        first = get_json(self.url, owner=1, headers=headers)
+        second = get_json(self.url, owner=1, headers=headers)
+
+        self.assertEqual(first[0], 200)
+        self.assertEqual(second, first)
+        self.assertEqual(len(UpstreamHandler.hits), 2)
+        self.assertEqual(validators.not_modified, 1)
+
+    def test_validators_are_scoped_to_owner(self):
+        """Test a remembered body is never served to another token owner"""
+        headers = {"Authorization": "Bearer etag", "X-Reply-ETag": '"v1"'}
+        get_json(self.url, owner=1, headers=headers)
+        not_modified = validators.not_modified
+        get_json(self.url, owner=2, headers=headers)
+        self.assertEqual(validators.not_modified, not_modified)
+
+    def test_async_polls_are_coalesced(self):
+        """Test concurrent async polls of a resource make one request, shared with sync checkers"""
+        headers = {"Authorization": "Bearer async", "X-Reply-ETag": '"v1"'}
+
+        async def poll(count):
+            return await asyncio.gather(*(get_json_async(self.url, owner=1, headers=headers) for _ in range(count)))
+
+        with coalesce.tick() as polls:
+            results = asyncio.run(poll(5))
+            self.assertEqual(get_json(self.url, owner=1, headers=headers), results[0])
+        self.assertEqual(results, [results[0]] * 5)
+        self.assertEqual((polls.fetched, polls.shared), (1, 5))
+        self.assertEqual(len(UpstreamHandler.hits), 1)
+
+        with coalesce.tick():
+            self.assertEqual(asyncio.run(poll(2)), [results[0]] * 2)
+        self.assertEqual(validators.not_modified, 1)
+
+
+class PublicDataProvider:
+    """Provider method cached like the public data reactions"""
+    service_name = "public"
+
+    def __init__(self, url):
+        self.url = url
+
+    @cached_response(ttl=60, params={"item": None, "lang": "en"})
+    def get_item(self, params, context=None):
+        time.sleep(0.05)
+        response = http.get(self.url + str(params.get("item")), headers={"X-Status": params.get("status", "200")})
+        return {"success": response.ok, "port": response.text}
+
+
+class ResponseCacheTests(UpstreamTestCase):
+    """Tests for the provider response cache"""
+
+    def setUp(self):
+        super().setUp()
+        response_cache.clear()
+        self.provider = PublicDataProvider(self.url)
+
+    def test_equivalent_params_share_an_entry(self):
+        """Test params are normalized and unrelated config keys ignored"""
+        first = self.provider.get_item({"item": 7, "type": "get_item"})
+        second = self.provider.get_item({"item": " 7 ", "lang": "EN"})
+
+        self.assertEqual(first, second)
+        self.assertEqual(UpstreamHandler.hits, ["/7"])
+        stats = response_cache.stats()["public.get_item"]
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+    def test_failures_are_not_cached(self):
+        """Test unsuccessful results are fetched again"""
+        self.provider.get_item({"item": 1, "status": "503"})
+        self.provider.get_item({"item": 1, "status": "503"})
+        self.assertEqual(len(UpstreamHandler.hits), 2)
+
+    def test_concurrent_misses_make_one_call(self):
+        """Test concurrent misses on a key collapse into a single upstream call"""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.provider.get_item({"item": 3})))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(UpstreamHandler.hits), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(response_cache.stats()["public.get_item"].shared, 4)
+
+    def test_lru_eviction_by_size(self):
+        """Test least recently used results are evicted once over the byte budget"""
+        cache = ResponseCache(max_bytes=150)
+        result = {"success": True, "data": "x" * 30}
+        for key in ("a", "b"):
+            cache.get_or_call("m", key, 60, lambda: result)
+        cache.get_or_call("m", "a", 60, lambda: result)
+        cache.get_or_call("m", "c", 60, lambda: result)
+
+        self.assertLessEqual(cache.size, 150)
+        calls = []
+        cache.get_or_call("m", "a", 60, lambda: calls.append("a") or result)
+        cache.get_or_call("m", "b", 60, lambda: calls.append("b") or result)
+        self.assertEqual(calls, ["b"])
@@ -16,6 +16,7 @@ from .views import (
 from .views_oauth import GitHubAuthURLView, GitHubCallbackView, SpotifyAuthURLView, SpotifyCallbackView
 from .views_github import GitHubRepositoriesView
 from .views_spotify import SpotifyPlaylistsView
+from .views_webhooks import GitHubWebhookView, TelegramWebhookView
 
 urlpatterns = [
     path('about.json', AboutView.as_view(), name='about_json'),
@@ -46,4 +47,8 @@ urlpatterns = [
     path('services/<uuid:id>/reactions/', ServiceReactionsView.as_view(), name='service_reactions'),
     path('services/<uuid:id>/subscribe/', ServiceSubscribeView.as_view(), name='service_subscribe'),
     path('services/<uuid:id>/unsubscribe/', ServiceUnsubscribeView.as_view(), name='service_unsubscribe'),
+
+    # Inbound webhooks
+    path('webhooks/github/', GitHubWebhookView.as_view(), name='webhook_github'),
+    path('webhooks/telegram/', TelegramWebhookView.as_view(), name='webhook_telegram'),
 ]
@@ -3,9 +3,16 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
 import time
+import uuid
 from django.shortcuts import get_object_or_404
-from .models import Service, Action, Reaction, UserService, Area, ExecutionLog
-from .providers.registry import ProviderRegistry
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from rest_framework.exceptions import ValidationError
+from .catalog import get_catalog
+from django.db.models import Count, Q, Sum
+from .hooks.logbuffer import hour_bucket
+from .pagination import LogCursorPagination
+from .models import Service, Action, Reaction, UserService, Area, ExecutionLog, ExecutionStat
 from .serializers import (
     ServiceSerializer, 
     ServiceListSerializer,
@@ -50,7 +57,7 @@ class ServiceActionsView(generics.ListAPIView):
     def get_queryset(self):
         service_id = self.kwargs.get('id')
         service = get_object_or_404(Service, id=service_id)
-        return Action.objects.filter(service=service)
+        return Action.objects.filter(service=service).select_related('service')
 
 
 class ServiceReactionsView(generics.ListAPIView):
@@ -64,7 +71,7 @@ class ServiceReactionsView(generics.ListAPIView):
     def get_queryset(self):
         service_id = self.kwargs.get('id')
         service = get_object_or_404(Service, id=service_id)
-        return Reaction.objects.filter(service=service)
+        return Reaction.objects.filter(service=service).select_related('service')
 
 
 class ServiceSubscribeView(APIView):
@@ -101,7 +108,7 @@ class ServiceSubscribeView(APIView):
         user_service.set_tokens(access_token, refresh_token)
         user_service.save()
         
-        response_serializer = UserServiceSerializer(user_service)
+        response_serializer = UserServiceSerializer(user_service, context={'request': request})
         return Response(
             response_serializer.data,
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
@@ -149,79 +156,22 @@ class AboutView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        import time
-        from .models import Service
-        
-        services_data = []
-        services = Service.objects.prefetch_related('actions', 'reactions').all()
-
-        for service in services:
-            try:
-                provider = ProviderRegistry.get_provider(service.name)
-                print(f"[AboutView] Provider for {service.name}: {provider is not None}")
-            except Exception as e:
-                print(f"[AboutView] Failed to get provider for {service.name}: {e}")
-                provider = None
-            
-            # Helper to get params from provider definition
-            def get_params_for_action(action_name):
-                try:
-                    if not provider:
-                        print(f"[AboutView] No provider for action {action_name}")
-                        return []
-                    actions = provider.get_actions()
-                    print(f"[AboutView] Provider actions for {service.name}: {[a['name'] for a in actions]}")
-                    for act in actions:
-                        if act['name'] == action_name:
-                            params = act.get('params', [])
-                            print(f"[AboutView] Found params for {action_name}: {params}")
-                            return params
-                    print(f"[AboutView] Action {action_name} not found in provider")
-                    return []
-                except Exception as e:
-                    print(f"[AboutView] Exception in get_params_for_action({action_name}): {e}")
-                    return []
-
-            def get_params_for_reaction(reaction_name):
-                try:
-                    if not provider: return []
-                    for react in provider.get_reactions():
-                        if react['name'] == reaction_name:
-                            return react.get('params', [])
-                    return []
-                except Exception as e:
-                    print(f"[AboutView] Exception in get_params_for_reaction({reaction_name}): {e}")
-                    return []
-
-            services_data.append({
-                "name": service.name,
-                "actions": [
-                    {
-                        "name": action.name, 
-                        "description": action.description,
-                        "params": get_params_for_action(action.name)
-                    }
-                    for action in service.actions.all()
-                ],
-                "reactions": [
-                    {
-                        "name": reaction.name, 
-                        "description": reaction.description,
-                        "params": get_params_for_reaction(reaction.name)
-                    }
-                    for reaction in service.reactions.all()
-                ]
+        catalog = get_catalog()
+        if catalog.etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                "client": {
+                    "host": request.META.get('REMOTE_ADDR')
+                },
+                "server": {
+                    "current_time": int(time.time()),
+                    "services": catalog.services
+                }
             })
-
-        return Response({
-            "client": {
-                "host": request.META.get('REMOTE_ADDR')
-            },
-            "server": {
-                "current_time": int(time.time()),
-                "services": services_data
-            }
-        })
+        response["ETag"] = catalog.etag
+        response["Cache-Control"] = "no-cache"
+        return response
 
 
 class AreaListCreateView(generics.ListCreateAPIView):
@@ -252,13 +202,41 @@ class AreaDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class AreaLogsView(generics.ListAPIView):
     """
-    GET /areas/logs/ -> list all logs accessible to user
+    GET /areas/logs/ -> list the logs accessible to user, newest first
+
+    Query params: area, status, since / until (ISO 8601, since inclusive,
+    until exclusive), limit, and cursor, taken from the X-Next-Cursor or
+    Link header of the previous page (see LogCursorPagination).
     """
     serializer_class = ExecutionLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LogCursorPagination
 
     def get_queryset(self):
-        return ExecutionLog.objects.filter(area__user=self.request.user).order_by('-executed_at')
+        params = self.request.query_params
+        queryset = ExecutionLog.objects.filter(area__user=self.request.user).select_related('area')
+        if params.get('area'):
+            try:
+                queryset = queryset.filter(area_id=uuid.UUID(params['area']))
+            except ValueError:
+                raise ValidationError({'area': 'Must be a valid UUID.'})
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('since'):
+            queryset = queryset.filter(executed_at__gte=_parse_datetime_param(params, 'since'))
+        if params.get('until'):
+            queryset = queryset.filter(executed_at__lt=_parse_datetime_param(params, 'until'))
+        return queryset
+
+
+def _parse_datetime_param(params, name):
+    try:
+        value = parse_datetime(params[name])
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: 'Must be an ISO 8601 datetime.'})
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
 
 
 class DashboardStatsView(APIView):
@@ -268,46 +246,63 @@ class DashboardStatsView(APIView):
         user = request.user
         
         # 1. Workflow Stats
-        active_workflows = Area.objects.filter(user=user, enabled=True).count()
-        inactive_workflows = Area.objects.filter(user=user, enabled=False).count()
+        workflows = Area.objects.filter(user=user).aggregate(
+            active=Count('id', filter=Q(enabled=True)),
+            inactive=Count('id', filter=Q(enabled=False)),
+        )
         
-        # 2. Execution Stats
-        total_executions = ExecutionLog.objects.filter(area__user=user).count()
+        # 2. Execution Stats, from the hourly rollup kept by the hook engine
+        since = hour_bucket(timezone.now() - timezone.timedelta(hours=24))
+        previous = since - timezone.timedelta(hours=24)
+        recent = Q(bucket__gte=since)
+        before = Q(bucket__gte=previous, bucket__lt=since)
+        stats = ExecutionStat.objects.filter(user=user).aggregate(
+            total_successes=Sum('successes'),
+            total_errors=Sum('errors'),
+            recent_successes=Sum('successes', filter=recent),
+            recent_errors=Sum('errors', filter=recent),
+            previous_successes=Sum('successes', filter=before),
+            previous_errors=Sum('errors', filter=before),
+        )
+        stats = {key: value or 0 for key, value in stats.items()}
         
-        # 3. Success Rate (Last 24h)
-        last_24h = timezone.now() - timezone.timedelta(hours=24)
-        recent_logs = ExecutionLog.objects.filter(area__user=user, executed_at__gte=last_24h)
-        total_recent = recent_logs.count()
-        if total_recent > 0:
-            success_count = recent_logs.filter(status='success').count()
-            success_rate = int((success_count / total_recent) * 100)
-        else:
-            success_rate = 100 # Default to 100% if no recent activity to avoid scary 0%
-            
-        # 4. Success Rate Trend (vs previous 24h) - Simplified for now
-        # We could compare with the 24h before that, but let's keep it simple.
+        # 3. Success Rate (Last 24h) and its trend vs the previous 24h
+        success_rate = _success_rate(stats['recent_successes'], stats['recent_errors'])
+        previous_success_rate = _success_rate(stats['previous_successes'], stats['previous_errors'])
+        recent_executions = stats['recent_successes'] + stats['recent_errors']
+        previous_executions = stats['previous_successes'] + stats['previous_errors']
         
         return Response({
-            "total_executions": total_executions,
-            "active_workflows": active_workflows,
-            "inactive_workflows": inactive_workflows,
+            "total_executions": stats['total_successes'] + stats['total_errors'],
+            "active_workflows": workflows['active'],
+            "inactive_workflows": workflows['inactive'],
             "success_rate": success_rate,
+            "executions_24h": recent_executions,
+            "executions_trend": recent_executions - previous_executions,
+            "previous_success_rate": previous_success_rate,
+            "success_rate_trend": success_rate - previous_success_rate,
         })
 
+
+def _success_rate(successes, errors):
+    # Default to 100% if no activity to avoid scary 0%
+    total = successes + errors
+    return int((successes / total) * 100) if total else 100
+
 from rest_framework import viewsets
 from .models import Service, Action, Reaction, Area
 from .serializers import ServiceSerializer, ActionSerializer, ReactionSerializer, AreaSerializer
 
 class ServiceViewSet(viewsets.ModelViewSet):
-    queryset = Service.objects.all()
+    queryset = Service.objects.prefetch_related('actions', 'reactions')
     serializer_class = ServiceSerializer
 
 class ActionViewSet(viewsets.ModelViewSet):
-    queryset = Action.objects.all()
+    queryset = Action.objects.select_related('service')
     serializer_class = ActionSerializer
 
 class ReactionViewSet(viewsets.ModelViewSet):
-    queryset = Reaction.objects.all()
+    queryset = Reaction.objects.select_related('service')
     serializer_class = ReactionSerializer
 
 class AreaViewSet(viewsets.ModelViewSet):
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from automation.models import UserService, Service
-import requests
+from automation.http_client import http
 
 
 class GitHubRepositoriesView(APIView):
@@ -34,7 +34,7 @@ class GitHubRepositoriesView(APIView):
             }
             
             # Get user's repositories (both owned and collaborated)
-            response = requests.get(
+            response = http.get(
                 "https://api.github.com/user/repos",
                 headers=headers,
                 params={"per_page": 100, "sort": "updated"}
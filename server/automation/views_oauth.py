@@ -8,7 +8,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import Service, UserService
 import os
-import requests
+from automation.http_client import http
+from automation.ratelimit import RateLimited
 import urllib.parse
 from django.contrib.auth import get_user_model
 
@@ -86,7 +87,11 @@ class GitHubCallbackView(APIView):
             "redirect_uri": redirect_uri
         }
         
-        resp = requests.post(token_url, json=data, headers=headers)
+        try:
+            resp = http.post(token_url, json=data, headers=headers)
+        except RateLimited as e:
+            print(f"[DEBUG] Token exchange throttled: {e}")
+            return redirect("http://localhost:8081/dashboard?error=github_rate_limited")
         print(f"[DEBUG] GitHub response status: {resp.status_code}")
         if resp.status_code != 200:
              print(f"[DEBUG] Token exchange failed, redirecting with error")
@@ -188,7 +193,11 @@ class SpotifyCallbackView(APIView):
             "client_secret": client_secret
         }
         
-        resp = requests.post(token_url, data=data) # Spotify expects form-data, not json usually, but requests handles data= as form
+        try:
+            resp = http.post(token_url, data=data) # Spotify expects form-data, not json usually, but requests handles data= as form
+        except RateLimited as e:
+            print(f"[ERROR] Spotify token exchange throttled: {e}")
+            return redirect("http://localhost:8081/dashboard?error=spotify_rate_limited")
         
         if resp.status_code != 200:
              print(f"[ERROR] Spotify token exchange failed: {resp.text}")
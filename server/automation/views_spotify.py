@@ -4,7 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .models import UserService, Service
 from .utils_spotify import get_valid_spotify_token
-import requests
+from automation.http_client import http
 
 
 class SpotifyPlaylistsView(APIView):
@@ -30,7 +30,7 @@ class SpotifyPlaylistsView(APIView):
 
             # Fetch playlists from Spotify API
             headers = {"Authorization": f"Bearer {access_token}"}
-            response = requests.get(
+            response = http.get(
                 "https://api.spotify.com/v1/me/playlists",
                 headers=headers,
                 params={"limit": 50}
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+
+from automation.hooks.webhooks import dispatch, github_event, mark_source, telegram_event
+
+# Ensure built-in reactions are loaded: pushed triggers run them in the web process
+import automation.hooks.reactions.log  # noqa: F401
+import automation.hooks.reactions.gmail_send_email  # noqa: F401
+import automation.hooks.reactions.github_create_issue  # noqa: F401
+import automation.hooks.reactions.discord_send_message  # noqa: F401
+import automation.hooks.reactions.spotify_add_to_playlist  # noqa: F401
+import automation.hooks.reactions.telegram_send_message  # noqa: F401
+import automation.hooks.reactions.twitter_post_tweet  # noqa: F401
+import automation.hooks.reactions.image_gen_generate_image  # noqa: F401
+import automation.hooks.reactions.anime_get_anime_details  # noqa: F401
+import automation.hooks.reactions.games_get_game_news  # noqa: F401
+import automation.hooks.reactions.yahoo_finance_get_market_news  # noqa: F401
+import automation.hooks.reactions.pdf_converter_pdf_to_text  # noqa: F401
+import automation.hooks.reactions.job_search_get_job_details  # noqa: F401
+import automation.hooks.reactions.contact_crawler_scrape_contacts  # noqa: F401
+import automation.hooks.reactions.vehicle_detect_license_plate  # noqa: F401
+import automation.hooks.reactions.spotify_dl_download_song  # noqa: F401
+
+
+class WebhookView(APIView):
+    """Base for unauthenticated upstream webhooks, verified by a shared secret."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    # Upstreams deliver in bursts; requests are authenticated by their signature instead
+    throttle_classes = []
+
+    def parse_json(self, body):
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return None
+
+    def dispatched(self, event):
+        if event is None:
+            return Response({"status": "ignored"})
+        report = dispatch(event)
+        return Response({
+            "status": "ok", "areas": len(report.outcomes), "triggered": report.triggered, "queued": report.queued,
+        })
+
+
+class GitHubWebhookView(WebhookView):
+    """
+    POST /webhooks/github/
+    Push, issues and pull_request deliveries, signed with GITHUB_WEBHOOK_SECRET
+    (X-Hub-Signature-256).
+    """
+
+    def post(self, request):
+        secret = settings.GITHUB_WEBHOOK_SECRET
+        if not secret:
+            return Response({"error": "GitHub webhooks are not configured"}, status=status.HTTP_404_NOT_FOUND)
+
+        body = request.body
+        expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, request.headers.get("X-Hub-Signature-256", "")):
+            return Response({"error": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
+
+        payload = self.parse_json(body)
+        if payload is None:
+            return Response({"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST)
+
+        repository = (payload.get("repository") or {}).get("full_name")
+        if repository:
+            # Any verified delivery (including "ping") means the repository pushes to us
+            mark_source(f"github:{repository.lower()}")
+
+        return self.dispatched(github_event(request.headers.get("X-GitHub-Event", ""), payload))
+
+
+class TelegramWebhookView(WebhookView):
+    """
+    POST /webhooks/telegram/
+    Bot updates, authenticated by the secret_token given to setWebhook
+    (X-Telegram-Bot-Api-Secret-Token = TELEGRAM_WEBHOOK_SECRET).
+    """
+
+    def post(self, request):
+        secret = settings.TELEGRAM_WEBHOOK_SECRET
+        if not secret:
+            return Response({"error": "Telegram webhooks are not configured"}, status=status.HTTP_404_NOT_FOUND)
+
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not hmac.compare_digest(secret, token):
+            return Response({"error": "Invalid secret token"}, status=status.HTTP_403_FORBIDDEN)
+
+        update = self.parse_json(request.body)
+        if update is None:
+            return Response({"error": "Invalid JSON"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.dispatched(telegram_event(update))
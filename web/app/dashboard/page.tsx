@@ -82,7 +82,7 @@ export default function DashboardPage() {
                 }
 
                 // Fetch Logs (Recent Activity)
-                const logsRes = await fetch(`${API_BASE}/areas/logs/`, { headers });
+                const logsRes = await fetch(`${API_BASE}/areas/logs/?limit=5`, { headers });
                 if (logsRes.ok) {
                     const logsData = await logsRes.json();
                     setRecentLogs(logsData.slice(0, 5)); // Limit to 5
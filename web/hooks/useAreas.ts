@@ -1,5 +1,5 @@
 import { useCallback, useEffect, useState } from 'react';
-import { api } from '../lib/api';
+import { api, Page } from '../lib/api';
 
 export interface AreaItem {
   id: string;
@@ -17,6 +17,8 @@ export interface ExecutionLogItem {
   executed_at: string;
   status: string;
   message: string;
+  repeat_count: number;
+  last_executed_at: string | null;
 }
 
 export function useAreas() {
@@ -49,9 +51,13 @@ export function useAreas() {
     await refresh();
   }, [refresh]);
 
-  const logs = useCallback(async (areaId?: string): Promise<ExecutionLogItem[]> => {
-    const q = areaId ? `?area=${areaId}` : '';
-    return api.get(`/areas/logs/${q}`);
+  // One page of logs, newest first: pass the nextCursor of a page to load the next (older) one
+  const logs = useCallback(async (areaId?: string, cursor?: string | null): Promise<Page<ExecutionLogItem>> => {
+    const params = new URLSearchParams();
+    if (areaId) params.set('area', areaId);
+    if (cursor) params.set('cursor', cursor);
+    const q = params.toString();
+    return api.getPage<ExecutionLogItem>(`/areas/logs/${q ? `?${q}` : ''}`);
   }, []);
 
   return { areas, loading, error, refresh, createArea, deleteArea, logs };
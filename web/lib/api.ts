@@ -1,6 +1,12 @@
 export const API_BASE = process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8080';
 
-async function request(path: string, init?: RequestInit) {
+export interface Page<T> {
+  items: T[];
+  // Cursor of the next page (X-Next-Cursor header), null on the last page
+  nextCursor: string | null;
+}
+
+async function send(path: string, init?: RequestInit) {
   const res = await fetch(`${API_BASE}${path}`, {
     ...init,
     headers: {
@@ -14,13 +20,27 @@ async function request(path: string, init?: RequestInit) {
     try { detail = await res.json(); } catch {}
     throw new Error(`API ${path} failed: ${res.status} ${res.statusText} ${detail ? JSON.stringify(detail) : ''}`);
   }
+  return res;
+}
+
+async function parse(res: Response) {
   const ct = res.headers.get('content-type') || '';
   if (ct.includes('application/json')) return res.json();
   return res.text();
 }
 
+async function request(path: string, init?: RequestInit) {
+  return parse(await send(path, init));
+}
+
+async function requestPage<T>(path: string): Promise<Page<T>> {
+  const res = await send(path);
+  return { items: await parse(res), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
 export const api = {
   get: (path: string) => request(path),
+  getPage: <T = any>(path: string) => requestPage<T>(path),
   post: (path: string, body: any) => request(path, { method: 'POST', body: JSON.stringify(body) }),
   del: (path: string) => request(path, { method: 'DELETE' }),
 };